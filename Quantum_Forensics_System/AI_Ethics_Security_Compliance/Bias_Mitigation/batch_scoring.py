@@ -0,0 +1,178 @@
+# batch_scoring.py
+# Batched, parallel scoring for bias detection. The feature scaler is fitted incrementally over fixed-size
+# batches, each batch is scaled just before it is scored, and batches are predicted on a thread or process
+# pool. Predictions are folded into a running confusion matrix as they arrive, so neither a scaled copy of
+# the data nor the full prediction vector is ever held in memory. The classification report is rebuilt from
+# the confusion matrix in exactly the layout sklearn prints.
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import classification_report
+from sklearn.preprocessing import StandardScaler
+
+# Number of rows scaled and scored per batch
+DEFAULT_BATCH_SIZE = 65_536
+
+def iter_batches(data, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yields consecutive row slices of a DataFrame or array without copying them.
+    """
+    for start in range(0, len(data), batch_size):
+        yield data.iloc[start:start + batch_size] if isinstance(data, (pd.DataFrame, pd.Series)) else data[start:start + batch_size]
+
+def fit_scaler(data, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Fits a StandardScaler with partial_fit over fixed-size batches, so no scaled copy of the data is made.
+
+    :param data: Feature DataFrame or array.
+    :param batch_size: Rows per batch.
+    :return: Fitted StandardScaler.
+    """
+    scaler = StandardScaler()
+    for batch in iter_batches(data, batch_size):
+        scaler.partial_fit(batch)
+    return scaler
+
+def _score(model, scaler, batch):
+    return model.predict(batch if scaler is None else scaler.transform(batch))
+
+# Model and scaler of a process-pool worker, sent once per worker instead of with every batch
+_worker_model = None
+_worker_scaler = None
+
+def _init_worker(model, scaler):
+    global _worker_model, _worker_scaler
+    _worker_model, _worker_scaler = model, scaler
+
+def _score_in_worker(batch):
+    return _score(_worker_model, _worker_scaler, batch)
+
+def score_batches(model, data, scaler=None, batch_size=DEFAULT_BATCH_SIZE, workers=1, use_processes=False):
+    """
+    Scores the data batch by batch and yields the predictions of each batch in row order. At most twice as
+    many batches as workers are in flight, which bounds the memory held by queued batches and results.
+
+    :param model: Fitted model with a predict method (picklable when use_processes is True).
+    :param data: Feature DataFrame or array, unscaled when a scaler is given.
+    :param scaler: Fitted scaler applied to each batch before prediction, or None.
+    :param batch_size: Rows per batch.
+    :param workers: Number of threads or processes; with 1 the batches are scored in the calling thread.
+    :param use_processes: Use a process pool instead of a thread pool, for models that hold the GIL.
+    """
+    batches = iter_batches(data, batch_size)
+    if workers == 1:
+        for batch in batches:
+            yield _score(model, scaler, batch)
+        return
+    if use_processes:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model, scaler))
+        submit = lambda batch: pool.submit(_score_in_worker, batch)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        submit = lambda batch: pool.submit(_score, model, scaler, batch)
+    pending = deque()
+    try:
+        for batch in batches:
+            pending.append(submit(batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+class ConfusionAccumulator:
+    """
+    Running confusion matrix over batches whose label set is discovered as they arrive. Labels are kept in
+    sorted order, as sklearn's confusion_matrix orders them.
+    """
+
+    def __init__(self):
+        self.labels = np.empty(0)
+        self.matrix = np.zeros((0, 0), dtype=np.int64)
+
+    def _extend(self, labels):
+        """
+        Adds new labels, moving the existing counts to the rows and columns of their labels.
+        """
+        labels = np.union1d(self.labels, labels) if len(self.labels) else np.unique(labels)
+        if len(labels) != len(self.labels):
+            positions = np.searchsorted(labels, self.labels)
+            matrix = np.zeros((len(labels), len(labels)), dtype=np.int64)
+            matrix[np.ix_(positions, positions)] = self.matrix
+            self.labels, self.matrix = labels, matrix
+
+    def update(self, true_labels, predictions):
+        """
+        Adds a batch of (true label, prediction) pairs.
+        """
+        true_labels = np.asarray(true_labels)
+        predictions = np.asarray(predictions)
+        if len(true_labels) == 0:
+            return
+        self._extend(np.concatenate([np.unique(true_labels), np.unique(predictions)]))
+        k = len(self.labels)
+        cells = np.searchsorted(self.labels, true_labels) * k + np.searchsorted(self.labels, predictions)
+        self.matrix += np.bincount(cells, minlength=k * k).reshape(k, k)
+
+    def merge(self, other):
+        """
+        Adds the counts of another accumulator.
+
+        :return: self
+        """
+        if len(other.labels):
+            self._extend(other.labels)
+            positions = np.searchsorted(self.labels, other.labels)
+            self.matrix[np.ix_(positions, positions)] += other.matrix
+        return self
+
+    def confusion_matrix(self):
+        """
+        :return: The matrix sklearn's confusion_matrix returns for all rows seen.
+        """
+        return self.matrix.copy()
+
+    def classification_report(self, target_names=None, digits=2, output_dict=False, zero_division='warn'):
+        """
+        Builds the report sklearn's classification_report returns for all rows seen. The scores come from
+        sklearn evaluated on one weighted pair per confusion cell; the text is laid out as sklearn lays it out,
+        with integer supports.
+        """
+        k = len(self.labels)
+        true_cells = np.repeat(self.labels, k)
+        predicted_cells = np.tile(self.labels, k)
+        weights = self.matrix.ravel()
+        occupied = weights > 0
+        report = classification_report(true_cells[occupied], predicted_cells[occupied], labels=self.labels,
+                                       target_names=target_names, sample_weight=weights[occupied],
+                                       output_dict=True, zero_division=zero_division)
+        for scores in report.values():
+            if isinstance(scores, dict):
+                scores['support'] = int(scores['support'])
+        return report if output_dict else _format_report(report, digits)
+
+def _format_report(report, digits):
+    """
+    Lays out a classification_report dictionary as sklearn's text report.
+    """
+    headers = ["precision", "recall", "f1-score", "support"]
+    averages = [name for name in ('accuracy', 'micro avg', 'macro avg', 'weighted avg', 'samples avg') if name in report]
+    classes = [name for name in report if name not in averages]
+    width = max(max(len(name) for name in classes), len("weighted avg"), digits)
+    text = ("{:>{width}s} " + " {:>9}" * len(headers)).format("", *headers, width=width) + "\n\n"
+    row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+    for name in classes:
+        text += row_fmt.format(name, *(report[name][header] for header in headers), width=width, digits=digits)
+    text += "\n"
+    for name in averages:
+        if name == 'accuracy':
+            support = report['macro avg']['support']
+            text += ("{:>{width}s} " + " {:>9.{digits}}" * 2 + " {:>9.{digits}f}" + " {:>9}\n").format(
+                name, "", "", report[name], support, width=width, digits=digits)
+        else:
+            text += row_fmt.format(name, *(report[name][header] for header in headers), width=width, digits=digits)
+    return text
@@ -4,8 +4,8 @@
 
 import numpy as np
 import pandas as pd
-from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.preprocessing import StandardScaler
+from batch_scoring import DEFAULT_BATCH_SIZE, ConfusionAccumulator, fit_scaler, score_batches
 
 # Placeholder function for loading model and data
 def load_data_and_model():
@@ -27,20 +27,39 @@ def preprocess_data(data):
     scaled_data = scaler.fit_transform(data)
     return scaled_data
 
+# Incremental preprocessing that leaves the scaling to the scoring batches
+def fit_preprocessor(data, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Fits the feature scaler batch by batch without materializing a scaled copy of the data.
+    Pass the result to detect_bias as `scaler` together with the unscaled data.
+    """
+    return fit_scaler(data, batch_size)
+
 # Bias detection analysis
-def detect_bias(model, data, labels):
+def detect_bias(model, data, labels, scaler=None, batch_size=DEFAULT_BATCH_SIZE, workers=1, use_processes=False):
     """
     Analyzes the model's predictions to identify potential bias based on classification metrics.
+    The data is scored in batches, optionally on a thread or process pool, and the predictions are
+    folded into a running confusion matrix instead of being held in memory.
     :param model: Pre-trained model for analysis
-    :param data: Preprocessed input data
+    :param data: Preprocessed input data, or raw features when a scaler is given
     :param labels: True labels for the input data
+    :param scaler: Fitted scaler (see fit_preprocessor) applied to each batch before prediction
+    :param batch_size: Number of rows scored per batch
+    :param workers: Number of threads (or processes) scoring batches concurrently
+    :param use_processes: Score on a process pool, for models that do not release the GIL
     :return: Bias detection results (e.g., classification report, confusion matrix)
     """
-    predictions = model.predict(data)
+    labels = np.asarray(labels)
+    accumulator = ConfusionAccumulator()
+    start = 0
+    for predictions in score_batches(model, data, scaler, batch_size, workers, use_processes):
+        accumulator.update(labels[start:start + len(predictions)], predictions)
+        start += len(predictions)
     
     # Generate classification report to identify biases
-    report = classification_report(labels, predictions, target_names=['Class 1', 'Class 2'])
-    confusion = confusion_matrix(labels, predictions)
+    report = accumulator.classification_report(target_names=['Class 1', 'Class 2'])
+    confusion = accumulator.confusion_matrix()
     
     print("Classification Report:\n", report)
     print("Confusion Matrix:\n", confusion)
@@ -60,14 +79,15 @@ if __name__ == "__main__":
     # Load the dataset and pre-trained model
     data, model = load_data_and_model()
     
-    # Preprocess the data
-    processed_data = preprocess_data(data)
-
     # Placeholder: Assuming true labels are loaded with the data
     labels = data['label_column']  # Adjust to actual label column
+    features = data.drop(columns=['label_column'])
+
+    # Fit the scaler incrementally; each batch is scaled just before it is scored
+    scaler = fit_preprocessor(features)
 
     # Detect bias in the model's predictions
-    detect_bias(model, processed_data, labels)
+    detect_bias(model, features, labels, scaler=scaler, workers=4)
     
     # Mitigate bias if necessary
     mitigate_bias()
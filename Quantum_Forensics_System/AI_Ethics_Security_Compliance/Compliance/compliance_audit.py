@@ -0,0 +1,224 @@
+# compliance_audit.py
+# Streaming compliance audit. Each file is read once in chunks; its header is checked for columns named
+# after PII, every chunk is scanned for PII and checked against the retention cutoff, and expired rows are emitted as compact [start, stop) row ranges rather than
+# copied frames. A persisted retention index records each file's size, modification time, created_at range
+# and last findings, so an unchanged file is skipped entirely when none of its rows can have expired since
+# the previous sweep.
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from pii_scanner import SENSITIVE_COLUMNS, PIIScanAccumulator
+
+# Default number of rows read per chunk
+DEFAULT_CHUNKSIZE = 500_000
+
+# Column holding the creation time of each row
+CREATED_AT_COLUMN = 'created_at'
+
+def retention_cutoff(retention_period_years=5, now=None):
+    """
+    :return: Timestamp before which rows exceed the retention period.
+    """
+    return pd.Timestamp(now if now is not None else datetime.now()) - pd.DateOffset(years=retention_period_years)
+
+def mask_ranges(mask, offset=0):
+    """
+    Compresses a boolean row mask into the [start, stop) ranges of its True runs.
+
+    :param mask: Boolean array over consecutive rows.
+    :param offset: Row offset of the first element of the mask.
+    :return: int64 array of shape (ranges, 2).
+    """
+    edges = np.diff(np.concatenate([[0], mask.view(np.int8), [0]]))
+    return np.column_stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)]).astype(np.int64) + offset
+
+def _append_ranges(ranges, new):
+    """
+    Appends row ranges that follow the existing ones, joining a range that continues the last one.
+    """
+    if ranges and len(new) and ranges[-1][-1, 1] == new[0, 0]:
+        ranges[-1] = ranges[-1].copy()
+        ranges[-1][-1, 1] = new[0, 1]
+        new = new[1:]
+    if len(new):
+        ranges.append(new)
+
+def audit_file(path, cutoff, chunksize=DEFAULT_CHUNKSIZE, scan_pii=True):
+    """
+    Audits one CSV file in a single chunked pass: check of the column names, PII scan of every column and
+    retention check of created_at.
+
+    :param path: The CSV file path.
+    :param cutoff: Rows created before this time exceed the retention period.
+    :param chunksize: Rows per chunk.
+    :param scan_pii: Scan cell values for PII.
+    :return: Dict with the row count, the columns named after PII, the expired row count and [start, stop)
+             ranges, the created_at range and the PII findings (records of PIIScanAccumulator.report()).
+    """
+    cutoff = pd.Timestamp(cutoff)
+    pii = PIIScanAccumulator()
+    expired_ranges = []
+    expired_rows = 0
+    oldest = newest = None
+    has_created_at = False
+    created_at_format = None
+    sensitive_columns = None
+    rows = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=['']):
+        if sensitive_columns is None:
+            # Every chunk has the header's columns, even the only chunk of a file without rows
+            sensitive_columns = [column for column in SENSITIVE_COLUMNS if column in chunk.columns]
+        if scan_pii:
+            pii.update(chunk)
+        if CREATED_AT_COLUMN in chunk.columns:
+            has_created_at = True
+            values = chunk[CREATED_AT_COLUMN]
+            if created_at_format is None and values.notna().any():
+                # One format for the whole file, as parsing the file at once would infer it
+                created_at_format = guess_datetime_format(values.dropna().iloc[0])
+            created_at = pd.to_datetime(values, format=created_at_format, errors='coerce')
+            expired = (created_at < cutoff).to_numpy(dtype=bool)
+            expired_rows += int(expired.sum())
+            _append_ranges(expired_ranges, mask_ranges(expired, rows))
+            if created_at.notna().any():
+                oldest = created_at.min() if oldest is None else min(oldest, created_at.min())
+                newest = created_at.max() if newest is None else max(newest, created_at.max())
+        rows += len(chunk)
+
+    return {
+        'rows': rows,
+        'sensitive_columns': sensitive_columns or [],
+        'has_created_at': has_created_at,
+        'expired_rows': expired_rows,
+        'expired_ranges': np.concatenate(expired_ranges) if expired_ranges else np.empty((0, 2), dtype=np.int64),
+        'min_created_at': None if oldest is None else oldest.isoformat(),
+        'max_created_at': None if newest is None else newest.isoformat(),
+        'pii': pii.report().to_dict('records'),
+    }
+
+def _audit_task(task):
+    # A file that cannot be read or parsed is reported on its own instead of aborting the sweep
+    try:
+        return audit_file(task['path'], task['cutoff'], task['chunksize'], task['scan_pii'])
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {str(e).strip()}'}
+
+class RetentionIndex:
+    """
+    Persisted per-file record of the last audit, used to skip files a new sweep cannot change.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: JSON file holding the index; the index starts empty when the file does not exist.
+        """
+        self.path = path
+        self.files = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as index_file:
+                self.files = json.load(index_file)
+
+    @staticmethod
+    def _signature(path):
+        status = os.stat(path)
+        return {'size': status.st_size, 'mtime_ns': status.st_mtime_ns}
+
+    def can_skip(self, path, cutoff):
+        """
+        A file can be skipped when it is unchanged since its last audit, the cutoff has not moved backwards, and
+        no row's created_at lies in [previous cutoff, cutoff), i.e. no row can have expired since then. A file
+        that cannot be stat'ed is never skipped, so the audit reports its error.
+        """
+        entry = self.files.get(os.path.abspath(path))
+        if entry is None:
+            return False
+        try:
+            if entry['signature'] != self._signature(path):
+                return False
+        except OSError:
+            return False
+        cutoff = pd.Timestamp(cutoff)
+        previous = pd.Timestamp(entry['cutoff'])
+        if cutoff < previous:
+            return False
+        if entry['min_created_at'] is None:
+            return True
+        return not (pd.Timestamp(entry['min_created_at']) < cutoff and pd.Timestamp(entry['max_created_at']) >= previous)
+
+    def cached(self, path):
+        """
+        :return: The audit result recorded for a file, without its expired row ranges.
+        """
+        entry = self.files[os.path.abspath(path)]
+        return {key: value for key, value in entry.items() if key not in ('signature', 'cutoff')}
+
+    def record(self, path, cutoff, result):
+        """
+        Stores the audit result of a file, keyed by absolute path. A failed audit removes the file's entry.
+        """
+        if 'error' in result:
+            self.files.pop(os.path.abspath(path), None)
+            return
+        entry = {key: value for key, value in result.items() if key != 'expired_ranges'}
+        entry.update(signature=self._signature(path), cutoff=pd.Timestamp(cutoff).isoformat())
+        self.files[os.path.abspath(path)] = entry
+
+    def save(self):
+        """
+        Writes the index atomically, so an interrupted sweep leaves the previous index intact.
+        """
+        if self.path is None:
+            return
+        with open(self.path + '.tmp', 'w') as index_file:
+            json.dump(self.files, index_file)
+        os.replace(self.path + '.tmp', self.path)
+
+def audit_files(paths, index_path=None, retention_period_years=5, chunksize=DEFAULT_CHUNKSIZE, workers=None,
+                scan_pii=True, now=None):
+    """
+    Audits many files, one file per worker process, skipping the files the retention index shows cannot have
+    changed, and saves the updated index. A file that cannot be audited (missing, unreadable or malformed) does
+    not stop the sweep; its result holds the error instead, and the index is saved even when the sweep fails.
+
+    :param paths: CSV file paths.
+    :param index_path: JSON file of the retention index; nothing is skipped or persisted when omitted.
+    :param retention_period_years: Maximum retention period in years.
+    :param chunksize: Rows per chunk.
+    :param workers: Number of worker processes; one per CPU when omitted. With 1 the files are audited in-process.
+    :param scan_pii: Scan cell values for PII.
+    :param now: Time of the sweep; the current time when omitted.
+    :return: Dict of path to audit result. Skipped files carry their previous result with 'skipped' set
+             and no expired row ranges; files that failed carry only 'error' and 'skipped'.
+    """
+    cutoff = retention_cutoff(retention_period_years, now)
+    index = RetentionIndex(index_path)
+    results = {}
+    pending = []
+    for path in paths:
+        if index.can_skip(path, cutoff):
+            results[path] = dict(index.cached(path), skipped=True, expired_ranges=None)
+        else:
+            pending.append(path)
+
+    tasks = [{'path': path, 'cutoff': cutoff, 'chunksize': chunksize, 'scan_pii': scan_pii} for path in pending]
+    if workers == 1:
+        audited = map(_audit_task, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        audited = pool.map(_audit_task, tasks)
+    try:
+        for path, result in zip(pending, audited):
+            results[path] = dict(result, skipped=False)
+            index.record(path, cutoff, result)
+    finally:
+        if workers != 1:
+            pool.shutdown()
+        index.save()
+    return results
@@ -1,112 +1,202 @@
-# data_compliance.py
-# This script ensures that data used in the Quantum Forensics System complies with AI ethics, security, and global regulations.
-
-import pandas as pd
-from datetime import datetime
-
-# Define global compliance standards and regulations
-GDPR_COMPLIANCE = True
-CCPA_COMPLIANCE = True
-HIPAA_COMPLIANCE = True
-
-# Placeholder function for loading and auditing data
-def load_data(file_path):
-    """
-    Loads the dataset for compliance auditing.
-    :param file_path: Path to the dataset file
-    :return: Pandas DataFrame
-    """
-    try:
-        data = pd.read_csv(file_path)
-        print(f"Data loaded successfully from {file_path}")
-        return data
-    except FileNotFoundError:
-        print(f"Error: File not found at {file_path}")
-        return None
-
-# Check for personally identifiable information (PII) and sensitive data
-def check_for_sensitive_data(data):
-    """
-    Scans the dataset for PII and sensitive information to ensure compliance.
-    :param data: Pandas DataFrame
-    :return: List of columns containing sensitive data
-    """
-    sensitive_columns = ['ssn', 'credit_card', 'phone_number', 'email', 'address']
-    detected_sensitive_data = [col for col in sensitive_columns if col in data.columns]
-    
-    if detected_sensitive_data:
-        print(f"Warning: Sensitive data detected in columns: {detected_sensitive_data}")
-    else:
-        print("No sensitive data detected.")
-    
-    return detected_sensitive_data
-
-# Ensure data retention policies are followed
-def check_data_retention(data, retention_period_years=5):
-    """
-    Checks if the data exceeds the allowed retention period according to compliance regulations.
-    :param data: Pandas DataFrame with 'created_at' or 'date' column
-    :param retention_period_years: Maximum retention period in years
-    :return: Rows exceeding retention policy
-    """
-    if 'created_at' in data.columns:
-        data['created_at'] = pd.to_datetime(data['created_at'])
-        retention_cutoff = datetime.now() - pd.DateOffset(years=retention_period_years)
-        expired_data = data[data['created_at'] < retention_cutoff]
-        
-        if not expired_data.empty:
-            print(f"Data exceeding retention period found: {len(expired_data)} records.")
-        else:
-            print("No data exceeding retention period found.")
-        
-        return expired_data
-    else:
-        print("No 'created_at' column found in the dataset. Retention check skipped.")
-        return pd.DataFrame()
-
-# Check compliance with specific regulations (e.g., GDPR, CCPA, HIPAA)
-def check_compliance(data):
-    """
-    Ensures the dataset complies with applicable regulations such as GDPR, CCPA, and HIPAA.
-    :param data: Pandas DataFrame
-    :return: Compliance results as a dictionary
-    """
-    compliance_report = {
-        "GDPR_Compliance": GDPR_COMPLIANCE,
-        "CCPA_Compliance": CCPA_COMPLIANCE,
-        "HIPAA_Compliance": HIPAA_COMPLIANCE,
-    }
-    
-    print("Compliance check results:")
-    for regulation, status in compliance_report.items():
-        print(f"{regulation}: {'Passed' if status else 'Failed'}")
-    
-    return compliance_report
-
-# Main function to run all compliance checks
-def run_compliance_audit(file_path):
-    """
-    Runs all compliance checks on the dataset to ensure data ethics and legal security requirements are met.
-    :param file_path: Path to the dataset file
-    """
-    # Load data
-    data = load_data(file_path)
-    
-    if data is not None:
-        # Check for sensitive data
-        check_for_sensitive_data(data)
-        
-        # Check data retention policies
-        check_data_retention(data)
-        
-        # Check compliance with regulations
-        check_compliance(data)
-    else:
-        print("Data loading failed. Compliance audit aborted.")
-
-if __name__ == "__main__":
-    # Define the path to the dataset for compliance auditing
-    dataset_path = "path_to_your_data.csv"
-    
-    # Run the compliance audit
-    run_compliance_audit(dataset_path)
+# data_compliance.py
+# This script ensures that data used in the Quantum Forensics System complies with AI ethics, security, and global regulations.
+
+import os
+import pandas as pd
+from compliance_audit import DEFAULT_CHUNKSIZE, audit_file, audit_files, retention_cutoff
+from pii_scanner import DEFAULT_SAMPLE_ROWS, SENSITIVE_COLUMNS, scan_file, scan_frame
+
+# Define global compliance standards and regulations
+GDPR_COMPLIANCE = True
+CCPA_COMPLIANCE = True
+HIPAA_COMPLIANCE = True
+
+# Placeholder function for loading and auditing data
+def load_data(file_path):
+    """
+    Loads the dataset for compliance auditing.
+    :param file_path: Path to the dataset file
+    :return: Pandas DataFrame
+    """
+    try:
+        data = pd.read_csv(file_path)
+        print(f"Data loaded successfully from {file_path}")
+        return data
+    except FileNotFoundError:
+        print(f"Error: File not found at {file_path}")
+        return None
+
+# Check for personally identifiable information (PII) and sensitive data
+def check_for_sensitive_data(data, scan_content=True, sample_rows=DEFAULT_SAMPLE_ROWS):
+    """
+    Scans the dataset for PII and sensitive information to ensure compliance.
+    Besides columns named after PII, the cell values of every column are scanned, so PII hidden in
+    free-text columns is found as well.
+    :param data: Pandas DataFrame
+    :param scan_content: Scan cell values in addition to column names
+    :param sample_rows: Rows scanned before escalating the columns with hits to a full scan
+    :return: List of columns containing sensitive data
+    """
+    detected_sensitive_data = [col for col in SENSITIVE_COLUMNS if col in data.columns]
+
+    if scan_content:
+        scan = scan_frame(data, sample_rows=sample_rows)
+        report_pii_scan(scan.report())
+        detected_sensitive_data += [col for col in scan.flagged_columns() if col not in detected_sensitive_data]
+    
+    if detected_sensitive_data:
+        print(f"Warning: Sensitive data detected in columns: {detected_sensitive_data}")
+    else:
+        print("No sensitive data detected.")
+    
+    return detected_sensitive_data
+
+# Print the per-column findings of a content scan
+def report_pii_scan(report):
+    """
+    Prints the PII found per column with its hit rate and example row offsets.
+    :param report: DataFrame returned by PIIScanAccumulator.report()
+    """
+    for finding in report.itertuples(index=False):
+        print(f"PII ({finding.pii_type}) found in column '{finding.column}': {finding.hits} of {finding.rows_scanned} rows "
+              f"({finding.hit_rate:.2%}), e.g. rows {finding.example_rows}")
+
+# Scan a dataset file for PII without loading it
+def scan_file_for_sensitive_data(file_path, workers=None, full_scan=False):
+    """
+    Scans the cell values of a CSV file for PII: a sample of rows first, then a parallel streaming scan of
+    the columns with hits.
+    :param file_path: Path to the dataset file
+    :param workers: Number of worker processes (one per CPU when omitted)
+    :param full_scan: Scan every column in full, skipping the sample
+    :return: DataFrame of findings per column and kind of PII
+    """
+    scan, scope = scan_file(file_path, workers=workers, full_scan=full_scan)
+    report = scan.report()
+    print(f"PII scan of {file_path} ({scope} scan of {scan.rows} rows):")
+    report_pii_scan(report)
+    if report.empty:
+        print("No sensitive data detected.")
+    return report
+
+# Ensure data retention policies are followed
+def check_data_retention(data, retention_period_years=5):
+    """
+    Checks if the data exceeds the allowed retention period according to compliance regulations.
+    :param data: Pandas DataFrame with 'created_at' or 'date' column
+    :param retention_period_years: Maximum retention period in years
+    :return: Rows exceeding retention policy
+    """
+    if 'created_at' in data.columns:
+        # Parse into a separate series so the caller's frame is left untouched
+        created_at = pd.to_datetime(data['created_at'])
+        expired_data = data[created_at < retention_cutoff(retention_period_years)]
+        
+        if not expired_data.empty:
+            print(f"Data exceeding retention period found: {len(expired_data)} records.")
+        else:
+            print("No data exceeding retention period found.")
+        
+        return expired_data
+    else:
+        print("No 'created_at' column found in the dataset. Retention check skipped.")
+        return pd.DataFrame()
+
+# Check compliance with specific regulations (e.g., GDPR, CCPA, HIPAA)
+def check_compliance(data):
+    """
+    Ensures the dataset complies with applicable regulations such as GDPR, CCPA, and HIPAA.
+    :param data: Pandas DataFrame, or the result of a streaming file audit
+    :return: Compliance results as a dictionary
+    """
+    compliance_report = {
+        "GDPR_Compliance": GDPR_COMPLIANCE,
+        "CCPA_Compliance": CCPA_COMPLIANCE,
+        "HIPAA_Compliance": HIPAA_COMPLIANCE,
+    }
+    
+    print("Compliance check results:")
+    for regulation, status in compliance_report.items():
+        print(f"{regulation}: {'Passed' if status else 'Failed'}")
+    
+    return compliance_report
+
+# Print the findings of a streaming file audit
+def report_audit_result(file_path, result):
+    """
+    Prints the sensitive-data and retention findings of one audited file.
+    :param file_path: Path to the dataset file
+    :param result: Audit result from compliance_audit.audit_file or audit_files
+    """
+    if result.get('skipped'):
+        print(f"{file_path}: unchanged and no rows can have expired since the last sweep; audit skipped.")
+    report = pd.DataFrame(result['pii'], columns=['column', 'pii_type', 'hits', 'rows_scanned', 'hit_rate', 'example_rows'])
+    report_pii_scan(report)
+    detected_sensitive_data = result['sensitive_columns'] + [col for col in dict.fromkeys(report['column'])
+                                                             if col not in result['sensitive_columns']]
+    if detected_sensitive_data:
+        print(f"Warning: Sensitive data detected in columns: {detected_sensitive_data}")
+    else:
+        print("No sensitive data detected.")
+    if not result['has_created_at']:
+        print("No 'created_at' column found in the dataset. Retention check skipped.")
+    elif result['expired_rows']:
+        ranges = result['expired_ranges']
+        where = f" in {len(ranges)} row ranges" if ranges is not None else ""
+        print(f"Data exceeding retention period found: {result['expired_rows']} records{where}.")
+    else:
+        print("No data exceeding retention period found.")
+
+# Main function to run all compliance checks
+def run_compliance_audit(file_path, retention_period_years=5, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Runs all compliance checks on the dataset to ensure data ethics and legal security requirements are met.
+    The file is streamed once in chunks; the column-name check, the PII scan and the retention check share
+    the pass.
+    :param file_path: Path to the dataset file
+    :param retention_period_years: Maximum retention period in years
+    :param chunksize: Rows read per chunk
+    :return: Audit result, with expired rows as [start, stop) row ranges
+    """
+    if not os.path.exists(file_path):
+        print(f"Error: File not found at {file_path}")
+        print("Data loading failed. Compliance audit aborted.")
+        return None
+
+    result = audit_file(file_path, retention_cutoff(retention_period_years), chunksize)
+    print(f"Data audited from {file_path}: {result['rows']} rows")
+    report_audit_result(file_path, result)
+
+    # Check compliance with regulations
+    check_compliance(result)
+    return result
+
+# Nightly sweep over many files
+def run_nightly_audit(file_paths, index_path, retention_period_years=5, workers=None):
+    """
+    Audits many files in parallel, skipping the files the persisted retention index shows cannot have
+    new findings since the last sweep.
+    :param file_paths: Paths to the dataset files
+    :param index_path: JSON file of the retention index, updated after the sweep
+    :param retention_period_years: Maximum retention period in years
+    :param workers: Number of worker processes (one per CPU when omitted)
+    :return: Dict of file path to audit result
+    """
+    results = audit_files(file_paths, index_path, retention_period_years, workers=workers)
+    skipped = sum(result['skipped'] for result in results.values())
+    failed = sum('error' in result for result in results.values())
+    print(f"Nightly audit of {len(results)} files: {len(results) - skipped - failed} audited, {skipped} skipped, "
+          f"{failed} failed.")
+    for file_path, result in results.items():
+        if 'error' in result:
+            print(f"{file_path}: audit failed ({result['error']}).")
+        elif result['sensitive_columns'] or result['pii'] or result['expired_rows']:
+            report_audit_result(file_path, result)
+    return results
+
+if __name__ == "__main__":
+    # Define the path to the dataset for compliance auditing
+    dataset_path = "path_to_your_data.csv"
+    
+    # Run the compliance audit
+    run_compliance_audit(dataset_path)
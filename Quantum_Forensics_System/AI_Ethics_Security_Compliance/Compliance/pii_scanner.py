@@ -0,0 +1,234 @@
+# pii_scanner.py
+# Content-level PII scanning for the compliance checks. All PII patterns are compiled into one alternation
+# with a named group per kind, and each column is scanned with a single regex pass over its cells joined
+# into one string, so adding a pattern does not add a pass. Card numbers are confirmed with the Luhn check.
+# Files are first scanned on a sample of rows; only the columns with hits are escalated to a full scan,
+# which streams the file in row-aligned byte ranges over a process pool.
+
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# The ingestion modules are plain scripts in Self_Refining_Learning_System/Data_Ingestion, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              '..', '..', 'Self_Refining_Learning_System', 'Data_Ingestion')))
+from parallel_ingestion import CSV_MEMORY_EXPANSION, DEFAULT_PARTITION_BYTES, DEFAULT_WORKER_MEMORY_BYTES, plan_csv_partitions, read_csv_blocks
+
+# Patterns of each kind of PII. Earlier patterns win when several match at the same position.
+PII_PATTERNS = {
+    'ssn': r'\b(?!000|666|9\d\d)\d{3}-(?!00)\d{2}-(?!0000)\d{4}\b',
+    'credit_card': r'(?<![\w.])\d(?:[ -]?\d){12,18}(?!\w|\.\d)',
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b',
+    'phone_number': r'(?<![\w+])(?:\+?1[ .-]?)?(?:\(\d{3}\)|\d{3})[ .-]?\d{3}[ .-]\d{4}\b|(?<![\w+])\+\d{1,3}[ .-]?\d{4,14}\b',
+    'address': r'(?i:\b\d{1,6}\s+(?:[a-z0-9.]+\s+){0,4}(?:street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln|drive|dr'
+               r'|court|ct|way|place|pl|terrace|ter|circle|cir|highway|hwy)\b\.?)',
+}
+
+# Column names that mark a whole column as PII, whatever its cells hold
+SENSITIVE_COLUMNS = ('ssn', 'credit_card', 'phone_number', 'email', 'address')
+
+PII_REGEX = re.compile('|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in PII_PATTERNS.items()))
+
+# Every pattern needs a digit or an '@'; cells without one are skipped by a vectorized test before the regex
+CANDIDATE_PATTERN = r'[0-9@]'
+
+# Cells that are wholly an integer too short to be a card number, a decimal, or an ISO date/time cannot hold
+# PII either; excluding them keeps numeric and timestamp columns out of the regex pass
+NON_PII_PATTERN = (r'-?\d{1,12}|-?\d*\.\d+(?:[eE][+-]?\d+)?'
+                   r'|\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?')
+
+# Joins the cells of a column for scanning; no pattern can match it, so no match spans two cells
+CELL_SEPARATOR = '\x00'
+
+# Rows scanned before deciding which columns need a full scan
+DEFAULT_SAMPLE_ROWS = 10_000
+
+# Row offsets kept per column and kind of PII as examples
+DEFAULT_MAX_EXAMPLES = 5
+
+def luhn_valid(candidate):
+    """
+    Checks the Luhn checksum of a card number, ignoring spaces and dashes.
+    """
+    digits = np.frombuffer(re.sub(r'[ -]', '', candidate).encode(), dtype=np.uint8) - ord('0')
+    doubled = digits[-2::-2] * 2
+    return (digits[::-2].sum() + (doubled - 9 * (doubled > 9)).sum()) % 10 == 0
+
+# Confirmation applied to the matches of a kind before they are counted
+VALIDATORS = {'credit_card': luhn_valid}
+
+def scan_values(values):
+    """
+    Finds PII in a column of strings with one pass of the combined pattern over the candidate cells.
+
+    :param values: Series of strings without missing values.
+    :return: Dict of PII kind to the sorted, unique positions of the values containing it.
+    """
+    candidates = values.str.contains(CANDIDATE_PATTERN, regex=True) & ~values.str.fullmatch(NON_PII_PATTERN)
+    candidates = np.flatnonzero(candidates.to_numpy(dtype=bool))
+    if len(candidates) == 0:
+        return {}
+    values = values.iloc[candidates]
+    text = values.str.cat(sep=CELL_SEPARATOR)
+    # Start of each candidate value in the joined text
+    lengths = values.str.len().to_numpy(dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(lengths[:-1] + 1)])
+    found = {}
+    for match in PII_REGEX.finditer(text):
+        kind = match.lastgroup
+        validator = VALIDATORS.get(kind)
+        if validator is None or validator(match.group()):
+            found.setdefault(kind, []).append(match.start())
+    return {kind: candidates[np.unique(np.searchsorted(starts, positions, side='right') - 1)] for kind, positions in found.items()}
+
+class PIIScanAccumulator:
+    """
+    Per-column PII hit counts and example row offsets over the chunks of one or more scans.
+    """
+
+    def __init__(self, max_examples=DEFAULT_MAX_EXAMPLES):
+        """
+        :param max_examples: Number of example row offsets kept per column and kind of PII.
+        """
+        self.max_examples = max_examples
+        self.rows = 0
+        self.scanned = {}
+        self.hits = {}
+        self.examples = {}
+
+    def update(self, chunk, columns=None):
+        """
+        Scans a chunk whose rows follow the rows already seen.
+
+        :param chunk: DataFrame of consecutive rows.
+        :param columns: Columns to scan; all columns when omitted.
+        """
+        for column in chunk.columns if columns is None else columns:
+            values = chunk[column]
+            present = np.flatnonzero(values.notna().to_numpy())
+            self.scanned[column] = self.scanned.get(column, 0) + len(chunk)
+            if len(present) == 0:
+                continue
+            for kind, positions in scan_values(values.iloc[present].astype(str)).items():
+                key = (column, kind)
+                self.hits[key] = self.hits.get(key, 0) + len(positions)
+                examples = self.examples.setdefault(key, [])
+                if len(examples) < self.max_examples:
+                    examples.extend((self.rows + present[positions[:self.max_examples - len(examples)]]).tolist())
+        self.rows += len(chunk)
+
+    def merge(self, other):
+        """
+        Adds the results of another accumulator whose rows follow this one's, e.g. the next partition of a file.
+
+        :return: self
+        """
+        for column, rows in other.scanned.items():
+            self.scanned[column] = self.scanned.get(column, 0) + rows
+        for key, count in other.hits.items():
+            self.hits[key] = self.hits.get(key, 0) + count
+            examples = self.examples.setdefault(key, [])
+            examples.extend(self.rows + row for row in other.examples[key][:self.max_examples - len(examples)])
+        self.rows += other.rows
+        return self
+
+    def flagged_columns(self):
+        """
+        :return: Columns with at least one PII hit, in the order they were found.
+        """
+        return list(dict.fromkeys(column for column, _ in self.hits))
+
+    def report(self):
+        """
+        :return: DataFrame with one row per column and kind of PII found: the number of rows with a hit, the
+                 rows scanned, the hit rate and example row offsets (0-based data rows).
+        """
+        records = [{'column': column, 'pii_type': kind, 'hits': count, 'rows_scanned': self.scanned[column],
+                    'hit_rate': count / self.scanned[column], 'example_rows': self.examples[(column, kind)]}
+                   for (column, kind), count in self.hits.items()]
+        return pd.DataFrame(records, columns=['column', 'pii_type', 'hits', 'rows_scanned', 'hit_rate', 'example_rows'])
+
+def scan_frame(data, sample_rows=DEFAULT_SAMPLE_ROWS, full_scan=False, max_examples=DEFAULT_MAX_EXAMPLES):
+    """
+    Scans an in-memory DataFrame. An evenly spaced sample of rows is scanned first and only the columns with
+    hits in it are scanned in full.
+
+    :param data: DataFrame to scan.
+    :param sample_rows: Number of rows in the sample.
+    :param full_scan: Scan every column in full, skipping the sample.
+    :param max_examples: Number of example row offsets kept per column and kind of PII.
+    :return: PIIScanAccumulator of the full scan (or of the sample when no column had hits).
+    """
+    columns = list(data.columns)
+    if not full_scan and len(data) > sample_rows:
+        sample = PIIScanAccumulator(max_examples)
+        sample.update(data.iloc[::-(-len(data) // sample_rows)].reset_index(drop=True))
+        columns = sample.flagged_columns()
+        if not columns:
+            return sample
+    result = PIIScanAccumulator(max_examples)
+    result.update(data, columns)
+    return result
+
+def scan_partition(task):
+    """
+    Scans one byte range of a CSV file. Executed in a worker process.
+
+    :param task: Dictionary describing the byte range and the columns to scan.
+    :return: PIIScanAccumulator for the range, with row offsets relative to its first row.
+    """
+    result = PIIScanAccumulator(task['max_examples'])
+    for block in read_csv_blocks(task['path'], task['header'], task['start'], task['end'], task['block_bytes'],
+                                 usecols=task['columns'], dtype=str, keep_default_na=False, na_values=['']):
+        result.update(block, task['columns'])
+    return result
+
+def scan_file(path, sample_rows=DEFAULT_SAMPLE_ROWS, full_scan=False, workers=None,
+              partition_bytes=DEFAULT_PARTITION_BYTES, worker_memory_bytes=DEFAULT_WORKER_MEMORY_BYTES,
+              max_examples=DEFAULT_MAX_EXAMPLES):
+    """
+    Scans a CSV file for PII. The first sample_rows rows are scanned first; the columns with hits are then
+    scanned in full over row-aligned byte ranges on a process pool, reading only those columns. Ranges are cut
+    only at newlines outside quoted fields, so multi-line free-text cells are scanned whole.
+
+    :param path: The CSV file path.
+    :param sample_rows: Number of leading rows in the sample.
+    :param full_scan: Scan every column in full, skipping the sample.
+    :param workers: Number of worker processes; one per CPU when omitted. With 1 the scan runs in-process.
+    :param partition_bytes: Target size of the byte range handed to a worker.
+    :param worker_memory_bytes: Memory budget per worker, which bounds the rows parsed at a time.
+    :param max_examples: Number of example row offsets kept per column and kind of PII.
+    :return: Tuple (PIIScanAccumulator, scope) where scope is 'full' or 'sample'.
+    """
+    read_options = {'dtype': str, 'keep_default_na': False, 'na_values': ['']}
+    if full_scan:
+        columns = list(pd.read_csv(path, nrows=0).columns)
+    else:
+        sample = PIIScanAccumulator(max_examples)
+        sample.update(pd.read_csv(path, nrows=sample_rows, **read_options))
+        columns = sample.flagged_columns()
+        if not columns or sample.rows < sample_rows:
+            # No hits to escalate, or the sample already covered the whole file
+            return sample, 'full' if sample.rows < sample_rows else 'sample'
+
+    header, ranges = plan_csv_partitions(path, partition_bytes)
+    base = {'path': path, 'header': header, 'columns': columns, 'max_examples': max_examples,
+            'block_bytes': max(1, worker_memory_bytes // CSV_MEMORY_EXPANSION)}
+    tasks = [dict(base, start=start, end=end) for start, end in ranges]
+    if workers == 1:
+        partials = map(scan_partition, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        partials = pool.map(scan_partition, tasks)
+    try:
+        result = PIIScanAccumulator(max_examples)
+        for partial in partials:
+            result.merge(partial)
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    return result, 'full'
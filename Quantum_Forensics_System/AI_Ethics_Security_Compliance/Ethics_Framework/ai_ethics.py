@@ -1,178 +1,241 @@
-# ai_ethics.py
-# This script defines the ethics framework for AI models used in the Quantum Forensics System,
-# ensuring that the models adhere to ethical guidelines for fairness, transparency, and accountability.
-
-import logging
-
-# Logging configuration
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("AI_Ethics")
-
-# Ethical principles for AI systems
-ETHICAL_PRINCIPLES = {
-    "fairness": "The AI system must ensure fairness in its predictions and decisions, avoiding bias and discrimination.",
-    "transparency": "The AI system must be transparent about its data sources, algorithms, and decision-making processes.",
-    "accountability": "There must be clear accountability for AI-generated outcomes, with traceability and human oversight."
-}
-
-# AI Ethics class definition
-class AIEthicsFramework:
-    def __init__(self, model_name):
-        """
-        Initializes the AI Ethics Framework with a specific AI model.
-        :param model_name: Name of the AI model to which the ethical framework will be applied.
-        """
-        self.model_name = model_name
-        logger.info(f"AI Ethics Framework initialized for model: {self.model_name}")
-
-    def check_fairness(self, predictions, true_labels):
-        """
-        Checks the fairness of the AI model by comparing predictions against true labels to detect bias.
-        :param predictions: The predicted labels from the AI model.
-        :param true_labels: The actual labels from the dataset.
-        :return: Fairness check result (True if fair, False otherwise)
-        """
-        # Placeholder for fairness check logic (e.g., statistical parity, equal opportunity)
-        if len(predictions) != len(true_labels):
-            logger.error("The length of predictions and true labels does not match!")
-            return False
-        
-        fairness_result = self._assess_fairness(predictions, true_labels)
-        if fairness_result:
-            logger.info("Fairness check passed.")
-        else:
-            logger.warning("Fairness check failed.")
-        return fairness_result
-
-from sklearn.metrics import confusion_matrix
-
-def _assess_fairness(self, predictions, true_labels, sensitive_attribute):
-    """
-    Assess fairness based on statistical parity, equal opportunity, and demographic parity.
-    :param predictions: The predicted labels.
-    :param true_labels: The actual labels.
-    :param sensitive_attribute: A list or column representing the sensitive attribute (e.g., gender, race).
-    :return: True if the model is fair, False otherwise.
-    """
-    # Ensure the length of predictions, true_labels, and sensitive_attribute matches
-    if len(predictions) != len(true_labels) or len(predictions) != len(sensitive_attribute):
-        logger.error("Length of predictions, true labels, and sensitive attributes must match!")
-        return False
-    
-    # Convert inputs to numpy arrays for easier manipulation
-    predictions = np.array(predictions)
-    true_labels = np.array(true_labels)
-    sensitive_attribute = np.array(sensitive_attribute)
-
-    # Find unique groups in the sensitive attribute (e.g., 'Male', 'Female')
-    unique_groups = np.unique(sensitive_attribute)
-
-    # Calculate statistical parity: P(Y=1 | group=g) should be approximately equal for all groups
-    parity_results = {}
-    for group in unique_groups:
-        group_indices = sensitive_attribute == group
-        parity_results[group] = np.mean(predictions[group_indices])
-
-    logger.info(f"Statistical Parity Results: {parity_results}")
-    parity_fair = max(parity_results.values()) - min(parity_results.values()) < 0.1  # Tolerance level for fairness
-
-    # Calculate equal opportunity: TPR (True Positive Rate) should be similar across groups
-    equal_opportunity_results = {}
-    for group in unique_groups:
-        group_indices = sensitive_attribute == group
-        tn, fp, fn, tp = confusion_matrix(true_labels[group_indices], predictions[group_indices]).ravel()
-        tpr = tp / (tp + fn) if (tp + fn) > 0 else 0
-        equal_opportunity_results[group] = tpr
-
-    logger.info(f"Equal Opportunity (TPR) Results: {equal_opportunity_results}")
-    equal_opportunity_fair = max(equal_opportunity_results.values()) - min(equal_opportunity_results.values()) < 0.1
-
-    # Demographic parity: P(Y_hat=1 | group=g) should be similar across groups
-    demographic_parity_results = {}
-    for group in unique_groups:
-        group_indices = sensitive_attribute == group
-        demographic_parity_results[group] = np.mean(predictions[group_indices])
-
-    logger.info(f"Demographic Parity Results: {demographic_parity_results}")
-    demographic_parity_fair = max(demographic_parity_results.values()) - min(demographic_parity_results.values()) < 0.1
-
-    # Aggregate fairness checks
-    overall_fairness = parity_fair and equal_opportunity_fair and demographic_parity_fair
-
-    if overall_fairness:
-        logger.info("Model passed all fairness checks.")
-    else:
-        logger.warning("Model failed one or more fairness checks.")
-
-    return overall_fairness
-
-    def ensure_transparency(self):
-        """
-        Ensures that the AI system provides transparency in its operations, including data usage and algorithms.
-        :return: Transparency check result (True if transparent, False otherwise)
-        """
-        # Placeholder for transparency check logic
-        logger.info(f"Transparency check for model {self.model_name} started.")
-        
-        transparency_status = True  # Placeholder value for transparency
-        if transparency_status:
-            logger.info("Transparency check passed.")
-        else:
-            logger.warning("Transparency check failed.")
-        
-        return transparency_status
-
-    def ensure_accountability(self):
-        """
-        Ensures accountability by defining clear responsibilities for AI outcomes and ensuring traceability.
-        :return: Accountability check result (True if accountable, False otherwise)
-        """
-        # Placeholder for accountability logic
-        logger.info(f"Accountability check for model {self.model_name} started.")
-        
-        accountability_status = True  # Placeholder value for accountability
-        if accountability_status:
-            logger.info("Accountability check passed.")
-        else:
-            logger.warning("Accountability check failed.")
-        
-        return accountability_status
-
-    def evaluate_ethics(self, predictions, true_labels):
-        """
-        Runs the full ethics evaluation for the AI model, including fairness, transparency, and accountability checks.
-        :param predictions: The predicted labels from the AI model.
-        :param true_labels: The actual labels from the dataset.
-        :return: Summary of ethics evaluation results
-        """
-        logger.info(f"Starting ethics evaluation for model {self.model_name}...")
-
-        # Run all ethical checks
-        fairness_result = self.check_fairness(predictions, true_labels)
-        transparency_result = self.ensure_transparency()
-        accountability_result = self.ensure_accountability()
-
-        # Summary of the ethics evaluation
-        evaluation_results = {
-            "Fairness": fairness_result,
-            "Transparency": transparency_result,
-            "Accountability": accountability_result
-        }
-
-        logger.info(f"Ethics evaluation completed for model {self.model_name}. Results: {evaluation_results}")
-        return evaluation_results
-
-
-# Example usage of the AI Ethics Framework
-if __name__ == "__main__":
-    # Initialize the framework for a specific AI model
-    model_name = "Quantum Forensics AI Model"
-    ai_ethics = AIEthicsFramework(model_name)
-    
-    # Placeholder data for predictions and true labels
-    predictions = [0, 1, 0, 1, 1]
-    true_labels = [0, 1, 0, 0, 1]
-    
-    # Run the ethics evaluation
-    ethics_results = ai_ethics.evaluate_ethics(predictions, true_labels)
-    print(f"Ethics Evaluation Results: {ethics_results}")
+# ai_ethics.py
+# This script defines the ethics framework for AI models used in the Quantum Forensics System,
+# ensuring that the models adhere to ethical guidelines for fairness, transparency, and accountability.
+
+import logging
+import os
+import sys
+
+from fairness_accumulator import FairnessAccumulator
+from fairness_engine import DEFAULT_TOLERANCE, assess_fairness
+
+# The instrumentation module is a plain script in Self_Refining_Learning_System/Data_Ingestion, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              '..', '..', 'Self_Refining_Learning_System', 'Data_Ingestion')))
+from instrumentation import Instrumentation, instrumented
+
+# Logging configuration
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("AI_Ethics")
+
+# Ethical principles for AI systems
+ETHICAL_PRINCIPLES = {
+    "fairness": "The AI system must ensure fairness in its predictions and decisions, avoiding bias and discrimination.",
+    "transparency": "The AI system must be transparent about its data sources, algorithms, and decision-making processes.",
+    "accountability": "There must be clear accountability for AI-generated outcomes, with traceability and human oversight."
+}
+
+# AI Ethics class definition
+class AIEthicsFramework:
+    def __init__(self, model_name, tolerance=DEFAULT_TOLERANCE, fairness_accumulator=None, bootstrap_replicates=0,
+                 bootstrap_seed=None, decision='point', instrumentation=None):
+        """
+        Initializes the AI Ethics Framework with a specific AI model.
+        :param model_name: Name of the AI model to which the ethical framework will be applied.
+        :param tolerance: Maximum allowed gap between groups for a fairness check to pass.
+        :param fairness_accumulator: Accumulator that observe_predictions feeds, e.g. a SlidingFairnessAccumulator
+                                     to judge only recent batches; a cumulative FairnessAccumulator when omitted.
+        :param bootstrap_replicates: Number of bootstrap replicates for confidence intervals on the fairness gaps;
+                                     0 disables them.
+        :param bootstrap_seed: Seed of the bootstrap, so intervals and verdicts are reproducible.
+        :param decision: 'point' to judge the observed gaps, 'upper' to pass only when the upper confidence bound
+                         is within tolerance, or 'lower' to fail only when the lower bound exceeds it.
+        :param instrumentation: Instrumentation the checks report their stage timings through; one on the
+                                AI_Ethics logger when omitted.
+        """
+        self.model_name = model_name
+        self.tolerance = tolerance
+        self.fairness_accumulator = fairness_accumulator if fairness_accumulator is not None else FairnessAccumulator()
+        self.bootstrap = {'replicates': bootstrap_replicates, 'seed': bootstrap_seed, 'decision': decision}
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(logger.name)
+        logger.info("AI Ethics Framework initialized for model: %s", self.model_name)
+
+    @instrumented()
+    def check_fairness(self, predictions, true_labels, sensitive_attribute=None):
+        """
+        Checks the fairness of the AI model by comparing predictions against true labels to detect bias.
+        :param predictions: The predicted labels from the AI model.
+        :param true_labels: The actual labels from the dataset.
+        :param sensitive_attribute: Protected attribute(s) of each prediction, e.g. a DataFrame with 'gender' and 'race'.
+        :return: Fairness check result (True if fair, False otherwise)
+        """
+        if len(predictions) != len(true_labels):
+            logger.error("The length of predictions and true labels does not match!")
+            return False
+        self.instrumentation.active.add(rows=len(predictions))
+        
+        fairness_result = self._assess_fairness(predictions, true_labels, sensitive_attribute)
+        if fairness_result:
+            logger.info("Fairness check passed.")
+        else:
+            logger.warning("Fairness check failed.")
+        return fairness_result
+
+    def _assess_fairness(self, predictions, true_labels, sensitive_attribute):
+        """
+        Assess fairness based on statistical parity, equal opportunity, and demographic parity.
+        Every protected attribute is checked on its own and, when several are given, on their intersection.
+        :param predictions: The predicted labels.
+        :param true_labels: The actual labels.
+        :param sensitive_attribute: A list or column representing the sensitive attribute (e.g., gender, race),
+                                    or a DataFrame / dict of several such columns.
+        :return: True if the model is fair, False otherwise.
+        """
+        if sensitive_attribute is None:
+            logger.info("No sensitive attribute provided; group fairness checks skipped.")
+            return True
+
+        # Ensure the length of predictions, true_labels, and sensitive_attribute matches
+        if len(predictions) != len(true_labels) or len(predictions) != len(sensitive_attribute):
+            logger.error("Length of predictions, true labels, and sensitive attributes must match!")
+            return False
+
+        # One pass builds the confusion table of every group; all metrics are read from those tables
+        return self._log_fairness_report(assess_fairness(predictions, true_labels, sensitive_attribute, tolerance=self.tolerance, **self.bootstrap))
+
+    @instrumented()
+    def observe_predictions(self, predictions, true_labels, sensitive_attribute, **kwargs):
+        """
+        Adds a micro-batch of scored predictions to the running fairness state, so the fairness verdict can be
+        checked at any time without keeping past predictions.
+        :param predictions: The predicted labels of the batch.
+        :param true_labels: The actual labels of the batch.
+        :param sensitive_attribute: Protected attribute(s) of each prediction in the batch.
+        :param kwargs: Passed to the accumulator's update, e.g. sample_weight or timestamp.
+        """
+        if len(predictions) != len(true_labels) or len(predictions) != len(sensitive_attribute):
+            logger.error("Length of predictions, true labels, and sensitive attributes must match!")
+            return
+        self.instrumentation.active.add(rows=len(predictions))
+        self.fairness_accumulator.update(predictions, true_labels, sensitive_attribute, **kwargs)
+
+    @instrumented()
+    def check_streaming_fairness(self):
+        """
+        Checks fairness over the predictions observed so far (or the accumulator's window of them).
+        :return: Fairness check result (True if fair, False otherwise)
+        """
+        report = self.fairness_accumulator.report(tolerance=self.tolerance, **self.bootstrap)
+        if report is None:
+            logger.info("No predictions observed yet; group fairness checks skipped.")
+            return True
+        fairness_result = self._log_fairness_report(report)
+        if fairness_result:
+            logger.info("Fairness check passed.")
+        else:
+            logger.warning("Fairness check failed.")
+        return fairness_result
+
+    def _log_fairness_report(self, report):
+        """
+        Logs the per-group metrics and gaps of a fairness report.
+        :param report: Report as returned by fairness_engine.evaluate_tables.
+        :return: True if the model is fair, False otherwise.
+        """
+        # The per-group dictionaries are only built when INFO records are emitted
+        if logger.isEnabledFor(logging.INFO):
+            for name, view in report['views'].items():
+                metrics = view['metrics']
+                # Statistical and demographic parity are the same selection rate P(Y_hat=1 | group)
+                logger.info("[%s] Statistical/Demographic Parity (selection rate) Results: %s", name,
+                            metrics['selection_rate'].to_dict())
+                logger.info("[%s] Equal Opportunity (TPR) Results: %s", name, metrics['tpr'].to_dict())
+                logger.info("[%s] Fairness gaps: %s", name, view['gaps'])
+                if view['intervals'] is not None:
+                    logger.info("[%s] Fairness gap confidence intervals: %s", name, view['intervals'])
+
+        overall_fairness = report['fair']
+        if overall_fairness:
+            logger.info("Model passed all fairness checks.")
+        else:
+            logger.warning("Model failed one or more fairness checks.")
+
+        return overall_fairness
+
+    @instrumented()
+    def ensure_transparency(self):
+        """
+        Ensures that the AI system provides transparency in its operations, including data usage and algorithms.
+        :return: Transparency check result (True if transparent, False otherwise)
+        """
+        # Placeholder for transparency check logic
+        logger.info("Transparency check for model %s started.", self.model_name)
+        
+        transparency_status = True  # Placeholder value for transparency
+        if transparency_status:
+            logger.info("Transparency check passed.")
+        else:
+            logger.warning("Transparency check failed.")
+        
+        return transparency_status
+
+    @instrumented()
+    def ensure_accountability(self):
+        """
+        Ensures accountability by defining clear responsibilities for AI outcomes and ensuring traceability.
+        :return: Accountability check result (True if accountable, False otherwise)
+        """
+        # Placeholder for accountability logic
+        logger.info("Accountability check for model %s started.", self.model_name)
+        
+        accountability_status = True  # Placeholder value for accountability
+        if accountability_status:
+            logger.info("Accountability check passed.")
+        else:
+            logger.warning("Accountability check failed.")
+        
+        return accountability_status
+
+    @instrumented()
+    def evaluate_ethics(self, predictions=None, true_labels=None, sensitive_attribute=None):
+        """
+        Runs the full ethics evaluation for the AI model, including fairness, transparency, and accountability checks.
+        Without predictions, fairness is judged on the batches passed to observe_predictions.
+        :param predictions: The predicted labels from the AI model.
+        :param true_labels: The actual labels from the dataset.
+        :param sensitive_attribute: Protected attribute(s) of each prediction.
+        :return: Summary of ethics evaluation results
+        """
+        logger.info("Starting ethics evaluation for model %s...", self.model_name)
+
+        # Run all ethical checks
+        if predictions is None:
+            fairness_result = self.check_streaming_fairness()
+        else:
+            fairness_result = self.check_fairness(predictions, true_labels, sensitive_attribute)
+        transparency_result = self.ensure_transparency()
+        accountability_result = self.ensure_accountability()
+
+        # Summary of the ethics evaluation
+        evaluation_results = {
+            "Fairness": fairness_result,
+            "Transparency": transparency_result,
+            "Accountability": accountability_result
+        }
+
+        logger.info("Ethics evaluation completed for model %s. Results: %s", self.model_name, evaluation_results)
+        return evaluation_results
+
+
+# Example usage of the AI Ethics Framework
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Initialize the framework for a specific AI model
+    model_name = "Quantum Forensics AI Model"
+    ai_ethics = AIEthicsFramework(model_name, bootstrap_replicates=1000, bootstrap_seed=0)
+    
+    # Placeholder data for predictions and true labels
+    predictions = [0, 1, 0, 1, 1]
+    true_labels = [0, 1, 0, 0, 1]
+    sensitive_attribute = pd.DataFrame({'gender': ['F', 'M', 'F', 'M', 'F'], 'age_band': ['<40', '<40', '40+', '40+', '<40']})
+    
+    # Run the ethics evaluation
+    ethics_results = ai_ethics.evaluate_ethics(predictions, true_labels, sensitive_attribute)
+    print(f"Ethics Evaluation Results: {ethics_results}")
+
+    # Streaming evaluation: observe micro-batches as they are scored, then judge the running state
+    for start in range(0, len(predictions), 2):
+        ai_ethics.observe_predictions(predictions[start:start + 2], true_labels[start:start + 2],
+                                      sensitive_attribute.iloc[start:start + 2])
+    print(f"Streaming Ethics Evaluation Results: {ai_ethics.evaluate_ethics()}")
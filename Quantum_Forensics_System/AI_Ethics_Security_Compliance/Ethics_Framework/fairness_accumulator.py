@@ -0,0 +1,222 @@
+# fairness_accumulator.py
+# Streaming, mergeable fairness state for the ethics framework. Each micro-batch of (prediction, label, group)
+# rows is reduced to per-group confusion counts with the fairness engine and added to a running table, so the
+# full fairness verdict is available at any time without keeping past predictions. Accumulators built by
+# different workers merge by adding their tables. The sliding-window and time-decayed variants forget old
+# batches, which lets drift in a model's behaviour show up without recomputing over the whole history.
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from fairness_engine import DEFAULT_TOLERANCE, FAIRNESS_CHECKS, FairnessTables, confusion_tables, encode_groups, evaluate_tables
+
+class FairnessAccumulator:
+    """
+    Running per-group confusion counts over every batch seen.
+    """
+
+    def __init__(self, positive_label=1):
+        """
+        :param positive_label: Label counted as the positive outcome.
+        """
+        self.positive_label = positive_label
+        self.attributes = None
+        self.rows = {}
+        self.counts = np.zeros((0, 4), dtype=np.int64)
+
+    def _batch_tables(self, predictions, true_labels, sensitive_attribute, sample_weight):
+        """
+        Counts one batch and maps its groups onto rows of the running table, adding rows for new groups.
+
+        :return: Tuple (rows, counts) of the running-table row and confusion counts of each group in the batch.
+        """
+        codes, groups = encode_groups(sensitive_attribute)
+        if self.attributes is None:
+            self.attributes = list(groups.names)
+        elif list(groups.names) != self.attributes:
+            raise ValueError(f"Expected sensitive attributes {self.attributes}, got {list(groups.names)}.")
+        counts = confusion_tables(codes, len(groups), predictions, true_labels, self.positive_label, sample_weight)
+        # Only the groups of the batch are looked up, never the rows
+        rows = np.fromiter((self.rows.setdefault(key, len(self.rows)) for key in groups.tolist()), dtype=np.int64, count=len(groups))
+        self._grow(len(self.rows), counts.dtype)
+        return rows, counts
+
+    def _grow(self, n_groups, dtype=np.int64):
+        """
+        Extends the running table with zero rows for newly seen groups and widens it to float for weights.
+        """
+        if dtype.kind == 'f' and self.counts.dtype.kind != 'f':
+            self.counts = self.counts.astype(np.float64)
+        if n_groups > len(self.counts):
+            self.counts = np.vstack([self.counts, np.zeros((n_groups - len(self.counts), 4), dtype=self.counts.dtype)])
+
+    def update(self, predictions, true_labels, sensitive_attribute, sample_weight=None):
+        """
+        Adds a batch of predictions.
+
+        :param predictions: Predicted labels of the batch.
+        :param true_labels: Actual labels of the batch.
+        :param sensitive_attribute: Protected attribute(s) of each row, with the same attributes on every batch.
+        :param sample_weight: Optional weight of each row.
+        """
+        if len(predictions) == 0:
+            return
+        rows, counts = self._batch_tables(predictions, true_labels, sensitive_attribute, sample_weight)
+        self.counts[rows] += counts
+
+    def _aligned(self, other):
+        """
+        Adds the groups of another accumulator to this one's vocabulary.
+
+        :return: Row of this table for each row of the other's table.
+        """
+        if other.attributes is not None:
+            if self.attributes is None:
+                self.attributes = list(other.attributes)
+            elif other.attributes != self.attributes:
+                raise ValueError(f"Cannot merge accumulators over {self.attributes} and {other.attributes}.")
+        rows = np.fromiter((self.rows.setdefault(key, len(self.rows)) for key in other.rows), dtype=np.int64, count=len(other.rows))
+        self._grow(len(self.rows), other.counts.dtype)
+        return rows
+
+    def merge(self, other):
+        """
+        Adds the counts of another accumulator, e.g. one filled by a different worker.
+
+        :param other: FairnessAccumulator with the same sensitive attributes.
+        :return: self
+        """
+        rows = self._aligned(other)
+        self.counts[rows] += other.counts
+        return self
+
+    def tables(self):
+        """
+        :return: FairnessTables of the accumulated counts, with groups in sorted order.
+        """
+        if not self.rows:
+            return None
+        groups = pd.MultiIndex.from_tuples(list(self.rows), names=self.attributes)
+        groups, order = groups.sort_values(return_indexer=True)
+        return FairnessTables(groups, self.counts[order])
+
+    def report(self, tolerance=DEFAULT_TOLERANCE, checks=FAIRNESS_CHECKS, **bootstrap):
+        """
+        :param bootstrap: Confidence interval options passed to evaluate_tables (replicates, seed, ...).
+        :return: Fairness report of the accumulated counts, as returned by evaluate_tables, or None before the
+                 first batch.
+        """
+        tables = self.tables()
+        return None if tables is None else evaluate_tables(tables, tolerance, checks, **bootstrap)
+
+class SlidingFairnessAccumulator(FairnessAccumulator):
+    """
+    Per-group confusion counts over the batches of the last `window` of time. Each batch keeps its own small
+    table so it can be subtracted from the running counts when it leaves the window.
+    """
+
+    def __init__(self, window='1h', positive_label=1):
+        """
+        :param window: Window length as a pandas Timedelta string or Timedelta.
+        :param positive_label: Label counted as the positive outcome.
+        """
+        super().__init__(positive_label)
+        self.window = pd.Timedelta(window)
+        self.batches = deque()
+        self.latest = None
+
+    def update(self, predictions, true_labels, sensitive_attribute, sample_weight=None, timestamp=None):
+        """
+        Adds a batch observed at `timestamp` (now when omitted) and drops the batches that left the window.
+        """
+        timestamp = pd.Timestamp(timestamp) if timestamp is not None else pd.Timestamp.now()
+        if len(predictions):
+            rows, counts = self._batch_tables(predictions, true_labels, sensitive_attribute, sample_weight)
+            self.counts[rows] += counts
+            self.batches.append((timestamp, rows, counts))
+            if len(self.batches) > 1 and self.batches[-2][0] > timestamp:
+                # Late batch: keep the batches in time order so expiry stays a pop from the left
+                self.batches = deque(sorted(self.batches, key=lambda batch: batch[0]))
+        self.advance(timestamp)
+
+    def advance(self, now):
+        """
+        Moves the window end to `now`, subtracting the batches observed at or before now - window.
+        """
+        now = pd.Timestamp(now)
+        self.latest = now if self.latest is None else max(self.latest, now)
+        cutoff = self.latest - self.window
+        while self.batches and self.batches[0][0] <= cutoff:
+            _, rows, counts = self.batches.popleft()
+            self.counts[rows] -= counts
+
+    def merge(self, other):
+        """
+        Adds the in-window batches of another sliding accumulator and re-applies the window.
+
+        :param other: SlidingFairnessAccumulator with the same sensitive attributes.
+        :return: self
+        """
+        mapping = self._aligned(other)
+        for timestamp, rows, counts in other.batches:
+            self.counts[mapping[rows]] += counts
+            self.batches.append((timestamp, mapping[rows], counts))
+        self.batches = deque(sorted(self.batches, key=lambda batch: batch[0]))
+        if other.latest is not None:
+            self.advance(other.latest)
+        return self
+
+class DecayedFairnessAccumulator(FairnessAccumulator):
+    """
+    Exponentially time-decayed per-group confusion counts: an observation's weight halves every half_life, so
+    the counts describe recent behaviour while never dropping history abruptly.
+    """
+
+    def __init__(self, half_life='1h', positive_label=1):
+        """
+        :param half_life: Half-life of an observation's weight, as a pandas Timedelta string or Timedelta.
+        :param positive_label: Label counted as the positive outcome.
+        """
+        super().__init__(positive_label)
+        self.half_life = pd.Timedelta(half_life)
+        self.counts = np.zeros((0, 4), dtype=np.float64)
+        self.latest = None
+
+    def advance(self, now):
+        """
+        Decays the counts to time `now`. Times earlier than the latest one seen leave the counts unchanged.
+        """
+        now = pd.Timestamp(now)
+        if self.latest is not None and now > self.latest:
+            self.counts *= 0.5 ** ((now - self.latest) / self.half_life)
+        self.latest = now if self.latest is None else max(self.latest, now)
+
+    def update(self, predictions, true_labels, sensitive_attribute, sample_weight=None, timestamp=None):
+        """
+        Decays the counts to `timestamp` (now when omitted) and adds a batch observed at that time. A batch
+        older than the latest one is decayed to the current time before it is added.
+        """
+        timestamp = pd.Timestamp(timestamp) if timestamp is not None else pd.Timestamp.now()
+        self.advance(timestamp)
+        if len(predictions) == 0:
+            return
+        rows, counts = self._batch_tables(predictions, true_labels, sensitive_attribute, sample_weight)
+        self.counts[rows] += counts * 0.5 ** ((self.latest - timestamp) / self.half_life)
+
+    def merge(self, other):
+        """
+        Adds the counts of another decayed accumulator after bringing both to the later of their times.
+
+        :param other: DecayedFairnessAccumulator with the same half-life and sensitive attributes.
+        :return: self
+        """
+        if other.half_life != self.half_life:
+            raise ValueError("Cannot merge decayed accumulators with different half-lives.")
+        if other.latest is not None:
+            self.advance(other.latest)
+        rows = self._aligned(other)
+        factor = 1.0 if other.latest is None else 0.5 ** ((self.latest - other.latest) / self.half_life)
+        self.counts[rows] += other.counts * factor
+        return self
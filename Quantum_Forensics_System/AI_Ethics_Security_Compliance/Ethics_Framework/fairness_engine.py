@@ -0,0 +1,302 @@
+# fairness_engine.py
+# Vectorized group-fairness metrics for the ethics framework. Group keys are factorized once, intersectional
+# keys over several protected attributes are combined into a single integer code, and one bincount over
+# (group, true label, prediction) cells builds the TP/FP/TN/FN table of every group. Parity, TPR and FPR gaps
+# for each attribute and for their intersection are then read from those small tables, so the cost is one
+# pass over the predictions whatever the number of groups.
+
+import numpy as np
+import pandas as pd
+
+# Maximum allowed gap between the best and worst group for a check to pass
+DEFAULT_TOLERANCE = 0.1
+
+# Checks that decide the fairness verdict by default
+FAIRNESS_CHECKS = ('statistical_parity', 'equal_opportunity', 'demographic_parity')
+
+# Column order of the per-group confusion tables, matching sklearn's confusion_matrix(...).ravel()
+CONFUSION_COLUMNS = ['tn', 'fp', 'fn', 'tp']
+
+# Bootstrap defaults for the confidence intervals of the gaps
+DEFAULT_REPLICATES = 1000
+DEFAULT_CONFIDENCE = 0.95
+BOOTSTRAP_METHODS = ('poisson', 'multinomial')
+
+# Rules for turning a gap and its confidence interval into a verdict
+DECISIONS = ('point', 'upper', 'lower')
+
+# Name of the report entry combining all protected attributes
+INTERSECTION = 'intersection'
+
+def _attribute_columns(sensitive_attribute):
+    """
+    Normalizes the sensitive attribute argument to a dict of attribute name to 1-D array.
+    Accepts a single column (list, array or Series), a 2-D array, a dict of columns or a DataFrame.
+    """
+    if isinstance(sensitive_attribute, pd.DataFrame):
+        return {name: sensitive_attribute[name].to_numpy() for name in sensitive_attribute.columns}
+    if isinstance(sensitive_attribute, dict):
+        return {name: np.asarray(values) for name, values in sensitive_attribute.items()}
+    if isinstance(sensitive_attribute, pd.Series):
+        return {sensitive_attribute.name if sensitive_attribute.name is not None else 'group': sensitive_attribute.to_numpy()}
+    values = np.asarray(sensitive_attribute)
+    if values.ndim == 2:
+        return {f'attribute_{position}': values[:, position] for position in range(values.shape[1])}
+    return {'group': values}
+
+def encode_groups(sensitive_attribute):
+    """
+    Factorizes the group keys of every row. Several attributes are combined into one intersectional key
+    with mixed-radix integer arithmetic, so no per-row tuples are built.
+
+    :param sensitive_attribute: One column of group values, or several as a DataFrame, dict or 2-D array.
+    :return: Tuple (codes, groups) where codes is an int64 array numbering each row's group and groups is a
+             MultiIndex, one level per attribute, of the observed combinations in sorted order.
+    """
+    columns = _attribute_columns(sensitive_attribute)
+    combined = None
+    levels, radices = [], []
+    for values in columns.values():
+        codes, uniques = pd.factorize(values, sort=True, use_na_sentinel=False)
+        codes = codes.astype(np.int64)
+        combined = codes if combined is None else combined * len(uniques) + codes
+        levels.append(uniques)
+        radices.append(len(uniques))
+
+    # Renumber the observed combinations densely, in lexicographic order of the attribute values
+    codes, observed = pd.factorize(combined, sort=True)
+    level_codes = []
+    remainder = np.asarray(observed, dtype=np.int64)
+    for radix in reversed(radices):
+        remainder, digit = np.divmod(remainder, radix)
+        level_codes.append(digit)
+    groups = pd.MultiIndex(levels=levels, codes=level_codes[::-1], names=list(columns))
+    return codes.astype(np.int64), groups
+
+def confusion_tables(codes, n_groups, predictions, true_labels, positive_label=1, sample_weight=None):
+    """
+    Builds the confusion table of every group with a single bincount.
+
+    :param codes: int64 group number of each row, as returned by encode_groups.
+    :param n_groups: Number of groups.
+    :param predictions: Predicted labels.
+    :param true_labels: Actual labels.
+    :param positive_label: Label counted as the positive outcome.
+    :param sample_weight: Optional weight of each row.
+    :return: Array of shape (n_groups, 4) with columns tn, fp, fn, tp.
+    """
+    predicted = np.asarray(predictions) == positive_label
+    actual = np.asarray(true_labels) == positive_label
+    cells = codes * 4 + actual * 2 + predicted
+    counts = np.bincount(cells, weights=sample_weight, minlength=4 * n_groups)
+    return counts.reshape(n_groups, 4)
+
+def _rate(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+def _spread(rates):
+    """
+    Difference between the highest and lowest defined rate along the last axis, or 0 where fewer than two
+    groups define it. Works on one table's rates or on a stack of bootstrap replicates at once.
+    """
+    defined = ~np.isnan(rates)
+    highest = np.where(defined, rates, -np.inf).max(axis=-1)
+    lowest = np.where(defined, rates, np.inf).min(axis=-1)
+    return np.where(defined.sum(axis=-1) > 1, highest - lowest, 0.0)
+
+def _gaps(counts):
+    """
+    Between-group gaps of confusion counts shaped (..., groups, 4).
+    """
+    tn, fp, fn, tp = np.moveaxis(counts, -1, 0)
+    selection = _spread(_rate(fp + tp, tn + fp + fn + tp))
+    tpr = _spread(_rate(tp, tp + fn))
+    fpr = _spread(_rate(fp, fp + tn))
+    # Statistical and demographic parity both compare P(Y_hat=1 | group); they are computed once
+    return {
+        'statistical_parity': selection,
+        'demographic_parity': selection,
+        'equal_opportunity': tpr,
+        'false_positive_rate': fpr,
+        'equalized_odds': np.maximum(tpr, fpr),
+    }
+
+def bootstrap_counts(counts, replicates=DEFAULT_REPLICATES, seed=None, method='poisson'):
+    """
+    Draws bootstrap replicates of confusion tables directly from the counts, without resampling rows.
+    In the Poisson bootstrap every row gets an independent Poisson(1) weight, so a cell holding c rows gets a
+    Poisson(c) total; the classical bootstrap redraws all n rows, which gives multinomial cell totals.
+
+    :param counts: Confusion counts shaped (groups, 4).
+    :param replicates: Number of bootstrap replicates.
+    :param seed: Seed or numpy Generator, for reproducible intervals.
+    :param method: 'poisson' or 'multinomial'. The multinomial bootstrap needs unweighted counts.
+    :return: Array shaped (replicates, groups, 4).
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"Unknown bootstrap method {method!r}. Expected one of {BOOTSTRAP_METHODS}.")
+    rng = np.random.default_rng(seed)
+    if method == 'poisson':
+        return rng.poisson(counts, size=(replicates,) + counts.shape)
+    total = counts.sum()
+    if counts.dtype.kind == 'f' and not np.all(counts == np.round(counts)):
+        raise ValueError("The multinomial bootstrap needs unweighted counts; use the Poisson bootstrap for weighted data.")
+    samples = rng.multinomial(int(total), counts.ravel() / total, size=replicates)
+    return samples.reshape((replicates,) + counts.shape)
+
+class FairnessTables:
+    """
+    Per-group confusion counts from which every fairness metric is derived, optionally with bootstrap
+    replicates of the counts for confidence intervals.
+    """
+
+    def __init__(self, groups, counts, samples=None):
+        """
+        :param groups: MultiIndex of group keys, one level per protected attribute.
+        :param counts: Array of shape (len(groups), 4) with columns tn, fp, fn, tp.
+        :param samples: Optional bootstrap replicates of the counts, shaped (replicates, len(groups), 4).
+        """
+        self.groups = groups
+        self.counts = counts
+        self.samples = samples
+
+    @classmethod
+    def from_arrays(cls, predictions, true_labels, sensitive_attribute, positive_label=1, sample_weight=None):
+        """
+        Counts the predictions of every intersectional group in one pass.
+        """
+        codes, groups = encode_groups(sensitive_attribute)
+        return cls(groups, confusion_tables(codes, len(groups), predictions, true_labels, positive_label, sample_weight))
+
+    @property
+    def attributes(self):
+        return list(self.groups.names)
+
+    def bootstrap(self, replicates=DEFAULT_REPLICATES, seed=None, method='poisson'):
+        """
+        :return: Copy of the tables carrying bootstrap replicates of the counts (see bootstrap_counts).
+        """
+        return FairnessTables(self.groups, self.counts, bootstrap_counts(self.counts, replicates, seed, method))
+
+    def marginal(self, attributes):
+        """
+        Collapses the tables, and their bootstrap replicates, onto a subset of the attributes by summing over
+        the others. Replicates stay paired with the intersectional ones they are summed from.
+
+        :param attributes: Attribute name or list of names to keep.
+        :return: FairnessTables over the kept attributes.
+        """
+        attributes = [attributes] if isinstance(attributes, str) else list(attributes)
+        if attributes == self.attributes:
+            return self
+        grouped = pd.Series(np.arange(len(self.groups)), index=self.groups).groupby(level=attributes, sort=True)
+        targets = grouped.ngroup().to_numpy()
+        summed = pd.DataFrame(self.counts, index=self.groups).groupby(level=attributes, sort=True).sum()
+        index = summed.index if isinstance(summed.index, pd.MultiIndex) else pd.MultiIndex.from_arrays([summed.index], names=attributes)
+        samples = None
+        if self.samples is not None:
+            samples = np.zeros((len(self.samples), len(index), 4), dtype=self.samples.dtype)
+            np.add.at(samples, (slice(None), targets), self.samples)
+        return FairnessTables(index, summed.to_numpy(), samples)
+
+    def metrics(self):
+        """
+        :return: DataFrame indexed by group with the confusion counts, the group size, the selection rate
+                 P(Y_hat=1 | group), the true positive rate and the false positive rate. Rates that are
+                 undefined for a group (no actual positives or negatives) are NaN.
+        """
+        tn, fp, fn, tp = self.counts.T
+        total = tn + fp + fn + tp
+        index = self.groups.get_level_values(0) if self.groups.nlevels == 1 else self.groups
+        table = pd.DataFrame(self.counts, index=index, columns=CONFUSION_COLUMNS)
+        table['count'] = total
+        table['selection_rate'] = _rate(fp + tp, total)
+        table['tpr'] = _rate(tp, tp + fn)
+        table['fpr'] = _rate(fp, fp + tn)
+        return table
+
+    def gaps(self):
+        """
+        :return: Dict of the largest between-group difference for each fairness criterion.
+        """
+        return {name: float(gap) for name, gap in _gaps(self.counts).items()}
+
+    def intervals(self, confidence=DEFAULT_CONFIDENCE):
+        """
+        Percentile bootstrap confidence intervals of every gap, computed over all replicates at once.
+
+        :param confidence: Coverage of the intervals.
+        :return: Dict of gap name to (lower, upper), or None when the tables carry no replicates.
+        """
+        if self.samples is None:
+            return None
+        alpha = (1 - confidence) / 2
+        return {name: tuple(float(bound) for bound in np.quantile(gaps, [alpha, 1 - alpha]))
+                for name, gaps in _gaps(self.samples).items()}
+
+def _passes(gap, interval, tolerance, decision):
+    """
+    Verdict of one check. 'point' compares the observed gap; 'upper' passes only when the whole interval is
+    within tolerance; 'lower' fails only when the whole interval is beyond it.
+    """
+    if decision == 'point' or interval is None:
+        return gap < tolerance
+    if decision == 'upper':
+        return interval[1] < tolerance
+    return interval[0] < tolerance
+
+def evaluate_tables(tables, tolerance=DEFAULT_TOLERANCE, checks=FAIRNESS_CHECKS, replicates=0, seed=None,
+                    confidence=DEFAULT_CONFIDENCE, decision='point', bootstrap_method='poisson'):
+    """
+    Evaluates every protected attribute on its own and, when there are several, their intersection.
+
+    :param tables: FairnessTables over all protected attributes.
+    :param tolerance: Maximum allowed gap for a check to pass.
+    :param checks: Names of the gaps that decide the verdict.
+    :param replicates: Number of bootstrap replicates for confidence intervals; none are computed with 0.
+    :param seed: Seed of the bootstrap, for reproducible intervals.
+    :param confidence: Coverage of the confidence intervals.
+    :param decision: 'point' to judge the observed gaps, 'upper' to require the upper confidence bound to be
+                     within tolerance, or 'lower' to fail only when the lower bound exceeds it.
+    :param bootstrap_method: 'poisson' or 'multinomial'.
+    :return: Dict with a 'views' entry mapping each attribute (and 'intersection') to its metrics table,
+             gaps, confidence intervals and per-check verdicts, and an overall 'fair' flag.
+    """
+    if decision not in DECISIONS:
+        raise ValueError(f"Unknown decision rule {decision!r}. Expected one of {DECISIONS}.")
+    if replicates:
+        # Replicates are drawn once for the intersection; every attribute's are sums of them
+        tables = tables.bootstrap(replicates, seed, bootstrap_method)
+    views = [(name, tables.marginal(name)) for name in tables.attributes]
+    if len(tables.attributes) > 1:
+        views.append((INTERSECTION, tables))
+    report = {'views': {}, 'fair': True}
+    for name, view in views:
+        gaps = view.gaps()
+        intervals = view.intervals(confidence)
+        passed = {check: _passes(gaps[check], None if intervals is None else intervals[check], tolerance, decision)
+                  for check in checks}
+        report['views'][name] = {'metrics': view.metrics(), 'gaps': gaps, 'intervals': intervals,
+                                 'checks': passed, 'fair': all(passed.values())}
+        report['fair'] = report['fair'] and all(passed.values())
+    return report
+
+def assess_fairness(predictions, true_labels, sensitive_attribute, tolerance=DEFAULT_TOLERANCE,
+                    checks=FAIRNESS_CHECKS, positive_label=1, sample_weight=None, **bootstrap):
+    """
+    Computes group-fairness metrics for one or more protected attributes and their intersection.
+
+    :param predictions: Predicted labels.
+    :param true_labels: Actual labels.
+    :param sensitive_attribute: One column of group values, or several as a DataFrame, dict or 2-D array.
+    :param tolerance: Maximum allowed gap for a check to pass.
+    :param checks: Names of the gaps that decide the verdict.
+    :param positive_label: Label counted as the positive outcome.
+    :param sample_weight: Optional weight of each row.
+    :param bootstrap: Confidence interval options passed to evaluate_tables (replicates, seed, confidence,
+                      decision, bootstrap_method).
+    :return: Report dict as returned by evaluate_tables.
+    """
+    tables = FairnessTables.from_arrays(predictions, true_labels, sensitive_attribute, positive_label, sample_weight)
+    return evaluate_tables(tables, tolerance, checks, **bootstrap)
@@ -0,0 +1,115 @@
+# base10_converter.py
+# Conversion kernels for the base-10 angle system. In the base-10 system an angle is one decimal number in a
+# unit (decimal degrees for coordinates, or gradians, the centesimal unit with 100 to the right angle)
+# instead of base-60 degrees, minutes and seconds. Every kernel takes and returns whole numpy arrays (or
+# DataFrame columns): unit conversions are one multiplication by a precomputed factor, and sexagesimal
+# strings are parsed with one vectorized regular expression extraction per column.
+
+import numpy as np
+import pandas as pd
+
+# Units per full turn
+UNITS = {
+    'turn': 1.0,
+    'degree': 360.0,
+    'gradian': 400.0,
+    'radian': 2 * np.pi,
+    'mil': 6400.0,
+    'arcminute': 21600.0,
+    'arcsecond': 1296000.0,
+}
+
+# Sexagesimal (degrees, minutes, seconds) notation, e.g. 40°26'46.3"N, 40 26 46.3 N, -73:59:8.5 or N 40.446
+DMS_PATTERN = (r'^\s*(?P<prefix>[NSEWnsew])?\s*(?P<sign>[-+])?(?P<degrees>\d+(?:\.\d+)?)\s*[°d:\s]?\s*'
+               r'(?:(?P<minutes>\d+(?:\.\d+)?)\s*[\'′m:\s]?\s*)?(?:(?P<seconds>\d+(?:\.\d+)?)\s*(?:"|″|\'\'|s)?\s*)?'
+               r'(?P<suffix>[NSEWnsew])?\s*$')
+
+def conversion_factor(from_unit, to_unit):
+    """
+    :return: The factor converting angles from one unit to another.
+    """
+    for unit in (from_unit, to_unit):
+        if unit not in UNITS:
+            raise ValueError(f"Unknown angle unit {unit!r}. Expected one of {sorted(UNITS)}.")
+    return UNITS[to_unit] / UNITS[from_unit]
+
+def convert(values, from_unit, to_unit='degree', out=None):
+    """
+    Converts angles between units.
+
+    :param values: Array or Series of angles.
+    :param out: Optional float array to write the result into, to avoid an allocation on very large arrays.
+    :return: Converted angles (a Series for a Series).
+    """
+    factor = conversion_factor(from_unit, to_unit)
+    if isinstance(values, pd.Series):
+        return values.astype('float64') * factor
+    return np.multiply(values, factor, out=out, dtype=np.float64 if out is None else None)
+
+def wrap(values, unit='degree', signed=True):
+    """
+    Wraps angles into one turn: [-half turn, half turn) when signed, [0, turn) otherwise.
+    """
+    turn = UNITS[unit]
+    if signed:
+        return np.mod(np.asarray(values, dtype=np.float64) + turn / 2, turn) - turn / 2
+    return np.mod(np.asarray(values, dtype=np.float64), turn)
+
+def dms_to_decimal(degrees, minutes=0.0, seconds=0.0, hemisphere=None):
+    """
+    Converts sexagesimal components to decimal degrees. The sign of the degrees (or a negative zero degrees)
+    applies to the whole angle, and 'S' or 'W' hemispheres make it negative.
+
+    :param hemisphere: Optional array of hemisphere letters.
+    :return: float64 array of decimal degrees.
+    """
+    degrees = np.asarray(degrees, dtype=np.float64)
+    magnitude = np.abs(degrees) + np.asarray(minutes, dtype=np.float64) / 60 + np.asarray(seconds, dtype=np.float64) / 3600
+    negative = np.signbit(degrees)
+    if hemisphere is not None:
+        negative = negative | np.isin(np.char.upper(np.asarray(hemisphere, dtype=str)), ['S', 'W'])
+    return np.where(negative, -magnitude, magnitude)
+
+def decimal_to_dms(values, second_decimals=3):
+    """
+    Splits decimal degrees into sexagesimal components, rounding the seconds and carrying into minutes and
+    degrees so seconds never read 60.
+
+    :return: Tuple (sign, degrees, minutes, seconds): sign is -1 or 1, the components are non-negative.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    total_seconds = np.round(np.abs(values) * 3600, second_decimals)
+    degrees = np.floor(total_seconds / 3600)
+    minutes = np.floor((total_seconds - degrees * 3600) / 60)
+    seconds = np.round(total_seconds - degrees * 3600 - minutes * 60, second_decimals)
+    return np.where(np.signbit(values), -1, 1), degrees.astype(np.int64), minutes.astype(np.int64), seconds
+
+def parse_dms(values):
+    """
+    Parses a column of sexagesimal or decimal coordinate strings to decimal degrees. Unparseable values
+    become NaN.
+
+    :param values: Series (or array) of strings.
+    :return: float64 Series of decimal degrees.
+    """
+    parts = pd.Series(values, dtype='string').str.extract(DMS_PATTERN)
+    degrees = pd.to_numeric(parts['degrees'], errors='coerce')
+    minutes = pd.to_numeric(parts['minutes'], errors='coerce').fillna(0.0)
+    seconds = pd.to_numeric(parts['seconds'], errors='coerce').fillna(0.0)
+    hemisphere = parts['suffix'].fillna(parts['prefix']).fillna('').str.upper()
+    negative = (parts['sign'] == '-').fillna(False) | hemisphere.isin(['S', 'W'])
+    magnitude = degrees + minutes / 60 + seconds / 3600
+    return magnitude.where(~negative, -magnitude).astype('float64')
+
+def format_dms(values, axis='lat', second_decimals=1):
+    """
+    Formats decimal degrees as sexagesimal strings with a hemisphere letter, e.g. 40°26'46.3"N.
+
+    :param axis: 'lat' (N/S) or 'lon' (E/W).
+    :return: Series of strings.
+    """
+    sign, degrees, minutes, seconds = decimal_to_dms(values, second_decimals)
+    hemisphere = np.where(sign < 0, 'S' if axis == 'lat' else 'W', 'N' if axis == 'lat' else 'E')
+    seconds = pd.Series(seconds).map(f'{{:.{second_decimals}f}}'.format)
+    return (pd.Series(degrees).astype(str) + '°' + pd.Series(minutes).astype(str) + "'" + seconds + '"'
+            + pd.Series(hemisphere))
@@ -0,0 +1,115 @@
+# base10_trigonometry.py
+# Trigonometry kernels for angles in base-10 units (decimal degrees by default). The argument is reduced in
+# its own unit, to the nearest quarter turn and a remainder within an eighth of a turn, before it is turned
+# into radians, so quarter-turn angles come out exact (sin 180 is 0, not 1.2e-16) and large angles lose no
+# precision in the reduction. For angles stored as fixed-point integers (e.g. millidegrees from motion
+# tracking), TrigTable is a table-driven fast path: sine and cosine become a single gather from a
+# precomputed table, with no floating-point conversion or reduction beyond an integer modulo.
+
+import os
+import sys
+
+import numpy as np
+
+# The unit definitions are a plain script in Base_10_Angular_System/Angle_Conversion, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Angle_Conversion')))
+from base10_converter import UNITS
+
+# Largest table TrigTable builds (entries per function)
+MAX_TABLE_ENTRIES = 4_000_000
+
+def _reduce(values, unit):
+    """
+    :return: Tuple (quadrant, remainder in radians): values = quadrant quarter turns + remainder.
+    """
+    quarter = UNITS[unit] / 4
+    values = np.asarray(values, dtype=np.float64)
+    quadrant = np.round(values / quarter)
+    remainder = (values - quadrant * quarter) * (np.pi / 2 / quarter)
+    return np.mod(quadrant, 4).astype(np.int8), remainder
+
+def sincos(values, unit='degree'):
+    """
+    Sine and cosine of angles, sharing one argument reduction.
+
+    :return: Tuple (sin, cos) of float64 arrays.
+    """
+    quadrant, remainder = _reduce(values, unit)
+    sin, cos = np.sin(remainder), np.cos(remainder)
+    # Rotate by the quadrant: (sin, cos) -> (cos, -sin) -> (-sin, -cos) -> (-cos, sin)
+    swap = (quadrant & 1).astype(bool)
+    flip_sin = quadrant >= 2
+    flip_cos = (quadrant == 1) | (quadrant == 2)
+    rotated_sin = np.where(swap, cos, sin)
+    rotated_cos = np.where(swap, sin, cos)
+    return np.where(flip_sin, -rotated_sin, rotated_sin), np.where(flip_cos, -rotated_cos, rotated_cos)
+
+def sin(values, unit='degree'):
+    """
+    :return: Sine of angles in a base-10 unit.
+    """
+    return sincos(values, unit)[0]
+
+def cos(values, unit='degree'):
+    """
+    :return: Cosine of angles in a base-10 unit.
+    """
+    return sincos(values, unit)[1]
+
+def tan(values, unit='degree'):
+    """
+    :return: Tangent of angles in a base-10 unit (inf at odd quarter turns).
+    """
+    sine, cosine = sincos(values, unit)
+    with np.errstate(divide='ignore'):
+        return sine / cosine
+
+def arcsin(values, unit='degree'):
+    return np.arcsin(values) * (UNITS[unit] / (2 * np.pi))
+
+def arccos(values, unit='degree'):
+    return np.arccos(values) * (UNITS[unit] / (2 * np.pi))
+
+def arctan2(y, x, unit='degree'):
+    """
+    :return: Angle of the vector (x, y) in a base-10 unit, in (-half turn, half turn].
+    """
+    return np.arctan2(y, x) * (UNITS[unit] / (2 * np.pi))
+
+class TrigTable:
+    """
+    Table-driven sine and cosine of fixed-point angles: integers counting 1/scale of a unit.
+    """
+
+    def __init__(self, scale=1000, unit='degree'):
+        """
+        :param scale: Fixed-point steps per unit, e.g. 1000 for millidegrees.
+        :param unit: Unit of the angles.
+        """
+        entries = UNITS[unit] * scale
+        if entries != int(entries) or entries > MAX_TABLE_ENTRIES:
+            raise ValueError(f"A table for {scale} steps per {unit} would need {entries} entries; "
+                             f"at most {MAX_TABLE_ENTRIES} whole entries are supported.")
+        self.scale = scale
+        self.unit = unit
+        self.entries = int(entries)
+        self.sin_table, self.cos_table = sincos(np.arange(self.entries) / scale, unit)
+
+    def _positions(self, values):
+        values = np.asarray(values)
+        if not np.issubdtype(values.dtype, np.integer):
+            raise TypeError("TrigTable takes fixed-point integer angles; use sincos() for floating-point angles.")
+        return np.mod(values, self.entries)
+
+    def sincos(self, values):
+        """
+        :return: Tuple (sin, cos) of fixed-point angles.
+        """
+        positions = self._positions(values)
+        return self.sin_table[positions], self.cos_table[positions]
+
+    def sin(self, values):
+        return self.sin_table[self._positions(values)]
+
+    def cos(self, values):
+        return self.cos_table[self._positions(values)]
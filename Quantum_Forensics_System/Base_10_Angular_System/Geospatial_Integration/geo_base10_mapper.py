@@ -0,0 +1,128 @@
+# geo_base10_mapper.py
+# Maps coordinate columns of ingested frames to base-10 (decimal degree) latitude and longitude, and provides
+# the geodesic kernels the geospatial queries need: great-circle distance, bearing, destination point and the
+# bounding box of a radius. All of them work on whole numpy columns and use the quadrant-exact trigonometry
+# of base10_trigonometry.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# The conversion and trigonometry kernels are plain scripts in sibling directories, not packages
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(_ROOT, 'Angle_Conversion'))
+sys.path.append(os.path.join(_ROOT, 'Base10_Processing'))
+from base10_converter import convert, parse_dms, wrap
+from base10_trigonometry import arcsin, arctan2, sincos
+
+# Mean Earth radius in meters (IUGG)
+EARTH_RADIUS_M = 6_371_008.8
+
+# Meters per degree of latitude on the mean sphere
+METERS_PER_DEGREE = EARTH_RADIUS_M * np.pi / 180
+
+# Notations the coordinate columns of a frame may use
+NOTATIONS = ('decimal', 'dms', 'fixed')
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    :return: Great-circle distance in meters between points given in decimal degrees.
+    """
+    sin_dlat, _ = sincos((np.asarray(lat2) - lat1) / 2)
+    sin_dlon, _ = sincos((np.asarray(lon2) - lon1) / 2)
+    _, cos_lat1 = sincos(lat1)
+    _, cos_lat2 = sincos(lat2)
+    a = sin_dlat ** 2 + cos_lat1 * cos_lat2 * sin_dlon ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """
+    :return: Initial great-circle bearing in decimal degrees clockwise from north, in [0, 360).
+    """
+    sin_lat1, cos_lat1 = sincos(lat1)
+    sin_lat2, cos_lat2 = sincos(lat2)
+    sin_dlon, cos_dlon = sincos(np.asarray(lon2) - lon1)
+    bearing = arctan2(sin_dlon * cos_lat2, cos_lat1 * sin_lat2 - sin_lat1 * cos_lat2 * cos_dlon)
+    return wrap(bearing, signed=False)
+
+def destination(lat, lon, bearing, distance_m):
+    """
+    :return: Tuple (lat, lon) in decimal degrees reached from a point after a distance along a bearing.
+    """
+    sin_lat, cos_lat = sincos(lat)
+    sin_bearing, cos_bearing = sincos(bearing)
+    angular = np.asarray(distance_m, dtype=np.float64) / EARTH_RADIUS_M
+    sin_angular, cos_angular = np.sin(angular), np.cos(angular)
+    sin_lat2 = np.clip(sin_lat * cos_angular + cos_lat * sin_angular * cos_bearing, -1.0, 1.0)
+    lat2 = arcsin(sin_lat2)
+    lon2 = np.asarray(lon) + arctan2(sin_bearing * sin_angular * cos_lat, cos_angular - sin_lat * sin_lat2)
+    return lat2, wrap(lon2)
+
+def local_xy(lat, lon, origin_lat, origin_lon):
+    """
+    Equirectangular projection around an origin, accurate to well under a percent within tens of kilometers.
+
+    :return: Tuple (x, y) in meters east and north of the origin.
+    """
+    _, cos_origin = sincos(origin_lat)
+    return (wrap(np.asarray(lon) - origin_lon) * METERS_PER_DEGREE * cos_origin,
+            (np.asarray(lat) - origin_lat) * METERS_PER_DEGREE)
+
+def bounding_box(lat, lon, radius_m):
+    """
+    Latitude and longitude ranges covering every point within a radius of a point.
+
+    :return: Tuple (lat_min, lat_max, lon_ranges) with lon_ranges a list of one or two (min, max) ranges,
+             two when the box crosses the antimeridian; the full longitude range when it reaches a pole.
+    """
+    delta_lat = radius_m / METERS_PER_DEGREE
+    lat_min, lat_max = max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0)
+    if lat_min <= -90.0 or lat_max >= 90.0:
+        return lat_min, lat_max, [(-180.0, 180.0)]
+    # The widest longitude span of the circle, reached at the latitude where it touches its meridians
+    sin_angular = np.sin(radius_m / EARTH_RADIUS_M)
+    _, cos_lat = sincos(lat)
+    delta_lon = float(arcsin(min(sin_angular / cos_lat, 1.0)))
+    if delta_lon >= 180.0 or sin_angular >= cos_lat:
+        return lat_min, lat_max, [(-180.0, 180.0)]
+    lon_min, lon_max = lon - delta_lon, lon + delta_lon
+    if lon_min < -180.0:
+        return lat_min, lat_max, [(lon_min + 360.0, 180.0), (-180.0, lon_max)]
+    if lon_max > 180.0:
+        return lat_min, lat_max, [(lon_min, 180.0), (-180.0, lon_max - 360.0)]
+    return lat_min, lat_max, [(lon_min, lon_max)]
+
+def map_coordinates(frame, lat_column='latitude', lon_column='longitude', notation='decimal', unit='degree',
+                    scale=None, output_columns=('lat', 'lon')):
+    """
+    Adds decimal-degree latitude and longitude columns to a frame. Coordinates outside [-90, 90] and
+    [-180, 180] become NaN; longitudes are wrapped first when they are given in [0, 360).
+
+    :param notation: 'decimal' (numbers in `unit`), 'dms' (sexagesimal strings) or 'fixed' (integers counting
+                     1/scale of `unit`, e.g. microdegrees with scale 1e6).
+    :param unit: Unit of decimal and fixed-point coordinates (see base10_converter.UNITS).
+    :param scale: Fixed-point steps per unit.
+    :return: Copy of the frame with the output columns.
+    """
+    if notation not in NOTATIONS:
+        raise ValueError(f"Unknown coordinate notation {notation!r}. Expected one of {NOTATIONS}.")
+    if notation == 'fixed' and not scale:
+        raise ValueError("Fixed-point coordinates need a scale.")
+    columns = []
+    for column in (lat_column, lon_column):
+        if notation == 'dms':
+            values = parse_dms(frame[column]).to_numpy()
+        else:
+            values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+            if notation == 'fixed':
+                values = values / scale
+            if unit != 'degree':
+                values = convert(values, unit, 'degree')
+        columns.append(values)
+    lat, lon = columns
+    lon = np.where(lon > 180.0, lon - 360.0, lon)
+    lat = np.where(np.abs(lat) <= 90.0, lat, np.nan)
+    lon = np.where(np.abs(lon) <= 180.0, lon, np.nan)
+    return frame.assign(**{output_columns[0]: lat, output_columns[1]: lon})
@@ -0,0 +1,338 @@
+# benchmark_suite.py
+# Reproducible performance benchmarks for the ingestion pipeline, the integrity checks, the fairness
+# evaluation and the compliance scans, run on the seeded datasets of synthetic_data.py. Every case runs in a
+# freshly spawned process, so its peak memory is not inflated by earlier cases, and records wall time, CPU time
+# and peak resident memory. The memory of the timed stage itself is measured apart from its setup: on Linux the
+# process's resident high-water mark is reset right before every run, elsewhere the tracemalloc peak is used.
+# Results are written as JSON together with the commit, library versions and machine they were measured on, and
+# two result files can be compared offline to flag regressions.
+#
+# Usage:
+#   python benchmark_suite.py --rows 1000 100000 --output results.json
+#   python benchmark_suite.py --rows 1000000 --cases fairness compliance_scan --compare baseline.json
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import DEFAULT_SEED, EPOCH, write_csv
+
+# The benchmarked modules are plain scripts in their own directories, not packages
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+for directory in (('Self_Refining_Learning_System', 'Data_Ingestion'),
+                  ('AI_Ethics_Security_Compliance', 'Ethics_Framework'),
+                  ('AI_Ethics_Security_Compliance', 'Compliance')):
+    sys.path.append(os.path.join(ROOT, *directory))
+
+# Default dataset sizes, in rows
+DEFAULT_ROWS = [1_000, 100_000]
+
+# Default number of timed runs per case
+DEFAULT_REPEAT = 3
+
+# Relative slowdown (or memory growth) of the median beyond which compare_results flags a regression
+DEFAULT_THRESHOLD = 0.10
+
+# Memory below which compare_results treats differences as noise (stages that allocate next to nothing)
+MEMORY_FLOOR_BYTES = 1024 * 1024
+
+# Bootstrap replicates of the fairness_bootstrap case
+BOOTSTRAP_REPLICATES = 1000
+
+def _ingestion(path, rows, load=True):
+    from historical_data_ingestion import HistoricalDataIngestion
+    from instrumentation import Instrumentation
+
+    # Stages are timed here, so the pipeline's own instrumentation stays off and nothing reaches its log files
+    instrumentation = Instrumentation('benchmark', enabled=False)
+    instrumentation.logger.setLevel(logging.CRITICAL)
+    # The window covers the first half of the event timeline (one event per second)
+    ingestion = HistoricalDataIngestion(path, EPOCH, EPOCH + pd.Timedelta(seconds=rows // 2), instrumentation)
+    if load:
+        ingestion.load_data()
+        ingestion.preprocess_data()
+    return ingestion
+
+def _numeric_ingestion(path, rows):
+    ingestion = _ingestion(path, rows)
+    ingestion.data = ingestion.data.drop(columns='event_type')
+    return ingestion
+
+def _predictions(path, rows):
+    data = pd.read_csv(path)
+    return data['prediction'].to_numpy(), data['label'].to_numpy(), data[['gender', 'race', 'age_band']]
+
+def _assess(arrays, **bootstrap):
+    from fairness_engine import assess_fairness
+
+    predictions, labels, groups = arrays
+    return assess_fairness(predictions, labels, groups, **bootstrap)
+
+def _scan(path):
+    from pii_scanner import scan_file
+
+    return scan_file(path, full_scan=True, workers=1)
+
+def _audit(path):
+    from compliance_audit import audit_file, retention_cutoff
+
+    return audit_file(path, retention_cutoff(5, now=EPOCH + pd.DateOffset(years=10)))
+
+# Benchmark cases: name -> (dataset kind, setup(path, rows) -> state, run(state)). Only run is timed; setup
+# is repeated before every run so cases that modify their state start from the same point each time.
+CASES = {
+    'ingestion_load': ('events', lambda path, rows: _ingestion(path, rows, load=False),
+                       lambda ingestion: (ingestion.load_data(), ingestion.preprocess_data())),
+    'ingestion_filter': ('events', _ingestion, lambda ingestion: ingestion.filter_data_by_time()),
+    'ingestion_aggregate': ('events', _numeric_ingestion, lambda ingestion: ingestion.aggregate_data('hour')),
+    'ingestion_statistics': ('events', _ingestion, lambda ingestion: ingestion.generate_statistics()),
+    'ingestion_stream_statistics': ('events', lambda path, rows: _ingestion(path, rows, load=False),
+                                    lambda ingestion: ingestion.stream_statistics()),
+    'integrity_check': ('events', _ingestion, lambda ingestion: ingestion.verify_data_integrity()),
+    'source_integrity': ('events', lambda path, rows: _ingestion(path, rows, load=False),
+                         lambda ingestion: ingestion.verify_source_integrity()),
+    'fairness': ('predictions', _predictions, _assess),
+    'fairness_bootstrap': ('predictions', _predictions,
+                           lambda arrays: _assess(arrays, replicates=BOOTSTRAP_REPLICATES, seed=DEFAULT_SEED)),
+    'compliance_scan': ('pii_text', lambda path, rows: path, _scan),
+    'compliance_audit': ('pii_text', lambda path, rows: path, _audit),
+}
+
+def dataset_path(workspace, kind, rows, seed=DEFAULT_SEED):
+    """
+    Returns the CSV file of a dataset in the workspace, generating it on first use. Files are named by kind,
+    size and seed, which fully determine their content, so they are reused across runs and versions.
+    """
+    path = os.path.join(workspace, f'{kind}_{rows}_{seed}.csv')
+    if not os.path.exists(path):
+        os.makedirs(workspace, exist_ok=True)
+        write_csv(kind, path + '.tmp', rows, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+def _proc_status_bytes(field):
+    """
+    :return: A memory field of /proc/self/status (e.g. 'VmRSS', 'VmHWM') in bytes, or None where it is unavailable.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _peak_rss_bytes():
+    peak = _proc_status_bytes('VmHWM')
+    if peak is not None:
+        return peak
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _reset_peak_rss():
+    """
+    Resets the resident high-water mark of the process to its current size (Linux 4.0 and later).
+
+    :return: True if the peak was reset.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        return False
+    return _proc_status_bytes('VmRSS') is not None
+
+def _cpu_seconds():
+    # Includes worker processes the case started and waited for
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + usage.ru_utime + usage.ru_stime
+
+def run_case(task):
+    """
+    Runs one case `repeat` times and measures it. Executed in a fresh worker process.
+
+    :param task: Dictionary with the case name, dataset path and size, repeat count and trace_memory flag.
+    :return: Dict of measurements; times are in seconds and memory in bytes. 'stage_memory_bytes' is the peak
+             memory the timed stage added on top of its setup state: the growth of resident memory over the run
+             where the peak can be reset ('stage_memory_source' 'rss'), the tracemalloc peak otherwise.
+    """
+    kind, setup, run = CASES[task['case']]
+    # Import every benchmarked module up front, so the baseline below is the same for all cases
+    import compliance_audit, fairness_engine, historical_data_ingestion, pii_scanner  # noqa: F401
+    # Peak memory of the process before the case touches any data: interpreter, libraries and imports
+    import_rss = _peak_rss_bytes()
+    wall, cpu, traced, stage_rss = [], [], [], []
+    # The benchmarked code reports progress with print; keep it out of the benchmark output
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(task['repeat']):
+            state = setup(task['path'], task['rows'])
+            gc.collect()
+            # The peak is reset after setup, so it covers the run alone
+            rss_reset = _reset_peak_rss()
+            run_start_rss = _proc_status_bytes('VmRSS') if rss_reset else None
+            trace = task['trace_memory'] or not rss_reset
+            if trace:
+                tracemalloc.start()
+            cpu_start = _cpu_seconds()
+            wall_start = time.perf_counter()
+            run(state)
+            wall.append(time.perf_counter() - wall_start)
+            cpu.append(_cpu_seconds() - cpu_start)
+            if rss_reset:
+                stage_rss.append(_peak_rss_bytes() - run_start_rss)
+            if trace:
+                traced.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            del state
+    result = {
+        'case': task['case'],
+        'dataset': kind,
+        'rows': task['rows'],
+        'repeat': task['repeat'],
+        'wall_seconds': wall,
+        'wall_min': min(wall),
+        'wall_median': statistics.median(wall),
+        'cpu_median': statistics.median(cpu),
+        'rows_per_second': task['rows'] / statistics.median(wall) if statistics.median(wall) > 0 else None,
+        'import_rss_bytes': import_rss,
+        # High-water mark since the last reset, i.e. of the last run, its setup state included
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'peak_rss_increase_bytes': _peak_rss_bytes() - import_rss,
+        'stage_memory_bytes': max(stage_rss) if stage_rss else max(traced),
+        'stage_memory_source': 'rss' if stage_rss else 'tracemalloc',
+    }
+    if traced:
+        result['traced_peak_bytes'] = max(traced)
+    return result
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment_metadata():
+    """
+    :return: Dict describing the code and machine the results were measured on.
+    """
+    import sklearn
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def run_suite(rows=DEFAULT_ROWS, cases=None, seed=DEFAULT_SEED, repeat=DEFAULT_REPEAT, workspace=None,
+              trace_memory=False, verbose=True):
+    """
+    Runs the benchmark cases at each dataset size, each case in its own spawned process.
+
+    :param rows: Dataset sizes in rows.
+    :param cases: Names from CASES; all cases when omitted.
+    :param seed: Dataset seed.
+    :param repeat: Timed runs per case.
+    :param workspace: Directory holding the generated datasets; a 'data' directory next to this file when omitted.
+    :param trace_memory: Also record the peak Python allocation of each run with tracemalloc (slower).
+    :param verbose: Print each result as it completes.
+    :return: Dict with 'metadata' and the list of 'results'.
+    """
+    workspace = workspace or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    cases = list(CASES) if cases is None else cases
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases {unknown}. Expected names from {sorted(CASES)}.")
+
+    metadata = dict(environment_metadata(), seed=seed, repeat=repeat, trace_memory=trace_memory)
+    results = []
+    for size in rows:
+        for case in cases:
+            task = {'case': case, 'rows': size, 'repeat': repeat, 'trace_memory': trace_memory,
+                    'path': dataset_path(workspace, CASES[case][0], size, seed)}
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                result = pool.submit(run_case, task).result()
+            results.append(result)
+            if verbose:
+                print(f"{case:<28} {size:>12,} rows  {result['wall_median']:10.4f} s  "
+                      f"{result['cpu_median']:10.4f} s cpu  {result['stage_memory_bytes'] / 2**20:10.1f} MiB")
+    return {'metadata': metadata, 'results': results}
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two benchmark result sets case by case.
+
+    :param baseline: Result dict of the reference version (as written by run_suite).
+    :param current: Result dict of the version under test.
+    :param threshold: Relative increase of the median wall time or stage memory reported as a regression.
+    :return: DataFrame with one row per case and size present in both, with the ratios current / baseline
+             and a 'regression' flag. Memory is compared by stage memory when both sides measured it the same
+             way, and by peak resident memory for result files written before stage memory was recorded.
+    """
+    columns = ['case', 'rows', 'wall_median', 'peak_rss_bytes', 'stage_memory_bytes', 'stage_memory_source']
+    keys = ['case', 'rows']
+    merged = pd.DataFrame(baseline['results'], columns=columns).merge(
+        pd.DataFrame(current['results'], columns=columns), on=keys, suffixes=('_baseline', '_current'))
+    merged['wall_ratio'] = merged['wall_median_current'] / merged['wall_median_baseline']
+    comparable = (merged['stage_memory_source_baseline'] == merged['stage_memory_source_current']).to_numpy()
+    memory = {side: np.maximum(np.where(comparable, merged[f'stage_memory_bytes_{side}'],
+                                        merged[f'peak_rss_bytes_{side}']).astype(float), MEMORY_FLOOR_BYTES)
+              for side in ('baseline', 'current')}
+    merged['memory_ratio'] = memory['current'] / memory['baseline']
+    merged['regression'] = (merged['wall_ratio'] > 1 + threshold) | (merged['memory_ratio'] > 1 + threshold)
+    return merged
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the forensic pipelines on seeded synthetic data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help="Dataset sizes in rows.")
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help="Cases to run (default: all).")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Dataset seed.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Timed runs per case.")
+    parser.add_argument('--workspace', help="Directory for the generated datasets.")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks as well.")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results.")
+    parser.add_argument('--compare', help="Baseline JSON file to compare the results against.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown reported as a regression.")
+    args = parser.parse_args(argv)
+
+    suite = run_suite(args.rows, args.cases, args.seed, args.repeat, args.workspace, args.trace_memory)
+    with open(args.output, 'w') as output:
+        json.dump(suite, output, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            comparison = compare_results(json.load(baseline_file), suite, args.threshold)
+        print(comparison[['case', 'rows', 'wall_ratio', 'memory_ratio', 'regression']].to_string(index=False))
+        if comparison['regression'].any():
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# synthetic_data.py
+# Seeded synthetic datasets for the benchmark suite: timestamped event tables for the ingestion pipeline,
+# free-text tables with embedded PII for the compliance scans, and prediction/label/group tables for the
+# fairness checks. Rows are generated in fixed-size blocks, each drawn from its own generator seeded with
+# (seed, block number), so a dataset depends only on its kind, size and seed, any block can be produced
+# independently, and files of 100M rows are written without holding them in memory.
+
+import numpy as np
+import pandas as pd
+
+# Default seed of every dataset
+DEFAULT_SEED = 2024
+
+# Rows per generated block; part of the dataset definition, so changing it changes the data
+BLOCK_ROWS = 65_536
+
+# Start of the event and record timelines
+EPOCH = pd.Timestamp('2000-01-01')
+
+def _rng(seed, block):
+    return np.random.default_rng([seed, block])
+
+def event_block(rows, first_row, rng, value_columns=3, step='1s', missing_rate=0.001, duplicate_rate=0.001,
+                disorder_rate=0.001):
+    """
+    Timestamped numeric events, one every `step` with jitter, with a small share of missing values, exact
+    duplicate rows and out-of-order timestamps so the integrity checks have something to find.
+    """
+    step_ns = pd.Timedelta(step).value
+    positions = first_row + np.arange(rows, dtype=np.int64)
+    timestamps = EPOCH.value + positions * step_ns + rng.integers(0, step_ns, rows)
+    late = rng.random(rows) < disorder_rate
+    timestamps[late] -= rng.integers(1, 100, late.sum()) * step_ns
+    data = {'timestamp': pd.to_datetime(timestamps)}
+    for column in range(value_columns):
+        values = rng.normal(100.0 * (column + 1), 10.0 * (column + 1), rows).cumsum() / np.sqrt(positions + 1)
+        values[rng.random(rows) < missing_rate] = np.nan
+        data[f'value_{column}'] = values
+    data['event_type'] = rng.choice(np.array(['login', 'transfer', 'access', 'alert']), rows)
+    # Some rows repeat the row before them exactly
+    source = np.arange(rows)
+    duplicates = np.flatnonzero(rng.random(rows) < duplicate_rate)
+    duplicates = duplicates[duplicates > 0]
+    source[duplicates] = source[duplicates - 1]
+    return pd.DataFrame(data).take(source).reset_index(drop=True)
+
+def _card_numbers(rng, count):
+    """
+    Random 16-digit card numbers with a valid Luhn check digit.
+    """
+    digits = rng.integers(0, 10, (count, 15))
+    digits[:, 0] = 4
+    # Luhn: double every second digit from the right of the full number, i.e. from the last payload digit
+    weights = np.where(np.arange(15)[::-1] % 2 == 0, 2, 1)
+    products = digits * weights
+    total = (products - 9 * (products > 9)).sum(axis=1)
+    check = (10 - total % 10) % 10
+    number = (digits * 10 ** np.arange(15, 0, -1, dtype=np.int64)).sum(axis=1) + check
+    return pd.Series(number).astype(str).str.replace(r'(\d{4})(?=\d)', r'\1-', regex=True)
+
+def pii_text_block(rows, first_row, rng, pii_rate=0.01, span_years=10):
+    """
+    Case notes with PII (email, SSN, phone, card number, street address) embedded in a share of the rows,
+    plus a created_at column spread over span_years for the retention checks.
+    """
+    kinds = np.array(['none', 'email', 'ssn', 'phone_number', 'credit_card', 'address'])
+    weights = np.r_[1 - pii_rate, np.full(5, pii_rate / 5)]
+    kind = rng.choice(kinds, rows, p=weights)
+    ids = pd.Series(first_row + np.arange(rows)).astype(str)
+    notes = pd.Series('routine entry for case ' + ids, dtype=object)
+    fillers = {
+        'email': lambda n: 'contact agent' + pd.Series(rng.integers(0, 10**6, n)).astype(str) + '@example.org for details',
+        'ssn': lambda n: 'subject ssn ' + pd.Series(rng.integers(100, 666, n)).astype(str) + '-'
+                         + pd.Series(rng.integers(10, 99, n)).astype(str) + '-' + pd.Series(rng.integers(1000, 9999, n)).astype(str),
+        'phone_number': lambda n: 'call (' + pd.Series(rng.integers(200, 999, n)).astype(str) + ') '
+                                  + pd.Series(rng.integers(200, 999, n)).astype(str) + '-' + pd.Series(rng.integers(1000, 9999, n)).astype(str),
+        'credit_card': lambda n: 'paid with card ' + _card_numbers(rng, n),
+        'address': lambda n: 'seen near ' + pd.Series(rng.integers(1, 9999, n)).astype(str) + ' Harbor Street',
+    }
+    for name, fill in fillers.items():
+        where = np.flatnonzero(kind == name)
+        if len(where):
+            notes.iloc[where] = fill(len(where)).to_numpy()
+    span_ns = pd.Timedelta(days=365 * span_years).value
+    created_at = pd.to_datetime(EPOCH.value + rng.integers(0, span_ns, rows)).strftime('%Y-%m-%d %H:%M:%S')
+    return pd.DataFrame({'record_id': first_row + np.arange(rows), 'created_at': created_at,
+                         'notes': notes, 'amount': rng.gamma(2.0, 50.0, rows).round(2)})
+
+def prediction_block(rows, first_row, rng, base_rate=0.3, error_rate=0.15, bias=0.05):
+    """
+    Binary predictions and labels with gender, race and age-band attributes. Predictions are wrong at
+    error_rate and one group gets `bias` more positive predictions, so the fairness checks see a real gap.
+    """
+    gender = rng.choice(np.array(['F', 'M', 'X']), rows, p=[0.49, 0.49, 0.02])
+    race = rng.choice(np.array(['A', 'B', 'C', 'D', 'E']), rows, p=[0.4, 0.25, 0.2, 0.1, 0.05])
+    age_band = rng.choice(np.array(['<25', '25-44', '45-64', '65+']), rows)
+    label = (rng.random(rows) < base_rate).astype(np.int8)
+    flip = rng.random(rows) < error_rate
+    boost = (race == 'E') & (rng.random(rows) < bias)
+    prediction = np.where(flip, 1 - label, label) | boost
+    return pd.DataFrame({'prediction': prediction.astype(np.int8), 'label': label,
+                         'gender': gender, 'race': race, 'age_band': age_band})
+
+DATASETS = {
+    'events': event_block,
+    'pii_text': pii_text_block,
+    'predictions': prediction_block,
+}
+
+def generate(kind, rows, seed=DEFAULT_SEED, **options):
+    """
+    Yields the dataset in blocks of BLOCK_ROWS rows (the last one shorter).
+
+    :param kind: Name from DATASETS.
+    :param rows: Total number of rows.
+    :param seed: Dataset seed.
+    :param options: Keyword arguments of the block generator (rates, column counts, ...).
+    """
+    if kind not in DATASETS:
+        raise ValueError(f"Unknown dataset {kind!r}. Expected one of {sorted(DATASETS)}.")
+    block_generator = DATASETS[kind]
+    for block, first_row in enumerate(range(0, rows, BLOCK_ROWS)):
+        yield block_generator(min(BLOCK_ROWS, rows - first_row), first_row, _rng(seed, block), **options)
+
+def make_frame(kind, rows, seed=DEFAULT_SEED, **options):
+    """
+    Generates a whole dataset in memory.
+    """
+    return pd.concat(generate(kind, rows, seed, **options), ignore_index=True)
+
+def write_csv(kind, path, rows, seed=DEFAULT_SEED, **options):
+    """
+    Writes a dataset to a CSV file block by block, so memory use does not grow with the number of rows.
+
+    :return: The path written.
+    """
+    with open(path, 'w', newline='') as output:
+        for block, frame in enumerate(generate(kind, rows, seed, **options)):
+            frame.to_csv(output, header=block == 0, index=False)
+    return path
@@ -0,0 +1,69 @@
+# query_handler.py
+# This script turns investigators' free-text queries into search requests. Words are scored with BM25;
+# '+word' or a quoted "phrase" requires the word (every word of the phrase) in each result, and '-word'
+# excludes documents containing it (any word of a phrase). Results come with an extractive snippet when
+# document texts are given.
+
+import os
+import re
+import sys
+
+# The search engine and the summarizer are plain scripts in sibling directories, not packages
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(_ROOT, 'Search_Functionality'))
+sys.path.append(os.path.join(_ROOT, 'Summarization'))
+from document_summarizer import summarize
+
+# Query parts: an optional +/- operator followed by a quoted phrase or a word
+QUERY_PART_PATTERN = re.compile(r'([+-]?)(?:"([^"]*)"|(\S+))')
+
+# Sentences in a result snippet
+SNIPPET_SENTENCES = 2
+
+def parse_query(query):
+    """
+    Splits a query into scored text, required terms and excluded terms.
+
+    :return: Tuple (text, must, must_not).
+    """
+    text, must, must_not = [], [], []
+    for operator, phrase, word in QUERY_PART_PATTERN.findall(query):
+        part = phrase if phrase else word
+        if operator == '-':
+            must_not.append(part)
+            continue
+        text.append(part)
+        if operator == '+' or phrase:
+            must.append(part)
+    return ' '.join(text), must, must_not
+
+class QueryHandler:
+    """
+    Answers free-text queries with a SearchEngine.
+    """
+
+    def __init__(self, engine, documents=None):
+        """
+        Initializes the query handler.
+
+        :param engine: SearchEngine to query.
+        :param documents: Optional mapping of doc id to text (a dict or a Series) used for snippets.
+        """
+        self.engine = engine
+        self.documents = documents
+
+    def handle(self, query, k=10, rerank=False):
+        """
+        Runs a query.
+
+        :param query: Free-text query, e.g. 'wire transfer +offshore -"test account"'.
+        :param k: Number of results.
+        :param rerank: Rerank with the engine's vector index.
+        :return: DataFrame of results (doc_id, score, ...) with a 'snippet' column when documents were given.
+        """
+        text, must, must_not = parse_query(query)
+        results = self.engine.search(text, k, must=must, must_not=must_not, rerank=rerank)
+        if self.documents is not None:
+            results['snippet'] = [summarize(self.documents.get(doc_id, ''), SNIPPET_SENTENCES, text)
+                                  for doc_id in results['doc_id']]
+        return results
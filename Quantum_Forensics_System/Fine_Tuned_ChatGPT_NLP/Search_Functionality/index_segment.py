@@ -0,0 +1,258 @@
+# index_segment.py
+# Immutable segments of the full-text inverted index. A segment holds the postings of a batch of documents:
+# for every term, the ids of the documents containing it (ascending) and the term's frequency in each. Posting
+# lists are cut into blocks of BLOCK_SIZE postings; doc ids are gap-encoded within a block and both gaps and
+# frequencies are stored as variable-length integers (7 bits per byte), encoded and decoded with whole-array
+# numpy operations. Every block keeps its last doc id, highest frequency and shortest document length, which
+# lets the searcher bound a block's best possible score and skip blocks without decoding them. Segments are
+# saved as .npy files that load() memory-maps, and they are never modified: merging builds a new segment.
+
+import itertools
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Tokens longer than this are dropped (base64 blobs, hashes, OCR noise)
+MAX_TOKEN_LENGTH = 40
+
+# Tokens are runs of letters and digits, lowercased
+TOKEN_PATTERN = re.compile(r'(?<!\w)\w{1,%d}(?!\w)' % MAX_TOKEN_LENGTH)
+
+# Postings per compressed block
+BLOCK_SIZE = 128
+
+# Arrays a segment is made of
+SEGMENT_ARRAYS = ['terms', 'term_blocks', 'doc_freq', 'block_postings', 'block_last_doc', 'block_max_tf',
+                  'block_min_length', 'block_doc_bytes', 'block_tf_bytes', 'doc_gaps', 'term_freqs',
+                  'doc_lengths', 'doc_ids']
+
+def tokenize(text):
+    """
+    :return: List of the lowercased tokens of a text.
+    """
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+def encode_varints(values):
+    """
+    Encodes non-negative integers as variable-length integers, 7 bits per byte, low bits first, with the high
+    bit set on every byte but the last of a value.
+
+    :param values: Array of non-negative integers below 2**35.
+    :return: Tuple (encoded uint8 array, bytes used by each value).
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for bits in (7, 14, 21, 28):
+        lengths += values >= (1 << bits)
+    starts = np.cumsum(lengths) - lengths
+    encoded = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for byte in range(int(lengths.max()) if len(values) else 0):
+        present = lengths > byte
+        chunk = (values[present] >> np.uint64(7 * byte)) & np.uint64(0x7F)
+        more = (lengths[present] > byte + 1).astype(np.uint64) << np.uint64(7)
+        encoded[starts[present] + byte] = chunk | more
+    return encoded, lengths
+
+def decode_varints(encoded):
+    """
+    :return: int64 array of the values of a run of variable-length integers.
+    """
+    encoded = np.asarray(encoded, dtype=np.uint8)
+    if not len(encoded):
+        return np.empty(0, dtype=np.int64)
+    last = encoded < 0x80
+    starts = np.concatenate([[0], np.flatnonzero(last)[:-1] + 1])
+    position = np.arange(len(encoded)) - np.repeat(starts, np.diff(np.append(starts, len(encoded))))
+    shifted = (encoded & 0x7F).astype(np.int64) << (7 * position)
+    return np.add.reduceat(shifted, starts)
+
+class Segment:
+    """
+    One immutable segment of the inverted index.
+    """
+
+    def __init__(self, arrays, total_length):
+        """
+        :param arrays: Dict of the SEGMENT_ARRAYS.
+        :param total_length: Sum of the document lengths, in tokens.
+        """
+        self.arrays = arrays
+        self.total_length = total_length
+        for name in SEGMENT_ARRAYS:
+            setattr(self, name, arrays[name])
+        self.num_docs = len(self.doc_lengths)
+
+    @classmethod
+    def from_documents(cls, doc_ids, texts):
+        """
+        Builds a segment from documents.
+
+        :param doc_ids: Document ids (strings).
+        :param texts: Document texts.
+        :return: Segment.
+        """
+        tokens = [tokenize(text) for text in texts]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        codes, terms = pd.factorize(np.array(list(itertools.chain.from_iterable(tokens)), dtype=object), sort=True)
+        docs = np.repeat(np.arange(len(tokens), dtype=np.int64), lengths)
+        # One posting per (term, doc) pair, in term then doc order
+        pairs, counts = np.unique(codes.astype(np.int64) * max(len(tokens), 1) + docs, return_counts=True)
+        return cls.from_postings(np.asarray(terms, dtype=str), pairs // max(len(tokens), 1),
+                                 pairs % max(len(tokens), 1), counts, lengths, doc_ids)
+
+    @classmethod
+    def from_postings(cls, terms, term_codes, docs, term_freqs, doc_lengths, doc_ids):
+        """
+        Builds a segment from postings sorted by (term, doc).
+
+        :param terms: Sorted vocabulary.
+        :param term_codes: Vocabulary position of each posting's term.
+        :param docs: Segment-local doc id of each posting.
+        :param term_freqs: Frequency of the term in the doc.
+        :param doc_lengths: Length of every document, in tokens.
+        :param doc_ids: External id of every document.
+        """
+        doc_freq = np.bincount(term_codes, minlength=len(terms)).astype(np.int64)
+        term_starts = np.cumsum(doc_freq) - doc_freq
+        rank = np.arange(len(docs)) - np.repeat(term_starts, doc_freq)
+        blocks_per_term = (doc_freq + BLOCK_SIZE - 1) // BLOCK_SIZE
+        term_blocks = np.concatenate([[0], np.cumsum(blocks_per_term)]).astype(np.int64)
+        block = term_blocks[term_codes] + rank // BLOCK_SIZE
+        first_in_block = rank % BLOCK_SIZE == 0
+
+        num_blocks = int(term_blocks[-1])
+        block_counts = np.bincount(block, minlength=num_blocks)
+        block_postings = np.concatenate([[0], np.cumsum(block_counts)]).astype(np.int64)
+        block_last_doc = docs[block_postings[1:] - 1] if num_blocks else np.empty(0, dtype=np.int64)
+        # Gaps restart at every block, from the last doc of the term's previous block (0 for its first block)
+        previous = np.concatenate([[0], docs[:-1]])
+        first_block_of_term = np.zeros(num_blocks, dtype=bool)
+        first_block_of_term[term_blocks[:-1][doc_freq > 0]] = True
+        base = np.where(first_block_of_term, 0, np.concatenate([[0], block_last_doc[:-1]]))
+        gaps = np.where(first_in_block, docs - base[block], docs - previous)
+
+        doc_gaps, gap_bytes = encode_varints(gaps)
+        term_freq_bytes, freq_bytes = encode_varints(term_freqs)
+        doc_lengths = np.asarray(doc_lengths, dtype=np.int64)
+        arrays = {
+            'terms': np.asarray(terms, dtype=str),
+            'term_blocks': term_blocks,
+            'doc_freq': doc_freq,
+            'block_postings': block_postings,
+            'block_last_doc': block_last_doc.astype(np.int64),
+            'block_max_tf': np.maximum.reduceat(term_freqs, block_postings[:-1]) if num_blocks else np.empty(0, dtype=np.int64),
+            'block_min_length': np.minimum.reduceat(doc_lengths[docs], block_postings[:-1]) if num_blocks else np.empty(0, dtype=np.int64),
+            'block_doc_bytes': np.concatenate([[0], np.cumsum(np.bincount(block, weights=gap_bytes, minlength=num_blocks))]).astype(np.int64),
+            'block_tf_bytes': np.concatenate([[0], np.cumsum(np.bincount(block, weights=freq_bytes, minlength=num_blocks))]).astype(np.int64),
+            'doc_gaps': doc_gaps,
+            'term_freqs': term_freq_bytes,
+            'doc_lengths': doc_lengths,
+            'doc_ids': np.asarray(doc_ids, dtype=str),
+        }
+        return cls(arrays, int(doc_lengths.sum()))
+
+    def term_index(self, term):
+        """
+        :return: Vocabulary position of a term, or -1 when the segment does not contain it.
+        """
+        position = int(np.searchsorted(self.terms, term))
+        return position if position < len(self.terms) and self.terms[position] == term else -1
+
+    def decode_blocks(self, blocks):
+        """
+        Decodes postings blocks.
+
+        :param blocks: Ascending ids of blocks, all of one term.
+        :return: Tuple (docs, term_freqs) of the blocks' postings, in doc order.
+        """
+        blocks = np.asarray(blocks, dtype=np.int64)
+        counts = self.block_postings[blocks + 1] - self.block_postings[blocks]
+        gaps = decode_varints(self._gather(self.doc_gaps, self.block_doc_bytes, blocks))
+        term_freqs = decode_varints(self._gather(self.term_freqs, self.block_tf_bytes, blocks))
+        # Turn the gaps back into doc ids: the first gap of a block is relative to the block's base
+        first = np.cumsum(counts) - counts
+        term_first_block = np.searchsorted(self.term_blocks, blocks, side='right') - 1
+        is_first = blocks == self.term_blocks[term_first_block]
+        bases = np.where(is_first, 0, self.block_last_doc[np.maximum(blocks - 1, 0)])
+        totals = np.cumsum(gaps)
+        offsets = np.repeat(bases - (totals[first] - gaps[first]), counts)
+        return totals + offsets, term_freqs
+
+    @staticmethod
+    def _gather(encoded, offsets, blocks):
+        starts, ends = offsets[blocks], offsets[blocks + 1]
+        if len(blocks) and np.all(starts[1:] == ends[:-1]):
+            return encoded[starts[0]:ends[-1]]
+        return np.concatenate([encoded[start:end] for start, end in zip(starts, ends)])
+
+    def postings(self, term_position):
+        """
+        :return: Tuple (docs, term_freqs) of a term's whole posting list.
+        """
+        blocks = np.arange(self.term_blocks[term_position], self.term_blocks[term_position + 1])
+        return self.decode_blocks(blocks)
+
+    def all_postings(self):
+        """
+        Decodes every posting of the segment, for merging.
+
+        :return: Tuple (term_codes, docs, term_freqs) sorted by (term, doc).
+        """
+        counts = self.block_postings[1:] - self.block_postings[:-1]
+        gaps = decode_varints(self.doc_gaps)
+        term_freqs = decode_varints(self.term_freqs)
+        term_codes = np.repeat(np.arange(len(self.terms)), self.doc_freq)
+        first_block = np.zeros(len(counts), dtype=bool)
+        first_block[self.term_blocks[:-1][self.doc_freq > 0]] = True
+        bases = np.where(first_block, 0, np.concatenate([[0], self.block_last_doc[:-1]]))
+        first = self.block_postings[:-1]
+        totals = np.cumsum(gaps)
+        offsets = np.repeat(bases - (totals[first] - gaps[first]), counts) if len(counts) else 0
+        return term_codes, totals + offsets, term_freqs
+
+    @classmethod
+    def merge(cls, segments):
+        """
+        Merges segments into one, appending their documents in order.
+
+        :return: Segment.
+        """
+        vocabulary = np.unique(np.concatenate([segment.terms for segment in segments]))
+        term_codes, docs, term_freqs, offset = [], [], [], 0
+        for segment in segments:
+            codes, segment_docs, segment_freqs = segment.all_postings()
+            term_codes.append(np.searchsorted(vocabulary, segment.terms)[codes])
+            docs.append(segment_docs + offset)
+            term_freqs.append(segment_freqs)
+            offset += segment.num_docs
+        term_codes, docs, term_freqs = np.concatenate(term_codes), np.concatenate(docs), np.concatenate(term_freqs)
+        # Each segment's postings are in (term, doc) order and later segments have higher doc ids, so a stable
+        # sort on the term alone restores (term, doc) order
+        order = np.argsort(term_codes, kind='stable')
+        return cls.from_postings(vocabulary, term_codes[order], docs[order], term_freqs[order],
+                                 np.concatenate([segment.doc_lengths for segment in segments]),
+                                 np.concatenate([segment.doc_ids for segment in segments]))
+
+    def save(self, path):
+        """
+        Saves the segment as a directory of .npy files that load() can memory-map.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in SEGMENT_ARRAYS:
+            np.save(os.path.join(path, f'{name}.npy'), self.arrays[name])
+        with open(os.path.join(path, 'segment.json'), 'w') as manifest:
+            json.dump({'num_docs': self.num_docs, 'total_length': self.total_length}, manifest)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Opens a saved segment, memory-mapped so only the blocks a query touches are read.
+        """
+        with open(os.path.join(path, 'segment.json')) as manifest:
+            manifest = json.load(manifest)
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                  for name in SEGMENT_ARRAYS}
+        return cls(arrays, manifest['total_length'])
@@ -0,0 +1,392 @@
+# nlp_search.py
+# Local full-text search over case documents and OCR output. Documents are indexed into immutable segments
+# (index_segment) and ranked with BM25 using collection-wide statistics. Top-k retrieval terminates early in
+# the MaxScore manner: query terms are scored from the highest to the lowest score bound, and once the bounds
+# of the terms left cannot lift a new document into the top k, only the documents already in contention are
+# scored further, decoding just the posting blocks that contain them and whose block bound can still matter.
+# New documents are buffered and flushed as new segments; a background thread merges small segments so the
+# number of segments a query visits stays logarithmic in the index size. Repeated queries are answered from an
+# LRU cache that is invalidated whenever new documents are flushed. Optionally, a local vector index
+# (vector_index) reranks the candidates by embedding similarity. Nothing here needs a network service.
+
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from index_segment import Segment, tokenize
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Buffered documents that trigger a flush into a new segment
+FLUSH_DOCUMENTS = 50_000
+
+# Segments of one size tier merged together
+MERGE_FACTOR = 8
+
+# Queries kept in the result cache
+QUERY_CACHE_SIZE = 1024
+
+# BM25 candidates passed to the vector reranker, per requested result
+RERANK_CANDIDATES_PER_RESULT = 5
+
+class QueryCache:
+    """
+    LRU cache of query results, keyed by the index generation they were computed on.
+    """
+
+    def __init__(self, capacity=QUERY_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+class SearchEngine:
+    """
+    BM25 search over a list of immutable segments plus a buffer of documents not flushed yet. Buffered
+    documents are searchable only after flush().
+    """
+
+    def __init__(self, directory=None, flush_documents=FLUSH_DOCUMENTS, merge_factor=MERGE_FACTOR,
+                 background_merge=True, vector_index=None, cache_size=QUERY_CACHE_SIZE):
+        """
+        Opens the index stored in a directory, or an in-memory index.
+
+        :param directory: Directory of the saved segments; segments are only kept in memory when omitted.
+        :param flush_documents: Buffered documents that trigger a flush.
+        :param merge_factor: Number of segments of similar size merged together.
+        :param background_merge: Merge on a background thread; merges run inside flush() when False.
+        :param vector_index: Optional VectorIndex the added documents are also embedded into, for reranking.
+        :param cache_size: Capacity of the query result cache.
+        """
+        self.directory = directory
+        self.flush_documents = flush_documents
+        self.merge_factor = merge_factor
+        self.background_merge = background_merge
+        self.vector_index = vector_index
+        self.cache = QueryCache(cache_size)
+        self.segments = []
+        self._names = []
+        self._next_segment = 0
+        self._buffer_ids, self._buffer_texts = [], []
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._merge_requested = threading.Event()
+        self._closed = threading.Event()
+        self._merger = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            manifest_path = os.path.join(directory, 'index.json')
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as manifest:
+                    manifest = json.load(manifest)
+                self._names = manifest['segments']
+                self._next_segment = manifest['next_segment']
+                self.segments = [Segment.load(os.path.join(directory, name)) for name in self._names]
+
+    @property
+    def num_docs(self):
+        return sum(segment.num_docs for segment in self.segments)
+
+    def add_documents(self, doc_ids, texts):
+        """
+        Buffers documents for indexing, flushing them into a new segment when the buffer is full.
+
+        :param doc_ids: Document ids; ids are expected to be unique across the index.
+        :param texts: Document texts.
+        """
+        self._buffer_ids.extend(str(doc_id) for doc_id in doc_ids)
+        self._buffer_texts.extend(texts)
+        if len(self._buffer_ids) >= self.flush_documents:
+            self.flush()
+
+    def add_frame(self, documents, id_column='doc_id', text_column='text'):
+        """
+        Buffers the documents of a DataFrame, e.g. the results of the OCR pipeline.
+        """
+        self.add_documents(documents[id_column].tolist(), documents[text_column].fillna('').tolist())
+
+    def flush(self):
+        """
+        Indexes the buffered documents into a new segment and makes them searchable.
+        """
+        if not self._buffer_ids:
+            return
+        doc_ids, texts = self._buffer_ids, self._buffer_texts
+        self._buffer_ids, self._buffer_texts = [], []
+        segment = Segment.from_documents(doc_ids, texts)
+        if self.vector_index is not None:
+            self.vector_index.add(doc_ids, texts)
+        name = self._store(segment)
+        with self._lock:
+            self.segments = self.segments + [segment]
+            self._names = self._names + [name]
+            self._save_manifest()
+            self._generation += 1
+        self.cache.clear()
+        self._request_merge()
+
+    def _store(self, segment):
+        """
+        Names a new segment and saves it when the index has a directory.
+
+        :return: The segment's name.
+        """
+        with self._lock:
+            name = f'segment_{self._next_segment:06d}'
+            self._next_segment += 1
+        if self.directory is not None:
+            segment.save(os.path.join(self.directory, name))
+        return name
+
+    def _save_manifest(self):
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, 'index.json')
+        with open(path + '.tmp', 'w') as manifest:
+            json.dump({'segments': self._names, 'next_segment': self._next_segment}, manifest)
+        os.replace(path + '.tmp', path)
+
+    def _merge_candidates(self, segments):
+        """
+        Tiered merge policy: segments are bucketed by the order of magnitude (base merge_factor) of their
+        document counts, and merge_factor segments of the smallest full tier are merged.
+
+        :return: Positions of the segments to merge, or None.
+        """
+        tiers = {}
+        for position, segment in enumerate(segments):
+            tier = int(np.log(max(segment.num_docs, 1)) / np.log(self.merge_factor))
+            tiers.setdefault(tier, []).append(position)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= self.merge_factor:
+                return tiers[tier][:self.merge_factor]
+        return None
+
+    def merge_once(self):
+        """
+        Runs one merge if the policy asks for it. Searches keep using the old segments until the merged one
+        replaces them.
+
+        :return: True when segments were merged.
+        """
+        with self._lock:
+            segments = self.segments
+            positions = self._merge_candidates(segments)
+        if positions is None:
+            return False
+        merged = Segment.merge([segments[position] for position in positions])
+        name = self._store(merged)
+        with self._lock:
+            # Only merges remove segments and they run one at a time, so the merged ones are still in place
+            replaced = {self._names[position] for position in positions}
+            # The merged segment takes the place of the first segment it replaces
+            kept = [position for position in range(len(self.segments))
+                    if position == positions[0] or position not in positions]
+            self.segments = [merged if position == positions[0] else self.segments[position] for position in kept]
+            self._names = [name if position == positions[0] else self._names[position] for position in kept]
+            self._save_manifest()
+        if self.directory is not None:
+            # Open memory maps of the old files stay valid after the files are removed
+            for old in replaced:
+                shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+        return True
+
+    def _request_merge(self):
+        if not self.background_merge:
+            while self.merge_once():
+                pass
+            return
+        if self._merger is None:
+            self._merger = threading.Thread(target=self._merge_loop, name='segment-merger', daemon=True)
+            self._merger.start()
+        self._merge_requested.set()
+
+    def _merge_loop(self):
+        while not self._closed.is_set():
+            self._merge_requested.wait()
+            self._merge_requested.clear()
+            while not self._closed.is_set() and self.merge_once():
+                pass
+
+    def close(self):
+        """
+        Flushes the buffer and stops the merge thread once its current merge is done.
+        """
+        self.flush()
+        self._closed.set()
+        self._merge_requested.set()
+        if self._merger is not None:
+            self._merger.join()
+            self._merger = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _collection_statistics(self, segments, terms):
+        num_docs = sum(segment.num_docs for segment in segments)
+        total_length = sum(segment.total_length for segment in segments)
+        positions = [[segment.term_index(term) for term in terms] for segment in segments]
+        doc_freq = np.zeros(len(terms))
+        for segment, segment_positions in zip(segments, positions):
+            for index, position in enumerate(segment_positions):
+                if position >= 0:
+                    doc_freq[index] += segment.doc_freq[position]
+        idf = np.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        return positions, idf, total_length / max(num_docs, 1)
+
+    @staticmethod
+    def _tf_weight(term_freqs, lengths, average_length):
+        return term_freqs * (BM25_K1 + 1) / (term_freqs + BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length))
+
+    def _search_segment(self, segment, positions, idf, average_length, k, threshold, allowed):
+        """
+        Scores one segment with MaxScore early termination.
+
+        :param threshold: Score the k-th result already reached in earlier segments.
+        :param allowed: Boolean mask of the segment's docs that may be returned, or None.
+        :return: Tuple (docs, scores) of the segment's best k docs.
+        """
+        terms = [(position, weight) for position, weight in zip(positions, idf) if position >= 0]
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Upper bound of each term's contribution, from its blocks' highest frequency and shortest document
+        bounds = []
+        for position, weight in terms:
+            blocks = slice(segment.term_blocks[position], segment.term_blocks[position + 1])
+            block_bounds = weight * self._tf_weight(segment.block_max_tf[blocks], segment.block_min_length[blocks], average_length)
+            bounds.append((block_bounds.max(), block_bounds))
+        order = np.argsort([-bound for bound, _ in bounds])
+        remaining = np.cumsum([bounds[index][0] for index in order][::-1])[::-1]
+
+        scores = np.zeros(segment.num_docs)
+        contention = np.zeros(segment.num_docs, dtype=bool)
+        for step, index in enumerate(order):
+            position, weight = terms[index]
+            first_block, last_block = segment.term_blocks[position], segment.term_blocks[position + 1]
+            pruning = remaining[step] <= threshold
+            if pruning:
+                # No document without a score yet can reach the top k; only those in contention are scored
+                candidates = np.flatnonzero(scores + remaining[step] > threshold)
+                if not len(candidates):
+                    break
+                block_last = segment.block_last_doc[first_block:last_block]
+                block = np.searchsorted(block_last, candidates)
+                inside = block < len(block_last)
+                hit, first = np.unique(block[inside], return_index=True)
+                if not len(hit):
+                    continue
+                # A block whose bound cannot lift its best candidate over the threshold is not decoded
+                best = np.maximum.reduceat(scores[candidates[inside]], first)
+                rest = remaining[step + 1] if step + 1 < len(remaining) else 0.0
+                hit = hit[best + bounds[index][1][hit] + rest > threshold]
+                if not len(hit):
+                    continue
+                blocks = first_block + hit
+                contention[:] = False
+                contention[candidates] = True
+            else:
+                blocks = np.arange(first_block, last_block)
+            docs, term_freqs = segment.decode_blocks(blocks)
+            if pruning:
+                keep = contention[docs]
+                docs, term_freqs = docs[keep], term_freqs[keep]
+            contribution = weight * self._tf_weight(term_freqs, segment.doc_lengths[docs], average_length)
+            if allowed is not None:
+                contribution = contribution * allowed[docs]
+            scores[docs] += contribution
+            if segment.num_docs >= k:
+                threshold = max(threshold, np.partition(scores, -k)[-k])
+        top = np.flatnonzero(scores > 0)
+        if len(top) > k:
+            top = top[np.argpartition(scores[top], -k)[-k:]]
+        return top, scores[top]
+
+    def _allowed(self, segment, must, must_not):
+        if not must and not must_not:
+            return None
+        allowed = np.ones(segment.num_docs, dtype=bool)
+        for term in must:
+            position = segment.term_index(term)
+            present = np.zeros(segment.num_docs, dtype=bool)
+            if position >= 0:
+                present[segment.postings(position)[0]] = True
+            allowed &= present
+        for term in must_not:
+            position = segment.term_index(term)
+            if position >= 0:
+                allowed[segment.postings(position)[0]] = False
+        return allowed
+
+    def search(self, query, k=10, must=None, must_not=None, rerank=False):
+        """
+        Finds the k documents that best match a query.
+
+        :param query: Query text; its tokens are scored with BM25 (any of them may match).
+        :param k: Number of results.
+        :param must: Terms every result must contain.
+        :param must_not: Terms no result may contain.
+        :param rerank: Rerank the BM25 candidates with the vector index (see VectorIndex.rerank).
+        :return: DataFrame with columns doc_id and score, best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        must = [token for term in must or [] for token in tokenize(term)]
+        must_not = [token for term in must_not or [] for token in tokenize(term)]
+        # Merging does not change any score, so only flushes start a new generation of cached results
+        with self._lock:
+            segments, generation = self.segments, self._generation
+        key = (generation, tuple(terms), k, tuple(must), tuple(must_not), bool(rerank))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.copy()
+
+        candidates = k * RERANK_CANDIDATES_PER_RESULT if rerank and self.vector_index is not None else k
+        positions, idf, average_length = self._collection_statistics(segments, terms)
+        doc_ids, scores, threshold = [], [], 0.0
+        for segment, segment_positions in zip(segments, positions):
+            allowed = self._allowed(segment, must, must_not)
+            docs, segment_scores = self._search_segment(segment, segment_positions, idf, average_length,
+                                                        candidates, threshold, allowed)
+            doc_ids.append(segment.doc_ids[docs])
+            scores.append(segment_scores)
+            merged = np.concatenate(scores)
+            if len(merged) >= candidates:
+                threshold = max(threshold, np.partition(merged, -candidates)[-candidates])
+        results = pd.DataFrame({'doc_id': np.concatenate(doc_ids) if doc_ids else np.empty(0, dtype=str),
+                                'score': np.concatenate(scores) if scores else np.empty(0)})
+        results = results.sort_values(['score', 'doc_id'], ascending=[False, True], kind='stable').head(candidates)
+        if rerank and self.vector_index is not None:
+            results = self.vector_index.rerank(query, results, k)
+        results = results.head(k).reset_index(drop=True)
+        self.cache.put(key, results)
+        return results.copy()
@@ -0,0 +1,216 @@
+# vector_index.py
+# Offline vector index for reranking search results. Documents are embedded by a pluggable local embedding
+# function (by default a feature-hashing embedding, which needs no model files and no fitting, so documents can
+# be added at any time). Approximate nearest neighbors are found with random-hyperplane signatures: every
+# vector is reduced to SIGNATURE_BITS sign bits, candidates are the vectors with the smallest Hamming distance
+# to the query's signature (one XOR and popcount per document), and only that shortlist is compared exactly.
+# Documents are stored in segments, one per add(), so adding documents only writes the new segment.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from index_segment import tokenize
+
+# Dimensions of the default hashing embedding
+EMBEDDING_DIMENSIONS = 256
+
+# Sign bits of the approximate nearest-neighbor signatures (one uint64 per document)
+SIGNATURE_BITS = 64
+
+# Seed of the random hyperplanes, fixed so saved signatures stay comparable
+SIGNATURE_SEED = 1729
+
+# Candidates compared exactly per requested neighbor
+SHORTLIST_FACTOR = 10
+
+# Weight of the embedding similarity against the normalized BM25 score when reranking
+RERANK_WEIGHT = 0.3
+
+_HASHING = HashingVectorizer(n_features=EMBEDDING_DIMENSIONS, tokenizer=tokenize, token_pattern=None,
+                             lowercase=False, alternate_sign=True, norm='l2')
+
+def hashing_embedder(texts):
+    """
+    Default embedding: L2-normalized signed feature hashing of the document tokens.
+
+    :return: float32 array of shape (len(texts), EMBEDDING_DIMENSIONS).
+    """
+    return _HASHING.transform(texts).toarray().astype(np.float32)
+
+class VectorSegment:
+    """
+    Immutable block of embedded documents: ids, normalized vectors and signatures, saved as .npy files that
+    load() memory-maps.
+    """
+
+    def __init__(self, doc_ids, vectors, signatures):
+        self.doc_ids = doc_ids
+        self.vectors = vectors
+        self.signatures = signatures
+        self._positions = None
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def positions(self, doc_ids):
+        """
+        :return: Positions of documents in the segment, -1 for documents not in it.
+        """
+        if self._positions is None:
+            self._positions = pd.Index(self.doc_ids)
+        return self._positions.get_indexer(pd.Index(doc_ids))
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name, values in (('doc_ids', self.doc_ids), ('vectors', self.vectors), ('signatures', self.signatures)):
+            np.save(os.path.join(path, f'{name}.npy'), values)
+
+    @classmethod
+    def load(cls, path):
+        return cls(*(np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                     for name in ('doc_ids', 'vectors', 'signatures')))
+
+class VectorIndex:
+    """
+    Embeddings of the indexed documents with Hamming-ranked signatures for approximate search. Every add() is
+    one new segment, saved on its own like the segments of the inverted index, so adding documents never
+    rewrites or reads back the vectors already stored; queries scan the signatures of all segments.
+    """
+
+    def __init__(self, embed=hashing_embedder, directory=None):
+        """
+        :param embed: Local embedding function, texts -> 2-D float array.
+        :param directory: Directory the index is saved to and loaded from; kept in memory only when omitted.
+        """
+        self.embed = embed
+        self.directory = directory
+        self.segments = []
+        self._names = []
+        self._hyperplanes = None
+        manifest_path = os.path.join(directory, 'vectors.json') if directory is not None else None
+        if manifest_path is not None and os.path.exists(manifest_path):
+            with open(manifest_path) as manifest:
+                manifest = json.load(manifest)
+            self._names = manifest['segments']
+            self.segments = [VectorSegment.load(os.path.join(directory, name)) for name in self._names]
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments)
+
+    def _signatures(self, vectors):
+        if self._hyperplanes is None:
+            rng = np.random.default_rng(SIGNATURE_SEED)
+            self._hyperplanes = rng.standard_normal((vectors.shape[1], SIGNATURE_BITS)).astype(np.float32)
+        bits = (vectors @ self._hyperplanes) > 0
+        return np.packbits(bits, axis=1, bitorder='little').view(np.uint64).ravel()
+
+    def _normalized(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def add(self, doc_ids, texts):
+        """
+        Embeds documents into a new segment, and saves that segment and the manifest when the index has a
+        directory.
+        """
+        if not len(doc_ids):
+            return
+        vectors = self._normalized(self.embed(list(texts)))
+        segment = VectorSegment(np.asarray(doc_ids, dtype=str), vectors, self._signatures(vectors))
+        name = f'vectors_{len(self._names):06d}'
+        if self.directory is not None:
+            segment.save(os.path.join(self.directory, name))
+        self.segments = self.segments + [segment]
+        self._names = self._names + [name]
+        if self.directory is not None:
+            self._save_manifest(self.directory)
+
+    def _locate(self, positions):
+        """
+        :return: Tuple (segments, local positions) of positions in the concatenation of all segments.
+        """
+        starts = np.cumsum([0] + [len(segment) for segment in self.segments])
+        owners = np.searchsorted(starts, positions, side='right') - 1
+        return owners, positions - starts[owners]
+
+    def nearest(self, query, k=10):
+        """
+        Approximate nearest neighbors of a query text.
+
+        :return: DataFrame with columns doc_id and similarity (cosine), most similar first.
+        """
+        if not len(self):
+            return pd.DataFrame({'doc_id': np.empty(0, dtype=str), 'similarity': np.empty(0, dtype=np.float32)})
+        query_vector = self._normalized(self.embed([query]))
+        query_signature = self._signatures(query_vector)[0]
+        distances = np.concatenate([np.bitwise_count(segment.signatures ^ query_signature) for segment in self.segments])
+        shortlist = min(k * SHORTLIST_FACTOR, len(distances))
+        owners, local = self._locate(np.argpartition(distances, shortlist - 1)[:shortlist])
+        similarity = np.empty(shortlist, dtype=np.float32)
+        doc_ids = np.empty(shortlist, dtype=object)
+        for owner in np.unique(owners):
+            mine = owners == owner
+            segment = self.segments[owner]
+            similarity[mine] = segment.vectors[local[mine]] @ query_vector[0]
+            doc_ids[mine] = segment.doc_ids[local[mine]]
+        best = np.argsort(-similarity, kind='stable')[:k]
+        return pd.DataFrame({'doc_id': doc_ids[best].astype(str), 'similarity': similarity[best]})
+
+    def similarity(self, query, doc_ids):
+        """
+        :return: Exact cosine similarity of the query to each document (NaN for documents not indexed).
+        """
+        doc_ids = np.asarray(doc_ids, dtype=str)
+        query_vector = self._normalized(self.embed([query]))[0]
+        similarity = np.full(len(doc_ids), np.nan, dtype=np.float32)
+        for segment in self.segments:
+            positions = segment.positions(doc_ids)
+            found = positions >= 0
+            if found.any():
+                similarity[found] = segment.vectors[positions[found]] @ query_vector
+        return similarity
+
+    def rerank(self, query, results, k=10, weight=RERANK_WEIGHT):
+        """
+        Reranks BM25 results together with the query's approximate nearest neighbors, by a weighted sum of the
+        BM25 score (scaled to the best result) and the embedding similarity.
+
+        :param results: DataFrame with columns doc_id and score.
+        :return: DataFrame with columns doc_id, score (the combined score), bm25 and similarity, best first.
+        """
+        neighbors = self.nearest(query, k)
+        candidates = pd.concat([results[['doc_id', 'score']].rename(columns={'score': 'bm25'}),
+                                neighbors[['doc_id']]], ignore_index=True).drop_duplicates('doc_id')
+        candidates['bm25'] = candidates['bm25'].fillna(0.0)
+        candidates['similarity'] = self.similarity(query, candidates['doc_id'].to_numpy())
+        best = candidates['bm25'].max()
+        scaled = candidates['bm25'] / best if best > 0 else candidates['bm25']
+        candidates['score'] = (1 - weight) * scaled + weight * candidates['similarity'].fillna(0.0)
+        candidates = candidates.sort_values(['score', 'doc_id'], ascending=[False, True], kind='stable')
+        return candidates[['doc_id', 'score', 'bm25', 'similarity']].head(k).reset_index(drop=True)
+
+    def _save_manifest(self, directory):
+        path = os.path.join(directory, 'vectors.json')
+        with open(path + '.tmp', 'w') as manifest:
+            json.dump({'segments': self._names, 'documents': len(self), 'signature_bits': SIGNATURE_BITS}, manifest)
+        os.replace(path + '.tmp', path)
+
+    def save(self, directory):
+        """
+        Saves every segment as .npy files that the constructor memory-maps, and the manifest listing them.
+        """
+        if self.directory is not None and os.path.abspath(directory) == os.path.abspath(self.directory):
+            # Every segment was saved there when it was added, and may be memory-mapped from there
+            self._save_manifest(directory)
+            return
+        os.makedirs(directory, exist_ok=True)
+        names = [f'vectors_{position:06d}' for position in range(len(self.segments))]
+        for name, segment in zip(names, self.segments):
+            segment.save(os.path.join(directory, name))
+        self._names = names
+        self._save_manifest(directory)
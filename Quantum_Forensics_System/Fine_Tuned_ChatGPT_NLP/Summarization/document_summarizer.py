@@ -0,0 +1,52 @@
+# document_summarizer.py
+# This script builds extractive summaries of case documents and OCR output. Sentences are scored by the
+# document frequency of their tokens, normalized by sentence length, with a boost for query terms, and the
+# best sentences are returned in their original order. It is used for the result snippets of the search.
+
+import os
+import re
+import sys
+from collections import Counter
+
+# The tokenizer is shared with the search index, a plain script in Search_Functionality, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Search_Functionality')))
+from index_segment import tokenize
+
+# Sentence boundaries: end punctuation followed by whitespace, or blank lines
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+# Tokens too common to say anything about a sentence
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have he her his i in is it its of on or she that the their them '
+    'they this to was were which will with you'.split())
+
+# Score multiplier of query terms
+QUERY_TERM_BOOST = 3.0
+
+def split_sentences(text):
+    """
+    :return: List of the non-empty sentences of a text.
+    """
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.split(text or '') if sentence and sentence.strip()]
+
+def summarize(text, max_sentences=3, query=None):
+    """
+    Summarizes a document with its most informative sentences.
+
+    :param text: Document text.
+    :param max_sentences: Number of sentences kept.
+    :param query: Optional query whose terms make sentences more relevant.
+    :return: Summary text.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return ' '.join(sentences)
+    tokens = [[token for token in tokenize(sentence) if token not in STOPWORDS] for sentence in sentences]
+    frequencies = Counter(token for sentence in tokens for token in sentence)
+    query_terms = set(tokenize(query)) if query else set()
+    scores = []
+    for position, sentence in enumerate(tokens):
+        weight = sum(frequencies[token] * (QUERY_TERM_BOOST if token in query_terms else 1.0) for token in sentence)
+        scores.append((weight / (len(sentence) + 1), -position))
+    best = sorted(range(len(sentences)), key=lambda position: scores[position], reverse=True)[:max_sentences]
+    return ' '.join(sentences[position] for position in sorted(best))
@@ -0,0 +1,117 @@
+# graph_updater.py
+# This script applies incremental edge batches to a knowledge graph without rebuilding it on every batch. New
+# edges are interned into the graph's id space and appended to a delta buffer; queries see the base CSR graph
+# plus a small CSR graph of the buffered edges, and once the buffer outgrows its threshold it is compacted
+# into a new base graph with one sort of the combined edges.
+
+import os
+import sys
+
+import numpy as np
+
+# The graph store is a plain script in Knowledge_Graph_Engine/Relationship_Mapping, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Relationship_Mapping')))
+from csr_graph import CSRGraph, edge_arrays
+
+# Buffered edges that trigger a compaction, as an absolute floor and as a fraction of the base graph
+DEFAULT_COMPACT_EDGES = 100_000
+DEFAULT_COMPACT_FRACTION = 0.05
+
+class GraphUpdater:
+    """
+    A knowledge graph that accepts edge batches: a base CSRGraph plus a delta buffer compacted periodically.
+    """
+
+    def __init__(self, graph, compact_edges=DEFAULT_COMPACT_EDGES, compact_fraction=DEFAULT_COMPACT_FRACTION):
+        """
+        Initializes the graph updater.
+
+        :param graph: Base CSRGraph; its interners are extended by the batches.
+        :param compact_edges: Buffered edges always allowed before compacting.
+        :param compact_fraction: Buffered edges allowed before compacting, as a fraction of the base graph's
+                                 edges, so large graphs are not re-sorted for every few thousand edges.
+        """
+        self.graph = graph
+        self.compact_edges = compact_edges
+        self.compact_fraction = compact_fraction
+        self._pending = []
+        self._delta = None
+
+    @property
+    def entities(self):
+        return self.graph.entities
+
+    @property
+    def edge_types(self):
+        return self.graph.edge_types
+
+    @property
+    def pending_edges(self):
+        return sum(len(batch[0]) for batch in self._pending)
+
+    @property
+    def num_nodes(self):
+        return len(self.graph.entities)
+
+    @property
+    def num_edges(self):
+        return self.graph.num_edges + self.pending_edges
+
+    def add_edges(self, edges, source_column='source', target_column='target', type_column=None,
+                  time_column=None, edge_type='related_to'):
+        """
+        Buffers a batch of edges given as a DataFrame (see CSRGraph.from_frame for the columns), compacting
+        when the buffer is over its threshold.
+
+        :return: Number of edges buffered.
+        """
+        arrays = edge_arrays(edges, self.graph.entities, self.graph.edge_types, source_column, target_column,
+                             type_column, time_column, edge_type)
+        self._pending.append(arrays)
+        self._delta = None
+        if self.pending_edges > max(self.compact_edges, self.compact_fraction * self.graph.num_edges):
+            self.compact()
+        return len(edges)
+
+    def _buffered(self):
+        return [np.concatenate(arrays) for arrays in zip(*self._pending)]
+
+    def delta(self):
+        """
+        :return: CSRGraph of the buffered edges, built once per batch, or None when the buffer is empty.
+        """
+        if self._pending and self._delta is None:
+            self._delta = CSRGraph.from_edges(*self._buffered(), self.graph.entities, self.graph.edge_types)
+        return self._delta
+
+    def parts(self):
+        """
+        :return: The CSR blocks queries run over: the base graph and the delta graph when edges are buffered.
+        """
+        delta = self.delta()
+        return [self.graph] if delta is None else [self.graph, delta]
+
+    def compact(self):
+        """
+        Merges the buffered edges into a new base graph and empties the buffer.
+
+        :return: The new base CSRGraph.
+        """
+        if self._pending:
+            self.graph = self.graph.with_edges(*self._buffered())
+            self._pending = []
+            self._delta = None
+        return self.graph
+
+    def save(self, path):
+        """
+        Compacts the buffer and saves the base graph (see CSRGraph.save).
+        """
+        self.compact().save(path)
+
+    @classmethod
+    def load(cls, path, **options):
+        """
+        Opens a saved graph, memory-mapped, for incremental updates.
+        """
+        return cls(CSRGraph.load(path), **options)
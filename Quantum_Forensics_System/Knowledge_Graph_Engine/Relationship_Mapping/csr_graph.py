@@ -0,0 +1,276 @@
+# csr_graph.py
+# In-memory knowledge graph in compressed sparse row form. Entities and edge types are interned to dense
+# integer ids; typed, timestamped edges are stored once as parallel arrays sorted by (source, time), with an
+# out-adjacency row pointer over them and an in-adjacency (row pointer, neighbor, edge id) built by one
+# argsort. A node's edges are one contiguous slice, and a whole frontier's edges are gathered with a handful of
+# numpy operations. Graphs are saved as .npy files that load() memory-maps, so opening a graph does not read it.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Timestamp of edges without one; they belong to every time window
+UNTIMED = np.iinfo(np.int64).min
+
+# Kinds of name arrays (pandas.api.types.infer_dtype) saved as .npy files of their own dtype; names of any other
+# kind, e.g. a mix of integer and string keys, are saved as a JSON list so every key keeps its type
+NAME_DTYPES = {
+    'string': str,
+    'integer': np.int64,
+    'floating': np.float64,
+    'mixed-integer-float': np.float64,
+    'boolean': bool,
+}
+
+class Interner:
+    """
+    Dense integer ids for names (entity keys or edge types), assigned in order of first appearance. The name
+    lookup index is built on first use, so a memory-mapped name array is not read until a name is looked up.
+    """
+
+    def __init__(self, names=None):
+        """
+        :param names: Existing names, whose positions are their ids.
+        """
+        self.names = names if isinstance(names, np.ndarray) else np.asarray(names or [], dtype=object)
+        self._index = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def _lookup_index(self):
+        if self._index is None:
+            self._index = pd.Index(self.names)
+        return self._index
+
+    def lookup(self, values):
+        """
+        :return: int64 ids of the names, -1 for names never interned.
+        """
+        return self._lookup_index().get_indexer(pd.Index(np.asarray(values, dtype=object))).astype(np.int64)
+
+    def intern(self, values):
+        """
+        :return: int64 ids of the names, interning the new ones.
+        """
+        values = np.asarray(values, dtype=object)
+        ids = self.lookup(values)
+        missing = ids < 0
+        if missing.any():
+            new = pd.unique(values[missing])
+            self.names = np.concatenate([np.asarray(self.names, dtype=object), new])
+            self._index = self._lookup_index().append(pd.Index(new))
+            ids[missing] = self._index.get_indexer(pd.Index(values[missing]))
+        return ids
+
+    def name(self, ids):
+        """
+        :return: The names of ids (an array for an array of ids).
+        """
+        return self.names[ids]
+
+def _save_names(path, name, names):
+    """
+    Saves the names of an interner without changing their type.
+
+    :return: 'npy' or 'json', the format the names were saved in.
+    """
+    names = np.asarray(names, dtype=object)
+    dtype = NAME_DTYPES.get(pd.api.types.infer_dtype(names, skipna=False))
+    if dtype is not None or not len(names):
+        np.save(os.path.join(path, f'{name}.npy'), np.asarray(names.tolist(), dtype=dtype or str))
+        return 'npy'
+    with open(os.path.join(path, f'{name}.json'), 'w') as names_file:
+        json.dump(names.tolist(), names_file)
+    return 'json'
+
+def _load_names(path, name, kind, mmap_mode):
+    if kind == 'json':
+        with open(os.path.join(path, f'{name}.json')) as names_file:
+            return np.asarray(json.load(names_file), dtype=object)
+    return np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+
+def _row_pointer(keys, count):
+    """
+    :return: CSR row pointer of sorted int keys in [0, count).
+    """
+    return np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=count))]).astype(np.int64)
+
+def gather_edges(indptr, nodes):
+    """
+    Gathers the adjacency slots of a set of nodes, i.e. the concatenation of their CSR slices.
+
+    :param indptr: CSR row pointer.
+    :param nodes: int64 node ids; ids beyond the row pointer have no edges.
+    :return: Tuple (owners, slots): the node each slot belongs to and the slot positions.
+    """
+    nodes = nodes[nodes < len(indptr) - 1]
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    owners = np.repeat(nodes, counts)
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, np.repeat(starts, counts) + offsets
+
+class CSRGraph:
+    """
+    Directed multigraph of typed, timestamped edges in CSR form.
+    """
+
+    def __init__(self, sources, targets, types, times, entities, edge_types, num_nodes=None, adjacency=None):
+        """
+        Builds the adjacency from edge arrays already sorted by (source, time); use from_edges for unsorted ones.
+
+        :param sources: int64 source entity ids.
+        :param targets: int64 target entity ids.
+        :param types: int32 edge type ids.
+        :param times: int64 nanosecond timestamps, UNTIMED for edges without one.
+        :param entities: Interner of the entity names.
+        :param edge_types: Interner of the edge type names.
+        :param num_nodes: Number of nodes the row pointers cover; derived from the ids when omitted.
+        :param adjacency: Precomputed (out row pointer, in row pointer, edge ids in (target, time) order), as
+                          read back from a saved graph.
+        """
+        self.sources = sources
+        self.targets = targets
+        self.types = types
+        self.times = times
+        self.entities = entities
+        self.edge_types = edge_types
+        if num_nodes is None:
+            num_nodes = max(len(entities), int(sources.max()) + 1 if len(sources) else 0,
+                            int(targets.max()) + 1 if len(targets) else 0)
+        self.num_nodes = num_nodes
+        if adjacency is None:
+            in_order = np.lexsort((times, targets)).astype(np.int64)
+            adjacency = (_row_pointer(sources, num_nodes), _row_pointer(targets[in_order], num_nodes), in_order)
+        self.out_indptr, self.in_indptr, self.in_order = adjacency
+
+    @classmethod
+    def from_edges(cls, sources, targets, types, times, entities, edge_types):
+        """
+        Builds a graph from unsorted edge arrays of interned ids.
+        """
+        order = np.lexsort((times, sources))
+        return cls(np.asarray(sources, dtype=np.int64)[order], np.asarray(targets, dtype=np.int64)[order],
+                   np.asarray(types, dtype=np.int32)[order], np.asarray(times, dtype=np.int64)[order],
+                   entities, edge_types)
+
+    @classmethod
+    def from_frame(cls, edges, source_column='source', target_column='target', type_column=None,
+                   time_column=None, edge_type='related_to', entities=None, edge_types=None):
+        """
+        Bulk-loads a graph from a DataFrame with one edge per row.
+
+        :param edges: DataFrame of edges.
+        :param source_column: Column of source entity keys.
+        :param target_column: Column of target entity keys.
+        :param type_column: Column of edge types; every edge gets `edge_type` when omitted.
+        :param time_column: Column of edge timestamps; edges are untimed when omitted. Missing times are untimed.
+        :param edge_type: Edge type used when type_column is omitted.
+        :param entities: Interner to extend, e.g. to share ids with another graph.
+        :param edge_types: Edge type interner to extend.
+        :return: CSRGraph.
+        """
+        entities = entities if entities is not None else Interner()
+        edge_types = edge_types if edge_types is not None else Interner()
+        arrays = edge_arrays(edges, entities, edge_types, source_column, target_column, type_column, time_column, edge_type)
+        return cls.from_edges(*arrays, entities, edge_types)
+
+    @property
+    def num_edges(self):
+        return len(self.sources)
+
+    def parts(self):
+        """
+        :return: The CSR blocks queries run over: just this graph (see GraphUpdater.parts for a live graph).
+        """
+        return [self]
+
+    def adjacency(self, direction='out'):
+        """
+        :return: Tuple (row pointer, neighbor ids, edge ids) of the out- or in-adjacency; edge ids are None for
+                 the out-adjacency, whose slots are the edge ids.
+        """
+        if direction == 'out':
+            return self.out_indptr, self.targets, None
+        return self.in_indptr, self.sources[self.in_order], self.in_order
+
+    def with_edges(self, sources, targets, types, times):
+        """
+        :return: New graph with these edges (interned ids) added, sharing the interners.
+        """
+        return CSRGraph.from_edges(np.concatenate([self.sources, sources]), np.concatenate([self.targets, targets]),
+                                   np.concatenate([self.types, types]), np.concatenate([self.times, times]),
+                                   self.entities, self.edge_types)
+
+    def edges_frame(self):
+        """
+        :return: DataFrame of the edges with entity and type names and timestamps (NaT for untimed edges).
+        """
+        times = np.where(self.times == UNTIMED, np.datetime64('NaT'), self.times.view('datetime64[ns]'))
+        return pd.DataFrame({'source': self.entities.name(self.sources), 'target': self.entities.name(self.targets),
+                             'type': self.edge_types.name(self.types), 'timestamp': times})
+
+    def save(self, path):
+        """
+        Saves the graph as a directory of .npy files that load() can memory-map. Names keep their type: string,
+        integer, float and boolean keys are stored as arrays of that dtype, mixed keys as a JSON list.
+
+        :param path: Directory where the graph will be written.
+        """
+        os.makedirs(path, exist_ok=True)
+        arrays = {'sources': self.sources, 'targets': self.targets, 'types': self.types, 'times': self.times,
+                  'out_indptr': self.out_indptr, 'in_indptr': self.in_indptr, 'in_order': self.in_order}
+        for name, values in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), values)
+        names = {name: _save_names(path, name, interner.names)
+                 for name, interner in (('entities', self.entities), ('edge_types', self.edge_types))}
+        with open(os.path.join(path, 'graph.json'), 'w') as manifest:
+            json.dump({'num_nodes': self.num_nodes, 'num_edges': self.num_edges, 'arrays': list(arrays),
+                       'names': names}, manifest)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a graph written by save(), memory-mapping the arrays so opening it is instant and queries only
+        page in the slices they touch. The name lookup index is built on the first lookup by name.
+
+        :param path: Directory written by save().
+        :param mmap: Memory-map the arrays read-only instead of reading them into memory.
+        :return: CSRGraph instance.
+        """
+        with open(os.path.join(path, 'graph.json')) as manifest:
+            manifest = json.load(manifest)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode) for name in manifest['arrays']}
+        for name, kind in manifest.get('names', {}).items():
+            arrays[name] = _load_names(path, name, kind, mode)
+        return cls(arrays['sources'], arrays['targets'], arrays['types'], arrays['times'],
+                   Interner(arrays['entities']), Interner(np.asarray(arrays['edge_types'], dtype=object)),
+                   num_nodes=manifest['num_nodes'],
+                   adjacency=(arrays['out_indptr'], arrays['in_indptr'], arrays['in_order']))
+
+def edge_arrays(edges, entities, edge_types, source_column='source', target_column='target', type_column=None,
+                time_column=None, edge_type='related_to'):
+    """
+    Interns the edges of a DataFrame into id arrays.
+
+    :return: Tuple (sources, targets, types, times) of numpy arrays.
+    """
+    sources = entities.intern(edges[source_column].to_numpy())
+    targets = entities.intern(edges[target_column].to_numpy())
+    if type_column is not None:
+        types = edge_types.intern(edges[type_column].to_numpy()).astype(np.int32)
+    else:
+        types = np.full(len(edges), edge_types.intern([edge_type])[0], dtype=np.int32)
+    if time_column is not None:
+        times = pd.to_datetime(edges[time_column]).to_numpy(dtype='datetime64[ns]').view('i8').copy()
+        times[np.isnat(times.view('datetime64[ns]'))] = UNTIMED
+    else:
+        times = np.full(len(edges), UNTIMED, dtype=np.int64)
+    return sources, targets, types, times
@@ -0,0 +1,80 @@
+# relationship_mapper.py
+# This script maps ingested event tables to knowledge graph edges. Each relationship names the event columns
+# holding its source and target entities, its edge type (a constant or a column) and the event timestamp
+# column; the edges of all relationships are extracted column-wise and bulk-loaded into a CSRGraph.
+
+import numpy as np
+import pandas as pd
+
+from csr_graph import CSRGraph, Interner, edge_arrays
+
+# Columns of the edge frames produced by the mapper
+EDGE_COLUMNS = ['source', 'target', 'type', 'timestamp']
+
+class RelationshipMapper:
+    """
+    Extracts typed, timestamped edges from event tables and builds knowledge graphs from them.
+    """
+
+    def __init__(self, relationships, timestamp_column='timestamp'):
+        """
+        Initializes the relationship mapper.
+
+        :param relationships: List of dicts with 'source' and 'target' (entity columns), and either 'type' (edge
+                              type name) or 'type_column'. An optional 'timestamp' overrides timestamp_column;
+                              set it to None for untimed edges. Entity keys are prefixed with 'source_prefix' /
+                              'target_prefix' when given, e.g. to keep suspect and account ids apart.
+        :param timestamp_column: Default timestamp column of the events.
+        """
+        for relationship in relationships:
+            if 'type' not in relationship and 'type_column' not in relationship:
+                raise ValueError(f"Relationship {relationship} needs a 'type' or a 'type_column'.")
+        self.relationships = relationships
+        self.timestamp_column = timestamp_column
+
+    def edges(self, events):
+        """
+        Extracts the edges of every relationship from a DataFrame of events. Events missing either entity are
+        skipped.
+
+        :param events: DataFrame of events.
+        :return: DataFrame with columns source, target, type and timestamp.
+        """
+        frames = []
+        for relationship in self.relationships:
+            present = events[relationship['source']].notna() & events[relationship['target']].notna()
+            rows = events[present]
+            sources = rows[relationship['source']].astype(str)
+            targets = rows[relationship['target']].astype(str)
+            if relationship.get('source_prefix'):
+                sources = relationship['source_prefix'] + sources
+            if relationship.get('target_prefix'):
+                targets = relationship['target_prefix'] + targets
+            time_column = relationship.get('timestamp', self.timestamp_column)
+            frames.append(pd.DataFrame({
+                'source': sources.to_numpy(),
+                'target': targets.to_numpy(),
+                'type': rows[relationship['type_column']].astype(str).to_numpy() if 'type_column' in relationship
+                        else relationship['type'],
+                'timestamp': pd.to_datetime(rows[time_column]).to_numpy() if time_column is not None
+                             else pd.NaT,
+            }))
+        if not frames:
+            return pd.DataFrame(columns=EDGE_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def build_graph(self, events):
+        """
+        Bulk-loads a knowledge graph from event tables.
+
+        :param events: DataFrame of events, or an iterable of DataFrames (e.g. ingestion chunks).
+        :return: CSRGraph.
+        """
+        if isinstance(events, pd.DataFrame):
+            return CSRGraph.from_frame(self.edges(events), type_column='type', time_column='timestamp')
+        entities, edge_types = Interner(), Interner()
+        parts = [edge_arrays(self.edges(chunk), entities, edge_types, type_column='type', time_column='timestamp')
+                 for chunk in events]
+        if not parts:
+            return CSRGraph.from_frame(pd.DataFrame(columns=EDGE_COLUMNS), type_column='type', time_column='timestamp')
+        return CSRGraph.from_edges(*(np.concatenate(arrays) for arrays in zip(*parts)), entities, edge_types)
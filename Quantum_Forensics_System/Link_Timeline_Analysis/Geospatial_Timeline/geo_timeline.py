@@ -0,0 +1,310 @@
+# geo_timeline.py
+# Spatio-temporal index of coordinate fixes for geo-timeline queries such as "who was within R meters of
+# point P between t1 and t2". Fixes are bucketed into a grid of cells of a fixed size in decimal degrees and
+# stored in runs sorted by (cell, timestamp), with the row range of every occupied cell. A query turns the
+# radius into the grid rows and column ranges it covers, finds the occupied cells among them with binary
+# searches, binary-searches the time window inside every such cell at once (one vectorized search over all
+# cells), and only computes great-circle distances for the fixes that survive both. New fixes are appended
+# as additional sorted runs. Runs are merged by size tier, as the search index merges its segments, so every
+# fix is re-sorted only once per tier and ingesting batch by batch never re-sorts the whole index.
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# The geodesic kernels and the column files of the ingestion pipeline's time index are plain scripts in
+# Base_10_Angular_System/Geospatial_Integration and Self_Refining_Learning_System/Data_Ingestion, not packages
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.append(os.path.join(_ROOT, 'Base_10_Angular_System', 'Geospatial_Integration'))
+sys.path.append(os.path.join(_ROOT, 'Self_Refining_Learning_System', 'Data_Ingestion'))
+from geo_base10_mapper import bounding_box, haversine_m
+from time_index import load_column, save_column
+
+# Grid cell size in decimal degrees (0.01 degrees is about 1.1 km of latitude)
+DEFAULT_CELL_DEGREES = 0.01
+
+# Runs of one size tier (sizes within a factor of it) merged together
+DEFAULT_MAX_RUNS = 8
+
+def grid_shape(cell_degrees):
+    """
+    :return: Tuple (rows, columns) of the global grid.
+    """
+    return int(np.ceil(180 / cell_degrees)), int(np.ceil(360 / cell_degrees))
+
+def cell_ids(lat, lon, cell_degrees=DEFAULT_CELL_DEGREES):
+    """
+    :return: int64 grid cell of every fix given in decimal degrees: row * columns + column.
+    """
+    rows, columns = grid_shape(cell_degrees)
+    row = np.clip(np.floor((np.asarray(lat) + 90) / cell_degrees), 0, rows - 1).astype(np.int64)
+    column = np.clip(np.floor((np.asarray(lon) + 180) / cell_degrees), 0, columns - 1).astype(np.int64)
+    return row * columns + column
+
+def _lower_bound(values, starts, ends, targets, side='left'):
+    """
+    Binary searches many sorted slices at once: for every i, the first position in values[starts[i]:ends[i]]
+    whose value is >= targets[i] (> for side='right').
+
+    :return: int64 array of absolute positions.
+    """
+    lo, hi = starts.copy(), ends.copy()
+    active = lo < hi
+    while active.any():
+        mid = (lo + hi) // 2
+        probe = values[np.where(active, mid, 0)]
+        below = probe < targets if side == 'left' else probe <= targets
+        lo = np.where(active & below, mid + 1, lo)
+        hi = np.where(active & ~below, mid, hi)
+        active = lo < hi
+    return lo
+
+class GeoRun:
+    """
+    One immutable block of fixes sorted by (cell, timestamp).
+    """
+
+    def __init__(self, cells, timestamps, lat, lon, columns, cell_keys=None, cell_starts=None):
+        """
+        :param cells: Sorted int64 grid cells.
+        :param timestamps: int64 nanoseconds, sorted within each cell.
+        :param lat: Decimal-degree latitudes.
+        :param lon: Decimal-degree longitudes.
+        :param columns: Dict of the other columns, aligned with the fixes.
+        :param cell_keys: Occupied cells (computed when omitted).
+        :param cell_starts: Row pointer of the occupied cells (computed when omitted).
+        """
+        self.cells = cells
+        self.timestamps = timestamps
+        self.lat = lat
+        self.lon = lon
+        self.columns = columns
+        if cell_keys is None:
+            cell_keys, cell_starts = np.unique(cells, return_index=True)
+            cell_starts = np.append(cell_starts, len(cells)).astype(np.int64)
+        self.cell_keys = cell_keys
+        self.cell_starts = cell_starts
+
+    def __len__(self):
+        return len(self.cells)
+
+    @classmethod
+    def from_frame(cls, data, cell_degrees, lat_column='lat', lon_column='lon', timestamp_column='timestamp'):
+        """
+        Builds a run from a DataFrame of fixes; fixes without coordinates or timestamp are dropped.
+        """
+        data = data.dropna(subset=[lat_column, lon_column, timestamp_column])
+        lat = data[lat_column].to_numpy(dtype=np.float64)
+        lon = data[lon_column].to_numpy(dtype=np.float64)
+        timestamps = data[timestamp_column].to_numpy(dtype='datetime64[ns]').view('i8')
+        cells = cell_ids(lat, lon, cell_degrees)
+        order = np.lexsort((timestamps, cells))
+        columns = {name: data[name].to_numpy()[order] for name in data.columns
+                   if name not in (lat_column, lon_column, timestamp_column)}
+        return cls(cells[order], timestamps[order], lat[order], lon[order], columns)
+
+    def select(self, cell_ranges, start, end):
+        """
+        :param cell_ranges: Array of (first cell, last cell) ranges of covered cells.
+        :return: Positions of the fixes in covered cells with start <= timestamp <= end.
+        """
+        first = np.searchsorted(self.cell_keys, cell_ranges[:, 0], side='left')
+        last = np.searchsorted(self.cell_keys, cell_ranges[:, 1], side='right')
+        counts = last - first
+        occupied = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        if not len(occupied):
+            return np.empty(0, dtype=np.int64)
+        starts, ends = self.cell_starts[occupied], self.cell_starts[occupied + 1]
+        lo = _lower_bound(self.timestamps, starts, ends, np.full(len(starts), start), 'left')
+        hi = _lower_bound(self.timestamps, lo, ends, np.full(len(starts), end), 'right')
+        sizes = hi - lo
+        return np.repeat(lo, sizes) + np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+def _merge_runs(runs):
+    columns = {name: np.concatenate([run.columns[name] for run in runs]) for name in runs[0].columns}
+    cells = np.concatenate([run.cells for run in runs])
+    timestamps = np.concatenate([run.timestamps for run in runs])
+    order = np.lexsort((timestamps, cells))
+    return GeoRun(cells[order], timestamps[order], np.concatenate([run.lat for run in runs])[order],
+                  np.concatenate([run.lon for run in runs])[order],
+                  {name: values[order] for name, values in columns.items()})
+
+class GeoTimelineIndex:
+    """
+    Grid-cell and timestamp index over coordinate fixes held in sorted runs.
+    """
+
+    def __init__(self, cell_degrees=DEFAULT_CELL_DEGREES, max_runs=DEFAULT_MAX_RUNS, lat_column='lat',
+                 lon_column='lon', timestamp_column='timestamp'):
+        """
+        Initializes an empty index.
+
+        :param cell_degrees: Grid cell size in decimal degrees; about the typical query radius works best.
+        :param max_runs: Runs of one size tier merged together; tiers are the powers of max_runs.
+        :param lat_column: Column of decimal-degree latitudes (see geo_base10_mapper.map_coordinates).
+        :param lon_column: Column of decimal-degree longitudes.
+        :param timestamp_column: Column of fix timestamps.
+        """
+        self.cell_degrees = cell_degrees
+        self.max_runs = max_runs
+        self.lat_column = lat_column
+        self.lon_column = lon_column
+        self.timestamp_column = timestamp_column
+        # Names of the indexed columns besides the coordinates and the timestamp, known from the first append
+        self.columns = []
+        self.runs = []
+
+    @classmethod
+    def from_frame(cls, data, **options):
+        """
+        Indexes a DataFrame of fixes.
+        """
+        index = cls(**options)
+        index.append(data)
+        return index
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def append(self, data):
+        """
+        Indexes more fixes as a new run, then merges the runs of every size tier that holds max_runs runs.
+        """
+        run = GeoRun.from_frame(data, self.cell_degrees, self.lat_column, self.lon_column, self.timestamp_column)
+        if not self.runs and not self.columns:
+            self.columns = list(run.columns)
+        if len(run):
+            self.runs = self.runs + [run]
+        while True:
+            merging = self._merge_candidates()
+            if merging is None:
+                break
+            merged = _merge_runs([self.runs[position] for position in merging])
+            self.runs = [run for position, run in enumerate(self.runs) if position not in merging] + [merged]
+
+    def _merge_candidates(self):
+        """
+        Tiered merge policy: runs are bucketed by the order of magnitude (base max_runs) of their sizes, and the
+        runs of the smallest full tier are merged.
+
+        :return: Set of the positions of the runs to merge, or None.
+        """
+        factor = max(self.max_runs, 2)
+        tiers = {}
+        for position, run in enumerate(self.runs):
+            tiers.setdefault(int(np.log(max(len(run), 1)) / np.log(factor)), []).append(position)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= factor:
+                return set(tiers[tier][:factor])
+        return None
+
+    def compact(self):
+        """
+        Merges all runs into one.
+        """
+        if len(self.runs) > 1:
+            self.runs = [_merge_runs(self.runs)]
+
+    def _cell_ranges(self, lat, lon, radius_m):
+        """
+        :return: Array of (first cell, last cell) ranges, one per covered grid row and longitude range.
+        """
+        rows, columns = grid_shape(self.cell_degrees)
+        lat_min, lat_max, lon_ranges = bounding_box(lat, lon, radius_m)
+        first_row, last_row = cell_ids(np.array([lat_min, lat_max]), np.array([0.0, 0.0]), self.cell_degrees) // columns
+        grid_rows = np.arange(first_row, last_row + 1)
+        ranges = []
+        for lon_min, lon_max in lon_ranges:
+            first_column, last_column = cell_ids(np.array([0.0, 0.0]), np.array([lon_min, lon_max]), self.cell_degrees) % columns
+            ranges.append(np.column_stack([grid_rows * columns + first_column, grid_rows * columns + last_column]))
+        return np.concatenate(ranges)
+
+    def query(self, lat, lon, radius_m, start_time, end_time):
+        """
+        Finds the fixes within a radius of a point between two times (inclusive).
+
+        :param lat: Latitude of the point, in decimal degrees.
+        :param lon: Longitude of the point, in decimal degrees.
+        :param radius_m: Radius in meters.
+        :return: DataFrame of the fixes with a distance_m column, in chronological order.
+        """
+        start = pd.Timestamp(start_time).as_unit('ns').value
+        end = pd.Timestamp(end_time).as_unit('ns').value
+        cell_ranges = self._cell_ranges(lat, lon, radius_m)
+        frames = []
+        for run in self.runs:
+            positions = run.select(cell_ranges, start, end)
+            distance = haversine_m(lat, lon, run.lat[positions], run.lon[positions])
+            positions, distance = positions[distance <= radius_m], distance[distance <= radius_m]
+            data = {self.timestamp_column: run.timestamps[positions].view('datetime64[ns]'),
+                    self.lat_column: run.lat[positions], self.lon_column: run.lon[positions]}
+            data.update((name, values[positions]) for name, values in run.columns.items())
+            data['distance_m'] = distance
+            frames.append(pd.DataFrame(data))
+        if not frames:
+            return pd.DataFrame(columns=[self.timestamp_column, self.lat_column, self.lon_column, *self.columns, 'distance_m'])
+        result = pd.concat(frames, ignore_index=True)
+        return result.sort_values(self.timestamp_column, kind='stable').reset_index(drop=True)
+
+    def who_was_near(self, lat, lon, radius_m, start_time, end_time, entity_column='entity_id'):
+        """
+        Answers "who was within radius_m of (lat, lon) between start_time and end_time".
+
+        :return: DataFrame indexed by entity with first_seen, last_seen, fixes and closest_m, closest first.
+        """
+        fixes = self.query(lat, lon, radius_m, start_time, end_time)
+        if fixes.empty and entity_column not in fixes.columns:
+            # An index that never had fixes does not know its columns
+            fixes = fixes.reindex(columns=[*fixes.columns, entity_column])
+        summary = fixes.groupby(entity_column).agg(first_seen=(self.timestamp_column, 'min'),
+                                                   last_seen=(self.timestamp_column, 'max'),
+                                                   fixes=(self.timestamp_column, 'size'),
+                                                   closest_m=('distance_m', 'min'))
+        return summary.sort_values('closest_m')
+
+    def save(self, path):
+        """
+        Compacts the index and saves it as a directory of .npy files that load() can memory-map. The other
+        columns are saved as by the time index (see time_index.save_column), so missing text survives.
+
+        :param path: Directory where the index will be written.
+        """
+        self.compact()
+        os.makedirs(path, exist_ok=True)
+        run = self.runs[0] if self.runs else GeoRun(*(np.empty(0, dtype=dtype) for dtype in ('i8', 'i8', 'f8', 'f8')),
+                                                    {name: np.empty(0) for name in self.columns})
+        for name in ('cells', 'timestamps', 'lat', 'lon', 'cell_keys', 'cell_starts'):
+            np.save(os.path.join(path, f'{name}.npy'), getattr(run, name))
+        names = list(run.columns)
+        for position, name in enumerate(names):
+            save_column(path, position, name, run.columns[name])
+        with open(os.path.join(path, 'geo_index.json'), 'w') as manifest:
+            json.dump({'cell_degrees': self.cell_degrees, 'lat_column': self.lat_column, 'lon_column': self.lon_column,
+                       'timestamp_column': self.timestamp_column, 'columns': names}, manifest)
+
+    @classmethod
+    def load(cls, path, mmap=True, max_runs=DEFAULT_MAX_RUNS):
+        """
+        Loads an index written by save(), memory-mapping the arrays so opening it is instant and queries only
+        page in the cells they touch.
+
+        :param path: Directory written by save().
+        :param mmap: Memory-map the arrays read-only instead of reading them into memory.
+        :return: GeoTimelineIndex instance.
+        """
+        with open(os.path.join(path, 'geo_index.json')) as manifest:
+            layout = json.load(manifest)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+                  for name in ('cells', 'timestamps', 'lat', 'lon', 'cell_keys', 'cell_starts')}
+        columns = {name: load_column(path, position, mode) for position, name in enumerate(layout['columns'])}
+        index = cls(layout['cell_degrees'], max_runs, layout['lat_column'], layout['lon_column'],
+                    layout['timestamp_column'])
+        index.columns = list(layout['columns'])
+        if len(arrays['cells']):
+            index.runs = [GeoRun(arrays['cells'], arrays['timestamps'], arrays['lat'], arrays['lon'], columns,
+                                 arrays['cell_keys'], arrays['cell_starts'])]
+        return index
@@ -0,0 +1,199 @@
+# link_analysis.py
+# This script answers link queries over the knowledge graph: k-hop neighborhoods, shortest paths and
+# time-windowed connectivity. Every query is a breadth-first search that expands a whole frontier per hop: the
+# CSR slices of all frontier nodes are gathered at once, filtered by edge type and time window with boolean
+# masks, and checked against a visited array, so the Python loop runs once per hop instead of once per edge.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# The graph store is a plain script in Knowledge_Graph_Engine/Relationship_Mapping, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              '..', '..', 'Knowledge_Graph_Engine', 'Relationship_Mapping')))
+from csr_graph import UNTIMED, gather_edges
+
+# Edge directions a search may follow
+DIRECTIONS = {
+    'out': ('out',),
+    'in': ('in',),
+    'both': ('out', 'in'),
+}
+
+# Arrival time of nodes not reached by a time-respecting search
+UNREACHED = np.iinfo(np.int64).max
+
+def _timestamp_ns(value):
+    return None if value is None else pd.Timestamp(value).as_unit('ns').value
+
+def _distinct(nodes, marks):
+    """
+    :return: The sorted distinct node ids, deduplicated through a node-sized mask (left cleared) rather than a
+             sort, which is much cheaper for the large frontiers of the middle hops.
+    """
+    marks[nodes] = True
+    nodes = np.flatnonzero(marks)
+    marks[nodes] = False
+    return nodes
+
+class LinkAnalyzer:
+    """
+    Link queries over a CSRGraph, or over a GraphUpdater to include its buffered edges.
+    """
+
+    def __init__(self, graph):
+        """
+        Initializes the link analyzer.
+
+        :param graph: CSRGraph or GraphUpdater.
+        """
+        self.graph = graph
+
+    def _ids(self, names):
+        ids = self.graph.entities.lookup(np.atleast_1d(np.asarray(names, dtype=object)))
+        if (ids < 0).any():
+            unknown = np.atleast_1d(np.asarray(names, dtype=object))[ids < 0]
+            raise ValueError(f"Unknown entities: {list(unknown[:10])}.")
+        return ids
+
+    def _expand(self, frontier, direction, type_ids, start, end):
+        """
+        Gathers the edges leaving the frontier that pass the edge type and time window filters.
+
+        :return: Tuple (owners, neighbors, times): the frontier node, the node reached and the edge timestamp.
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction {direction!r}. Expected one of {sorted(DIRECTIONS)}.")
+        owners, neighbors, times = [], [], []
+        for part in self.graph.parts():
+            for side in DIRECTIONS[direction]:
+                indptr, adjacent, edge_ids = part.adjacency(side)
+                part_owners, slots = gather_edges(indptr, frontier)
+                if not len(slots):
+                    continue
+                edges = slots if edge_ids is None else edge_ids[slots]
+                edge_times = part.times[edges]
+                keep = np.ones(len(slots), dtype=bool)
+                if type_ids is not None:
+                    keep &= np.isin(part.types[edges], type_ids)
+                if start is not None:
+                    keep &= (edge_times >= start) | (edge_times == UNTIMED)
+                if end is not None:
+                    keep &= edge_times <= end
+                owners.append(part_owners[keep])
+                neighbors.append(adjacent[slots[keep]])
+                times.append(edge_times[keep])
+        if not owners:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        return np.concatenate(owners), np.concatenate(neighbors), np.concatenate(times)
+
+    def _filters(self, edge_types, start_time, end_time):
+        type_ids = None
+        if edge_types is not None:
+            type_ids = self.graph.edge_types.lookup(list(edge_types))
+            type_ids = type_ids[type_ids >= 0]
+        return type_ids, _timestamp_ns(start_time), _timestamp_ns(end_time)
+
+    def _search(self, seeds, max_hops, direction, filters, target=None):
+        """
+        Breadth-first search from the seed ids.
+
+        :return: Tuple (hops, parents): hop count of every node (-1 when unreached) and the node it was first
+                 reached from (-1 for seeds and unreached nodes). The search stops early once target is reached.
+        """
+        hops = np.full(len(self.graph.entities), -1, dtype=np.int64)
+        parents = np.full(len(self.graph.entities), -1, dtype=np.int64)
+        marks = np.zeros(len(self.graph.entities), dtype=bool)
+        frontier = np.unique(seeds)
+        hops[frontier] = 0
+        hop = 0
+        while len(frontier) and (max_hops is None or hop < max_hops):
+            if target is not None and hops[target] >= 0:
+                break
+            hop += 1
+            owners, neighbors, _ = self._expand(frontier, direction, *filters)
+            new = hops[neighbors] < 0
+            neighbors = neighbors[new]
+            hops[neighbors] = hop
+            # Any frontier node reaching a node is a valid parent, so duplicate writes need no resolving
+            parents[neighbors] = owners[new]
+            frontier = _distinct(neighbors, marks)
+        return hops, parents
+
+    def k_hop(self, seeds, k=2, direction='both', edge_types=None, start_time=None, end_time=None):
+        """
+        Finds the entities within k hops of the seeds.
+
+        :param seeds: Entity key or list of entity keys.
+        :param k: Maximum number of hops.
+        :param direction: 'out', 'in' or 'both'.
+        :param edge_types: Edge types to follow; all of them when omitted.
+        :param start_time: Only follow edges at or after this time (untimed edges are always followed).
+        :param end_time: Only follow edges at or before this time.
+        :return: DataFrame with columns entity and hops, seeds included at 0 hops, sorted by hops.
+        """
+        hops, _ = self._search(self._ids(seeds), k, direction, self._filters(edge_types, start_time, end_time))
+        reached = np.flatnonzero(hops >= 0)
+        reached = reached[np.argsort(hops[reached], kind='stable')]
+        return pd.DataFrame({'entity': self.graph.entities.name(reached), 'hops': hops[reached]})
+
+    def shortest_path(self, source, target, max_hops=None, direction='both', edge_types=None, start_time=None,
+                      end_time=None):
+        """
+        Finds a path with the fewest hops between two entities.
+
+        :return: List of entity keys from source to target, or None when they are not connected.
+        """
+        source_id, target_id = self._ids([source, target])
+        hops, parents = self._search(np.array([source_id]), max_hops, direction,
+                                     self._filters(edge_types, start_time, end_time), target=target_id)
+        if hops[target_id] < 0:
+            return None
+        path = [target_id]
+        while path[-1] != source_id:
+            path.append(parents[path[-1]])
+        return list(self.graph.entities.name(np.array(path[::-1])))
+
+    def earliest_arrival(self, source, start_time=None, end_time=None, direction='out', edge_types=None):
+        """
+        Time-respecting reachability: a path may only follow edges in chronological order, e.g. money that
+        reaches an account can only be moved on afterwards. Untimed edges can be followed at any point.
+
+        :return: Series of the earliest arrival time of every reachable entity, indexed by entity key (the
+                 source arrives at start_time, or NaT when it is omitted).
+        """
+        type_ids, start, end = self._filters(edge_types, start_time, end_time)
+        arrival = np.full(len(self.graph.entities), UNREACHED, dtype=np.int64)
+        source_id = self._ids(source)[0]
+        arrival[source_id] = UNTIMED if start is None else start
+        marks = np.zeros(len(self.graph.entities), dtype=bool)
+        frontier = np.array([source_id])
+        while len(frontier):
+            owners, neighbors, times = self._expand(frontier, direction, type_ids, start, end)
+            owner_arrival = arrival[owners]
+            usable = (times == UNTIMED) | (times >= owner_arrival)
+            candidates = np.where(times == UNTIMED, owner_arrival, times)[usable]
+            neighbors = neighbors[usable]
+            before = arrival[neighbors]
+            np.minimum.at(arrival, neighbors, candidates)
+            frontier = _distinct(neighbors[arrival[neighbors] < before], marks)
+        reached = np.flatnonzero(arrival != UNREACHED)
+        times = np.where(arrival[reached] == UNTIMED, np.datetime64('NaT'), arrival[reached].view('datetime64[ns]'))
+        return pd.Series(times, index=self.graph.entities.name(reached), name='arrival')
+
+    def connected(self, source, target, start_time=None, end_time=None, time_respecting=False, direction='both',
+                  edge_types=None, max_hops=None):
+        """
+        Checks whether two entities are linked through edges in a time window.
+
+        :param time_respecting: Require the path's edges to be in chronological order (see earliest_arrival);
+                                such paths follow outgoing edges unless direction is 'in'.
+        :return: True when a path exists.
+        """
+        if time_respecting:
+            arrival = self.earliest_arrival(source, start_time, end_time, 'in' if direction == 'in' else 'out', edge_types)
+            return target in arrival.index
+        return self.shortest_path(source, target, max_hops, direction, edge_types, start_time, end_time) is not None
@@ -0,0 +1,94 @@
+# realtime_analysis.py
+# This script analyzes events as they arrive. Incoming batches are appended to the timestamp-sorted store of
+# the ingestion pipeline as sorted runs that are compacted in the background, and every sliding-window
+# question is answered with binary searches over the runs.
+
+import os
+import sys
+
+import pandas as pd
+
+# The ingestion modules are plain scripts in Self_Refining_Learning_System/Data_Ingestion, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              '..', '..', 'Self_Refining_Learning_System', 'Data_Ingestion')))
+from time_index import TimeIndexedStore
+
+class RealTimeAnalyzer:
+    """
+    Maintains a live event store and answers sliding-window queries over it.
+    """
+
+    def __init__(self, window='5min', store=None):
+        """
+        Initializes the analyzer.
+
+        :param window: Default sliding-window length as a pandas Timedelta string.
+        :param store: Existing TimeIndexedStore to continue from; a new one is created when omitted.
+        """
+        self.window = pd.Timedelta(window)
+        self.store = store if store is not None else TimeIndexedStore()
+        self.latest = None
+
+    def ingest(self, events):
+        """
+        Appends a batch of events. Batches may arrive out of order; compaction runs in the background.
+
+        :param events: DataFrame with a datetime 'timestamp' column.
+        """
+        if events.empty:
+            return
+        self.store.append(events)
+        newest = events[self.store.timestamp_column].max()
+        self.latest = newest if self.latest is None else max(self.latest, newest)
+
+    def recent_events(self, now=None, window=None):
+        """
+        Returns the events in (now - window, now].
+
+        :param now: End of the window; the latest event time when omitted.
+        :param window: Window length; the analyzer default when omitted.
+        """
+        now = pd.Timestamp(now) if now is not None else self.latest
+        if now is None:
+            return pd.DataFrame()
+        window = pd.Timedelta(window) if window is not None else self.window
+        return self.store.query(now - window + pd.Timedelta(1, unit='ns'), now)
+
+    def event_rate(self, now=None, window=None):
+        """
+        Returns the number of events per second over the sliding window, from binary searches only.
+        """
+        now = pd.Timestamp(now) if now is not None else self.latest
+        if now is None:
+            return 0.0
+        window = pd.Timedelta(window) if window is not None else self.window
+        return self.store.count(now - window + pd.Timedelta(1, unit='ns'), now) / window.total_seconds()
+
+    def detect_burst(self, now=None, history_windows=12, factor=3.0):
+        """
+        Flags a burst when the current window holds more than factor times the average count of the
+        preceding history_windows windows.
+
+        :return: Tuple (is_burst, current count, baseline average).
+        """
+        now = pd.Timestamp(now) if now is not None else self.latest
+        if now is None:
+            return False, 0, 0.0
+        one = pd.Timedelta(1, unit='ns')
+        current = self.store.count(now - self.window + one, now)
+        history_start = now - self.window * (history_windows + 1) + one
+        baseline = self.store.count(history_start, now - self.window) / history_windows
+        is_burst = baseline > 0 and current > factor * baseline
+        if is_burst:
+            print(f"Burst detected: {current} events in the last {self.window} against a baseline of {baseline:.1f}.")
+        return is_burst, current, baseline
+
+if __name__ == "__main__":
+    # Example usage with a synthetic event stream
+    analyzer = RealTimeAnalyzer(window='10min')
+    start = pd.Timestamp('2024-01-01')
+    for batch in range(24):
+        times = pd.date_range(start + pd.Timedelta(minutes=10 * batch), periods=20 if batch < 23 else 200, freq='3s')
+        analyzer.ingest(pd.DataFrame({'timestamp': times, 'source': 'sensor'}))
+    print(f"Event rate: {analyzer.event_rate():.2f} events/s")
+    print(analyzer.detect_burst())
@@ -0,0 +1,36 @@
+# doc_classifier.py
+# This script assigns a document type to recognized pages by keyword evidence. The keywords of each type are
+# compiled into one case-insensitive alternation, so scoring a page is one regex scan per type, and the type
+# with the most keyword hits wins.
+
+import re
+
+# Keywords that identify each document type
+DOCUMENT_TYPES = {
+    'financial_record': ['account', 'balance', 'transaction', 'deposit', 'withdrawal', 'invoice', 'wire transfer', 'iban'],
+    'police_report': ['incident', 'officer', 'suspect', 'report number', 'case number', 'arrest', 'witness'],
+    'legal_document': ['court', 'plaintiff', 'defendant', 'hereby', 'pursuant', 'affidavit', 'subpoena', 'warrant'],
+    'correspondence': ['dear', 'sincerely', 'regards', 'subject:', 'to:', 'from:'],
+    'identity_document': ['passport', 'date of birth', 'nationality', 'driver', 'license', 'identification'],
+}
+
+# Type given to pages without any keyword hit
+UNKNOWN_TYPE = 'unknown'
+
+# Compiled keyword patterns by document type
+_PATTERNS = {name: re.compile(r'(?<!\w)(?:' + '|'.join(re.escape(keyword) for keyword in keywords) + r')(?!\w)', re.IGNORECASE)
+             for name, keywords in DOCUMENT_TYPES.items()}
+
+def classify(text):
+    """
+    Classifies one page.
+
+    :param text: Cleaned page text.
+    :return: Tuple (document type, score), the score being the share of keyword hits that went to that type.
+    """
+    hits = {name: len(pattern.findall(text)) for name, pattern in _PATTERNS.items()}
+    total = sum(hits.values())
+    if total == 0:
+        return UNKNOWN_TYPE, 0.0
+    best = max(hits, key=hits.get)
+    return best, hits[best] / total
@@ -0,0 +1,116 @@
+# image_preprocessor.py
+# This script prepares scanned pages for text recognition. A page is decoded once to an 8-bit grayscale
+# array, and each preprocessing step (downscaling, despeckling, contrast normalization, binarization, border
+# cropping) is a whole-array numpy or Pillow operation, so no Python code runs per pixel.
+
+import io
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Longest side, in pixels, pages are downscaled to; larger scans only slow recognition down
+DEFAULT_MAX_SIDE = 3500
+
+# Percentiles of the intensity histogram stretched to black and white by contrast normalization
+NORMALIZE_PERCENTILES = (1, 99)
+
+# Intensity below which a binarized pixel counts as ink when cropping
+INK_THRESHOLD = 128
+
+# Blank margin, in pixels, kept around the ink when cropping
+CROP_MARGIN = 10
+
+def decode(data):
+    """
+    Decodes an image file to an 8-bit grayscale array.
+
+    :param data: Encoded image bytes (PNG, JPEG, TIFF, ...).
+    :return: 2-D uint8 numpy array.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert('L'))
+
+def downscale(image, options):
+    max_side = options.get('max_side', DEFAULT_MAX_SIDE)
+    scale = max_side / max(image.shape)
+    if scale >= 1:
+        return image
+    size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+    return np.asarray(Image.fromarray(image).resize(size, Image.Resampling.LANCZOS))
+
+def despeckle(image, options):
+    return np.asarray(Image.fromarray(image).filter(ImageFilter.MedianFilter(options.get('size', 3))))
+
+def normalize(image, options):
+    """
+    Stretches the intensity range between two percentiles of the histogram to the full 0-255 range.
+    """
+    low, high = options.get('percentiles', NORMALIZE_PERCENTILES)
+    cumulative = np.cumsum(np.bincount(image.ravel(), minlength=256))
+    black, white = np.searchsorted(cumulative, cumulative[-1] * np.array([low, high]) / 100)
+    if white <= black:
+        return image
+    lookup = np.clip((np.arange(256) - black) * 255.0 / (white - black), 0, 255).astype(np.uint8)
+    return lookup[image]
+
+def otsu_threshold(image):
+    """
+    :return: The threshold maximizing the between-class variance of the intensity histogram.
+    """
+    histogram = np.bincount(image.ravel(), minlength=256).astype(np.float64)
+    weight = np.cumsum(histogram)
+    mass = np.cumsum(histogram * np.arange(256))
+    total, total_mass = weight[-1], mass[-1]
+    background = weight[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    if not valid.any():
+        # A blank or single-intensity page has nothing to separate
+        return 127
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (total_mass * background - total * mass[:-1]) ** 2 / (background * foreground)
+    return int(np.argmax(np.where(valid, variance, -1)))
+
+def binarize(image, options):
+    threshold = options.get('threshold') or otsu_threshold(image)
+    return np.where(image > threshold, 255, 0).astype(np.uint8)
+
+def crop(image, options):
+    """
+    Trims the blank borders around the ink, keeping a small margin.
+    """
+    ink = image < options.get('ink_threshold', INK_THRESHOLD)
+    rows = np.flatnonzero(ink.any(axis=1))
+    columns = np.flatnonzero(ink.any(axis=0))
+    if not len(rows):
+        return image
+    margin = options.get('margin', CROP_MARGIN)
+    return image[max(rows[0] - margin, 0):rows[-1] + margin + 1, max(columns[0] - margin, 0):columns[-1] + margin + 1]
+
+# Preprocessing steps, applied in the order they are listed
+PREPROCESSORS = {
+    'downscale': downscale,
+    'despeckle': despeckle,
+    'normalize': normalize,
+    'binarize': binarize,
+    'crop': crop,
+}
+
+# Steps applied when none are configured
+DEFAULT_STEPS = ['downscale', 'normalize', 'binarize', 'crop']
+
+def preprocess(data, steps=None):
+    """
+    Decodes a page and runs the preprocessing steps on it.
+
+    :param data: Encoded image bytes.
+    :param steps: List of step names or {'op': name, ...options} dicts; DEFAULT_STEPS when omitted.
+    :return: 2-D uint8 numpy array ready for recognition.
+    """
+    image = decode(data)
+    for spec in DEFAULT_STEPS if steps is None else steps:
+        name, options = (spec, {}) if isinstance(spec, str) else (spec['op'], spec)
+        if name not in PREPROCESSORS:
+            raise ValueError(f"Unknown preprocessing step {name!r}. Expected one of {sorted(PREPROCESSORS)}.")
+        image = PREPROCESSORS[name](image, options)
+    return image
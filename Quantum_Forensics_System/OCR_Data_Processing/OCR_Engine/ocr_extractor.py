@@ -0,0 +1,369 @@
+# ocr_extractor.py
+# This script runs the OCR pipeline over batches of scanned pages: preprocess (image_preprocessor),
+# recognize (a pluggable local OCR engine), post-process (post_process) and classify (doc_classifier).
+# Pages are read and hashed in the main process; a page whose content was already recognized, earlier in the
+# run or in a previous run with the same settings, is answered from the on-disk result cache without being
+# decoded. The remaining pages go to a process pool that runs the four stages of a page in one worker, so the
+# decoded image never crosses a process boundary. The number of pages in flight is bounded, so reading
+# stalls when the workers fall behind, and results are yielded as they complete. Pages per second and
+# per-stage latencies are reported at the end of each run.
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+# The pipeline stages are plain scripts in sibling directories, and the instrumentation lives with the
+# ingestion modules in Self_Refining_Learning_System/Data_Ingestion; none of them are packages
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(_ROOT, 'Image_Preprocessing'))
+sys.path.append(os.path.join(_ROOT, 'Post_Processing'))
+sys.path.append(os.path.join(_ROOT, 'Document_Classification'))
+sys.path.append(os.path.normpath(os.path.join(_ROOT, '..', 'Self_Refining_Learning_System', 'Data_Ingestion')))
+from doc_classifier import classify
+from image_preprocessor import DEFAULT_STEPS, PREPROCESSORS, preprocess
+from instrumentation import Instrumentation
+from post_process import post_process
+
+# Log file of the OCR runs
+LOG_PATH = os.path.join(_ROOT, 'Logs', 'ocr_processing.log')
+
+# Default directory of the result cache
+DEFAULT_CACHE_DIR = os.path.join(_ROOT, 'Cache')
+
+# File extensions picked up when scanning a directory of pages
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.gif', '.webp')
+
+# Pages in flight per worker process
+PAGES_PER_WORKER = 4
+
+# Stages whose latency is reported; 'read' (reading and hashing a page) runs in the main process
+STAGES = ['read', 'preprocess', 'recognize', 'post_process', 'classify']
+
+# Engine confidence (0-100) below which a page is flagged for manual review
+DEFAULT_MIN_CONFIDENCE = 60.0
+
+def _tesseract(image, options):
+    """
+    Recognizes a page with a local Tesseract installation through pytesseract.
+
+    :param options: 'lang' (default 'eng') and 'config' (extra Tesseract arguments).
+    :return: Dict with the recognized 'text' and the mean word 'confidence'.
+    """
+    import pytesseract
+
+    data = pytesseract.image_to_data(image, lang=options.get('lang', 'eng'), config=options.get('config', ''),
+                                     output_type=pytesseract.Output.DICT)
+    lines, confidences, previous = [], [], None
+    for word, confidence, block, paragraph, line in zip(data['text'], data['conf'], data['block_num'],
+                                                        data['par_num'], data['line_num']):
+        if not word.strip():
+            continue
+        key = (block, paragraph, line)
+        if key != previous:
+            if previous is not None and key[:2] != previous[:2]:
+                lines.append('')
+            lines.append(word)
+            previous = key
+        else:
+            lines[-1] += ' ' + word
+        if float(confidence) >= 0:
+            confidences.append(float(confidence))
+    return {'text': '\n'.join(lines), 'confidence': float(np.mean(confidences)) if confidences else None}
+
+# Local OCR engines by name. An engine is a callable (image, options) -> {'text', 'confidence'} taking a 2-D
+# uint8 array; a module-level function can also be passed to OCRPipeline directly instead of a name.
+ENGINES = {
+    'tesseract': _tesseract,
+}
+
+def engine_id(engine):
+    """
+    :return: Stable identifier of an engine name or callable, part of the cache settings.
+    """
+    return engine if isinstance(engine, str) else f'{engine.__module__}.{engine.__qualname__}'
+
+def content_hash(data):
+    """
+    :return: Hex SHA-256 of a page's bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def iter_pages(directory, extensions=IMAGE_EXTENSIONS):
+    """
+    Yields the paths of the page images under a directory, in sorted order.
+    """
+    for root, directories, files in os.walk(directory):
+        directories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                yield os.path.join(root, name)
+
+def run_stages(data, engine, engine_options, steps, min_confidence):
+    """
+    Runs the four stages on one page; this is the unit of work of the worker processes.
+
+    :return: Tuple (result, timings): the page result and the seconds spent in each stage.
+    """
+    timings = {}
+    started = time.perf_counter()
+    image = preprocess(data, steps)
+    timings['preprocess'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    recognition = (ENGINES[engine] if isinstance(engine, str) else engine)(image, engine_options)
+    timings['recognize'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = post_process(recognition, min_confidence)
+    timings['post_process'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result['document_type'], result['type_score'] = classify(result['text'])
+    timings['classify'] = time.perf_counter() - started
+    return result, timings
+
+class ResultCache:
+    """
+    On-disk page results keyed by content hash, one JSON file per page under a directory per settings hash,
+    so results of other engine or preprocessing settings are never served.
+    """
+
+    def __init__(self, directory, settings):
+        """
+        :param directory: Cache root directory.
+        :param settings: JSON-serializable pipeline settings the results depend on.
+        """
+        canonical = json.dumps(settings, sort_keys=True, default=str)
+        self.directory = os.path.join(directory, hashlib.sha256(canonical.encode()).hexdigest()[:16])
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, key):
+        """
+        :return: The cached result of a content hash, or None.
+        """
+        try:
+            with open(self._path(key)) as cached:
+                return json.load(cached)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, result):
+        """
+        Stores a result; the file is written to a temporary name and renamed, so a reader never sees half of it.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as cached:
+            json.dump(result, cached)
+        os.replace(temporary, path)
+
+class OCRPipeline:
+    """
+    Batch OCR over a process pool with content-hash deduplication and a result cache.
+    """
+
+    def __init__(self, engine='tesseract', engine_options=None, preprocess_steps=None,
+                 min_confidence=DEFAULT_MIN_CONFIDENCE, cache_dir=DEFAULT_CACHE_DIR, workers=None, log_path=LOG_PATH):
+        """
+        Initializes the pipeline.
+
+        :param engine: Name of an engine in ENGINES, or a module-level engine function.
+        :param engine_options: Options passed to the engine.
+        :param preprocess_steps: Preprocessing steps (see image_preprocessor.preprocess).
+        :param min_confidence: Engine confidence below which a page is flagged for review.
+        :param cache_dir: Directory of the result cache; results are only kept for the current run when None.
+        :param workers: Worker processes; os.cpu_count() when omitted, 1 runs the stages in-process.
+        :param log_path: Log file of the run reports.
+        """
+        if isinstance(engine, str) and engine not in ENGINES:
+            raise ValueError(f"Unknown OCR engine {engine!r}. Expected one of {sorted(ENGINES)}.")
+        self.steps = list(DEFAULT_STEPS if preprocess_steps is None else preprocess_steps)
+        for spec in self.steps:
+            name = spec if isinstance(spec, str) else spec['op']
+            if name not in PREPROCESSORS:
+                raise ValueError(f"Unknown preprocessing step {name!r}. Expected one of {sorted(PREPROCESSORS)}.")
+        self.engine = engine
+        self.engine_options = engine_options or {}
+        self.min_confidence = min_confidence
+        self.workers = workers or os.cpu_count() or 1
+        settings = {'engine': engine_id(engine), 'engine_options': self.engine_options, 'steps': self.steps,
+                    'min_confidence': min_confidence}
+        self.cache = ResultCache(cache_dir, settings) if cache_dir is not None else None
+        self.instrumentation = Instrumentation('OCRPipeline', log_path)
+        self._reset()
+
+    def _reset(self):
+        self.counts = {'pages': 0, 'recognized': 0, 'cache_hits': 0, 'duplicates': 0, 'failures': 0}
+        self.latencies = {stage: [] for stage in STAGES}
+        self.elapsed_seconds = 0.0
+        self._seen = set()
+        self._results = {}
+
+    @staticmethod
+    def _read(page):
+        """
+        :param page: Path of a page image, or a (page id, bytes) tuple.
+        :return: Tuple (page id, bytes).
+        """
+        if isinstance(page, tuple):
+            return page
+        with open(page, 'rb') as image_file:
+            return page, image_file.read()
+
+    def _known(self, key):
+        """
+        :return: The result of a content hash recognized earlier, from this run or the cache, or None.
+        """
+        if key in self._results:
+            return self._results[key]
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _complete(self, key, result, timings):
+        for stage, seconds in timings.items():
+            self.latencies[stage].append(seconds)
+        self.counts['recognized'] += 1
+        self._seen.add(key)
+        if self.cache is not None:
+            self.cache.put(key, result)
+        else:
+            self._results[key] = result
+
+    def _collect(self, in_flight, waiting, return_when):
+        """
+        Yields the rows of the pages whose futures are done: the recognized page, then its duplicates.
+        """
+        done, _ = wait(in_flight, return_when=return_when)
+        for future in done:
+            key = in_flight.pop(future)
+            pages = waiting.pop(key)
+            try:
+                result, timings = future.result()
+            except Exception as e:
+                self.counts['failures'] += len(pages)
+                self.instrumentation.error("OCR failed for page %s: %s", pages[0], e)
+                for page in pages:
+                    yield {'page': page, 'hash': key, 'error': str(e), 'cached': False, 'duplicate': False}
+                continue
+            self._complete(key, result, timings)
+            for index, page in enumerate(pages):
+                yield {'page': page, 'hash': key, **result, 'cached': False, 'duplicate': index > 0}
+
+    def run(self, pages):
+        """
+        Runs the pipeline over pages and yields one result row per page, in completion order.
+
+        :param pages: Iterable of page image paths or (page id, bytes) tuples.
+        :return: Generator of dicts with 'page', 'hash', 'text', 'confidence', 'words', 'needs_review',
+                 'document_type', 'type_score', 'cached' (answered from an earlier run) and 'duplicate'
+                 (content already seen in this run); failed pages have an 'error' instead of the results.
+        """
+        self._reset()
+        started = time.perf_counter()
+        max_in_flight = PAGES_PER_WORKER * self.workers
+        arguments = (self.engine, self.engine_options, self.steps, self.min_confidence)
+        in_flight, waiting = {}, {}
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for page in pages:
+                read_started = time.perf_counter()
+                page_id, data = self._read(page)
+                key = content_hash(data)
+                self.latencies['read'].append(time.perf_counter() - read_started)
+                self.counts['pages'] += 1
+
+                if key in waiting:
+                    waiting[key].append(page_id)
+                    self.counts['duplicates'] += 1
+                    continue
+                result = self._known(key)
+                if result is not None:
+                    duplicate = key in self._seen
+                    self._seen.add(key)
+                    self.counts['duplicates' if duplicate else 'cache_hits'] += 1
+                    yield {'page': page_id, 'hash': key, **result, 'cached': not duplicate, 'duplicate': duplicate}
+                    continue
+
+                if pool is None:
+                    try:
+                        result, timings = run_stages(data, *arguments)
+                    except Exception as e:
+                        self.counts['failures'] += 1
+                        self.instrumentation.error("OCR failed for page %s: %s", page_id, e)
+                        yield {'page': page_id, 'hash': key, 'error': str(e), 'cached': False, 'duplicate': False}
+                        continue
+                    self._complete(key, result, timings)
+                    yield {'page': page_id, 'hash': key, **result, 'cached': False, 'duplicate': False}
+                    continue
+
+                waiting[key] = [page_id]
+                in_flight[pool.submit(run_stages, data, *arguments)] = key
+                if len(in_flight) >= max_in_flight:
+                    yield from self._collect(in_flight, waiting, FIRST_COMPLETED)
+            while in_flight:
+                yield from self._collect(in_flight, waiting, FIRST_COMPLETED)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            self.elapsed_seconds = time.perf_counter() - started
+            self.log_report()
+
+    def process(self, pages):
+        """
+        Runs the pipeline over pages.
+
+        :return: DataFrame with one row per page (see run).
+        """
+        return pd.DataFrame(list(self.run(pages)))
+
+    def report(self):
+        """
+        :return: Dict of the last run's page counts, elapsed seconds, pages per second over all pages and
+                 recognized pages per second.
+        """
+        elapsed = self.elapsed_seconds or float('nan')
+        return {**self.counts, 'elapsed_seconds': self.elapsed_seconds,
+                'pages_per_second': self.counts['pages'] / elapsed,
+                'recognized_per_second': self.counts['recognized'] / elapsed}
+
+    def stage_latency(self):
+        """
+        :return: DataFrame of the last run's per-stage latency in milliseconds: count, mean, p50, p95 and max.
+        """
+        rows = {}
+        for stage, seconds in self.latencies.items():
+            values = np.asarray(seconds) * 1000
+            rows[stage] = {'count': len(values), 'mean_ms': values.mean() if len(values) else np.nan,
+                           'p50_ms': np.percentile(values, 50) if len(values) else np.nan,
+                           'p95_ms': np.percentile(values, 95) if len(values) else np.nan,
+                           'max_ms': values.max() if len(values) else np.nan}
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    def log_report(self):
+        """
+        Writes the run report and stage latencies to the log.
+        """
+        report = self.report()
+        self.instrumentation.info("OCR run: %d pages (%d recognized, %d cache hits, %d duplicates, %d failed) "
+                                  "in %.2fs, %.1f pages/s", report['pages'], report['recognized'],
+                                  report['cache_hits'], report['duplicates'], report['failures'],
+                                  report['elapsed_seconds'], report['pages_per_second'])
+        self.instrumentation.info("Stage latency:\n%s", self.stage_latency().to_string())
+        self.instrumentation.flush()
+
+if __name__ == "__main__":
+    import logging
+
+    logging.basicConfig(level=logging.INFO)
+    pipeline = OCRPipeline()
+    results = pipeline.process(iter_pages(os.path.join(_ROOT, 'Test_Images')))
+    print(results.drop(columns=['text'], errors='ignore'))
+    print(pipeline.report())
@@ -0,0 +1,51 @@
+# post_process.py
+# This script cleans recognized text. The cleanup is a fixed list of precompiled regular expression
+# substitutions applied to the whole page at once: Unicode normalization, control characters, words
+# hyphenated across line breaks, runs of spaces and blank lines.
+
+import re
+import unicodedata
+
+# Substitutions applied in order after Unicode normalization
+CLEANUP_STEPS = [
+    # Control characters other than newlines and tabs
+    (re.compile(r'[\x00-\x08\x0b-\x1f\x7f]'), ''),
+    # Words hyphenated across a line break
+    (re.compile(r'(\w)-\n(\w)'), r'\1\2'),
+    # Runs of spaces and tabs
+    (re.compile(r'[ \t]+'), ' '),
+    # Spaces at the start or end of a line
+    (re.compile(r' ?\n ?'), '\n'),
+    # More than one blank line
+    (re.compile(r'\n{3,}'), '\n\n'),
+]
+
+def clean_text(text):
+    """
+    Cleans the text recognized on one page.
+
+    :param text: Raw recognized text.
+    :return: Cleaned text.
+    """
+    # NFKC also folds ligatures and full-width characters common in scans to their plain forms
+    text = unicodedata.normalize('NFKC', text or '').replace('\r\n', '\n').replace('\r', '\n')
+    for pattern, replacement in CLEANUP_STEPS:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+def post_process(recognition, min_confidence=0.0):
+    """
+    Cleans a recognition result and flags it when the engine's confidence is too low to trust.
+
+    :param recognition: Dict with 'text' and optionally 'confidence' (0-100) from the OCR engine.
+    :param min_confidence: Confidence below which the page is flagged for manual review.
+    :return: Dict with the cleaned 'text', 'confidence', 'words' and 'needs_review'.
+    """
+    text = clean_text(recognition.get('text'))
+    confidence = recognition.get('confidence')
+    return {
+        'text': text,
+        'confidence': confidence,
+        'words': len(text.split()),
+        'needs_review': not text or (confidence is not None and confidence < min_confidence),
+    }
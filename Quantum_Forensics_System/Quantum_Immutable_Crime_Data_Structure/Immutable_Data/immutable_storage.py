@@ -0,0 +1,363 @@
+# immutable_storage.py
+# Append-only evidence store. Records are appended in batches to segment files that are never rewritten:
+# the record bytes go to a .data file, their end offsets to an .index file and their Merkle leaf hashes,
+# computed on a thread pool, to a .leaves file. The Merkle tree of the open segment is kept in memory and
+# extended with every batch, re-hashing only the O(log n) nodes above the new leaves. When a segment holds
+# segment_records records, or earlier on an explicit seal() checkpoint, it is sealed: the levels of its tree are
+# written once to a .tree file and its root and record count are chained to the previous segment's in the
+# manifest. Inclusion proofs are read from memory-mapped leaves and tree files (or the open segment's tree),
+# one slice per level, so a proof costs O(log n) reads and nothing already stored is hashed again.
+# Verification re-hashes every segment, the open one included, from memory-mapped record bytes and checks it
+# against its leaves, tree, root and chain link.
+
+import bisect
+import json
+import mmap
+import os
+import sys
+
+import numpy as np
+
+# The proof primitives are a plain script in ../Quantum_Proofs, not a package
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Quantum_Proofs')))
+from quantum_proofs import (GENESIS, HASH_SIZE, build_levels, chain_link, extend_levels, hash_leaves, inclusion_path,
+                            leaf_hash, level_sizes, verify_path)
+
+# Largest number of records per segment; part of the store layout, recorded in the manifest
+DEFAULT_SEGMENT_RECORDS = 1_048_576
+
+# Width of the record end offsets in the .index files
+OFFSET_SIZE = 8
+
+MANIFEST = 'manifest.json'
+
+# Checks of verify_segment that must all hold for a segment to be intact
+SEGMENT_CHECKS = ('data_matches', 'leaves_match', 'tree_matches', 'root_matches')
+
+def _segment_path(directory, segment, extension):
+    return os.path.join(directory, f'{segment:08d}.{extension}')
+
+def _map(path):
+    """
+    Memory-maps a file read-only; empty files, which cannot be mapped, give an empty buffer.
+    """
+    with open(path, 'rb') as mapped_file:
+        if os.fstat(mapped_file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _split_levels(leaves, tree, count):
+    """
+    Splits a tree file into its levels, preceded by the leaves.
+    """
+    levels = [leaves]
+    start = 0
+    for size in level_sizes(count)[1:]:
+        levels.append(tree[start:start + size * HASH_SIZE])
+        start += size * HASH_SIZE
+    return levels
+
+class ImmutableStore:
+    """
+    Append-only store of byte records in Merkle-hashed, root-chained segments. Record ids are global positions;
+    segments hold at most segment_records records each, fewer when they were sealed early, and the manifest
+    records every segment's count.
+    """
+
+    def __init__(self, directory, segment_records=DEFAULT_SEGMENT_RECORDS, workers=None, durable=False):
+        """
+        Opens the store in a directory, creating it when missing. A batch interrupted by a crash is rolled back
+        to the last record whose data, offset and leaf hash were all written.
+
+        :param directory: Directory of the segment files and the manifest.
+        :param segment_records: Records per segment; must match the manifest of an existing store.
+        :param workers: Number of threads hashing records; one per CPU when omitted.
+        :param durable: fsync the segment files after every batch.
+        """
+        self.directory = directory
+        self.workers = workers
+        self.durable = durable
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                self.manifest = json.load(manifest_file)
+            if self.manifest['segment_records'] != segment_records:
+                raise ValueError(f"Store {directory} has {self.manifest['segment_records']} records per segment, "
+                                 f"not {segment_records}.")
+        else:
+            self.manifest = {'segment_records': segment_records, 'segments': []}
+        self.segment_records = segment_records
+        # First record id of every sealed segment and of the open one
+        self._starts = [0]
+        for entry in self.manifest['segments']:
+            self._starts.append(self._starts[-1] + entry['records'])
+        self._sealed = {}
+        self._open_levels = None
+        self._open_segment()
+
+    @property
+    def sealed_segments(self):
+        return len(self.manifest['segments'])
+
+    def __len__(self):
+        return self._starts[-1] + self.open_records
+
+    def _open_segment(self):
+        """
+        Opens the files of the segment after the last sealed one for appending, truncating a partial batch.
+        """
+        segment = self.sealed_segments
+        paths = [_segment_path(self.directory, segment, extension) for extension in ('data', 'index', 'leaves')]
+        for path in paths:
+            open(path, 'ab').close()
+        count = min(os.path.getsize(paths[1]) // OFFSET_SIZE, os.path.getsize(paths[2]) // HASH_SIZE)
+        ends = np.fromfile(paths[1], dtype='<u8', count=count)
+        data_size = os.path.getsize(paths[0])
+        # Keep the records whose bytes were fully written
+        count = int(np.searchsorted(ends, data_size, side='right'))
+        for path, size in zip(paths, (int(ends[count - 1]) if count else 0, count * OFFSET_SIZE, count * HASH_SIZE)):
+            os.truncate(path, size)
+        self.open_records = count
+        self._data_size = int(ends[count - 1]) if count else 0
+        self._files = [open(path, 'ab') for path in paths]
+        self._open_levels = None
+
+    def append(self, records):
+        """
+        Appends a batch of records. Batches that cross a segment boundary seal the full segment on the way.
+
+        :param records: Sequence of bytes-like or str records (str is stored as UTF-8).
+        :return: range of the record ids assigned to the batch.
+        """
+        records = [record.encode() if isinstance(record, str) else record for record in records]
+        first = len(self)
+        start = 0
+        while start < len(records):
+            batch = records[start:start + self.segment_records - self.open_records]
+            self._write_batch(batch)
+            start += len(batch)
+            if self.open_records == self.segment_records:
+                self.seal()
+        return range(first, first + len(records))
+
+    def append_frame(self, frame):
+        """
+        Appends the rows of a DataFrame as JSON records, one per row, with timestamps in ISO format and floats
+        at full precision.
+
+        :return: range of the record ids assigned to the rows.
+        """
+        if frame.empty:
+            return range(len(self), len(self))
+        lines = frame.to_json(orient='records', lines=True, date_format='iso', date_unit='ns',
+                              double_precision=15)
+        # JSON escapes newlines inside values, so every line is one row
+        return self.append(lines.rstrip('\n').split('\n'))
+
+    def _write_batch(self, records):
+        leaves = hash_leaves(records, self.workers)
+        lengths = np.fromiter(map(len, records), dtype=np.uint64, count=len(records))
+        ends = self._data_size + np.cumsum(lengths, dtype=np.uint64)
+        data, index, leaf_file = self._files
+        # Leaf hashes are written last: a record counts once its leaf is on disk
+        data.write(b''.join(records))
+        index.write(ends.astype('<u8').tobytes())
+        leaf_file.write(leaves)
+        for handle in self._files:
+            handle.flush()
+            if self.durable:
+                os.fsync(handle.fileno())
+        self._data_size = int(ends[-1])
+        self.open_records += len(records)
+        if self._open_levels is not None:
+            extend_levels(self._open_levels, leaves)
+
+    def seal(self):
+        """
+        Seals the open segment: writes its Merkle tree, chains its root to the previous segment's and records
+        both, with the segment's record count, in the manifest. Appends continue in a new segment. Called
+        automatically when a segment is full; calling it on a partially filled segment checkpoints the records
+        appended so far, which gain tamper evidence through the chain.
+        """
+        if self.open_records == 0:
+            return
+        segment = self.sealed_segments
+        levels = self._levels(segment)
+        root = bytes(levels[-1])
+        for handle in self._files:
+            handle.close()
+        tree_path = _segment_path(self.directory, segment, 'tree')
+        with open(tree_path + '.tmp', 'wb') as tree_file:
+            for level in levels[1:]:
+                tree_file.write(level)
+            if self.durable:
+                os.fsync(tree_file.fileno())
+        os.replace(tree_path + '.tmp', tree_path)
+
+        previous = bytes.fromhex(self.manifest['segments'][-1]['chain']) if segment else GENESIS
+        self.manifest['segments'].append({'segment': segment, 'records': self.open_records, 'bytes': self._data_size,
+                                          'root': root.hex(), 'chain': chain_link(previous, root).hex()})
+        self._save_manifest()
+        self._starts.append(self._starts[-1] + self.open_records)
+        self._open_segment()
+
+    def _save_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + '.tmp', 'w') as manifest_file:
+            json.dump(self.manifest, manifest_file, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def _levels(self, segment):
+        """
+        :return: The leaves and tree levels of a segment; memory-mapped for sealed segments, kept in memory for
+                 the open one (built from its leaf hashes, not the records, on first use and extended by
+                 every batch after that).
+        """
+        if segment < self.sealed_segments:
+            if segment not in self._sealed:
+                count = self.manifest['segments'][segment]['records']
+                leaves = _map(_segment_path(self.directory, segment, 'leaves'))
+                tree = _map(_segment_path(self.directory, segment, 'tree'))
+                self._sealed[segment] = {'data': _map(_segment_path(self.directory, segment, 'data')),
+                                         'index': _map(_segment_path(self.directory, segment, 'index')),
+                                         'levels': _split_levels(memoryview(leaves), memoryview(tree), count)}
+            return self._sealed[segment]['levels']
+        if self._open_levels is None:
+            with open(_segment_path(self.directory, segment, 'leaves'), 'rb') as leaf_file:
+                leaves = leaf_file.read()
+            self._open_levels = extend_levels([], leaves) if leaves else [bytearray()]
+        return self._open_levels
+
+    def _locate(self, record_id):
+        if not 0 <= record_id < len(self):
+            raise IndexError(f"Record {record_id} is not in the store ({len(self)} records).")
+        segment = bisect.bisect_right(self._starts, record_id) - 1
+        return segment, record_id - self._starts[segment]
+
+    def read(self, record_id):
+        """
+        :return: The bytes of a record.
+        """
+        segment, position = self._locate(record_id)
+        if segment < self.sealed_segments:
+            self._levels(segment)
+            index, data = self._sealed[segment]['index'], self._sealed[segment]['data']
+            ends = np.frombuffer(index, dtype='<u8')
+            start = int(ends[position - 1]) if position else 0
+            return bytes(data[start:int(ends[position])])
+        path = _segment_path(self.directory, segment, 'index')
+        ends = np.fromfile(path, dtype='<u8', count=position + 1)
+        start = int(ends[position - 1]) if position else 0
+        with open(_segment_path(self.directory, segment, 'data'), 'rb') as data_file:
+            data_file.seek(start)
+            return data_file.read(int(ends[position]) - start)
+
+    def proof(self, record_id):
+        """
+        Builds the inclusion proof of a record against its segment root.
+
+        :param record_id: Global id of the record.
+        :return: Dict with the record id, segment, position, leaf hash, path of (sibling hash, side) pairs,
+                 segment root, and the segment's chain link (None while the segment is open).
+        """
+        segment, position = self._locate(record_id)
+        levels = self._levels(segment)
+        sealed = segment < self.sealed_segments
+        return {
+            'record_id': record_id,
+            'segment': segment,
+            'position': position,
+            'leaf': bytes(levels[0][position * HASH_SIZE:(position + 1) * HASH_SIZE]),
+            'path': inclusion_path(levels, position),
+            'root': bytes(levels[-1][:HASH_SIZE]),
+            'chain': bytes.fromhex(self.manifest['segments'][segment]['chain']) if sealed else None,
+        }
+
+    @staticmethod
+    def verify_proof(record, proof):
+        """
+        Checks that a record is the leaf of a proof and that the proof's path leads to its root.
+        """
+        record = record.encode() if isinstance(record, str) else record
+        return leaf_hash(record) == proof['leaf'] and verify_path(proof['leaf'], proof['path'], proof['root'])
+
+    def verify_segment(self, segment):
+        """
+        Re-hashes every record of a segment from its memory-mapped data file and checks the leaf hashes and the
+        tree. For a sealed segment the root must also match the manifest; the open segment, which has no
+        recorded root yet, is checked against the tree kept in memory while appending.
+
+        :return: Dict with the segment, its record count, whether it is sealed, whether the data, leaves, tree
+                 and root match, and 'valid' when they all do.
+        """
+        sealed = segment < self.sealed_segments
+        levels = self._levels(segment)
+        if sealed:
+            entry = self.manifest['segments'][segment]
+            index, data = self._sealed[segment]['index'], self._sealed[segment]['data']
+            expected_records, expected_bytes, expected_root = entry['records'], entry['bytes'], entry['root']
+        else:
+            index = _map(_segment_path(self.directory, segment, 'index'))
+            data = _map(_segment_path(self.directory, segment, 'data'))
+            expected_records, expected_bytes = self.open_records, self._data_size
+            expected_root = bytes(levels[-1][:HASH_SIZE]).hex() if self.open_records else None
+        ends = np.frombuffer(index, dtype='<u8').astype(np.int64)
+        starts = np.concatenate([[0], ends[:-1]])
+        data = memoryview(data)
+        leaves = hash_leaves([data[start:end] for start, end in zip(starts.tolist(), ends.tolist())], self.workers)
+        rebuilt = build_levels(leaves)
+        root = rebuilt[-1] if rebuilt else leaves
+        result = {
+            'segment': segment,
+            'records': len(ends),
+            'sealed': sealed,
+            'data_matches': len(ends) == expected_records and (int(ends[-1]) if len(ends) else 0) == expected_bytes,
+            'leaves_match': leaves == levels[0],
+            'tree_matches': all(level == stored for level, stored in zip(rebuilt, levels[1:])),
+            'root_matches': (root.hex() if leaves else None) == expected_root,
+        }
+        result['valid'] = all(result[check] for check in SEGMENT_CHECKS)
+        return result
+
+    def verify_chain(self):
+        """
+        Recomputes the chain over the segment roots in the manifest.
+
+        :return: Index of the first segment whose link does not match, or None when the chain is intact.
+        """
+        previous = GENESIS
+        for entry in self.manifest['segments']:
+            previous = chain_link(previous, bytes.fromhex(entry['root']))
+            if previous.hex() != entry['chain']:
+                return entry['segment']
+        return None
+
+    def verify(self):
+        """
+        Verifies every sealed segment, the open segment's records and the chain.
+
+        :return: Dict with 'segments' (results of verify_segment, the open segment last when it has records),
+                 'chain_break' and 'valid'.
+        """
+        opened = self.sealed_segments + (1 if self.open_records else 0)
+        segments = [self.verify_segment(segment) for segment in range(opened)]
+        chain_break = self.verify_chain()
+        valid = chain_break is None and all(result['valid'] for result in segments)
+        return {'segments': segments, 'chain_break': chain_break, 'valid': valid}
+
+    def close(self):
+        """
+        Closes the open segment files and the memory maps of sealed segments.
+        """
+        for handle in self._files:
+            handle.close()
+        # A mapping is unmapped once the last view into it is released
+        self._sealed = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
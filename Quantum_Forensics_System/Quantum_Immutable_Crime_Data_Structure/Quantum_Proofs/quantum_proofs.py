@@ -0,0 +1,171 @@
+# quantum_proofs.py
+# Merkle trees and inclusion proofs for the immutable evidence store. Leaves and inner nodes are SHA-256
+# hashes with distinct one-byte prefixes, so a leaf can never be passed off as an inner node. A level with an
+# odd number of nodes promotes its last node unchanged. Each level is one contiguous bytes object of 32-byte
+# hashes, so a tree can be written to disk as is and proofs are read back from a memory map, one slice per
+# level. Segment roots are chained, each link hashing the previous link with the next root, so rewriting any
+# sealed segment changes every later link.
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Size of every hash in bytes
+HASH_SIZE = 32
+
+# Domain separation prefixes of leaf, inner-node and chain-link hashes
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+CHAIN_PREFIX = b'\x02'
+
+# Chain link preceding the first segment
+GENESIS = bytes(HASH_SIZE)
+
+# Records hashed per thread-pool task
+DEFAULT_HASH_BATCH = 16_384
+
+_LEAF_HASH = hashlib.sha256(LEAF_PREFIX)
+_NODE_HASH = hashlib.sha256(NODE_PREFIX)
+
+def _hash_records(records):
+    digests = []
+    for record in records:
+        digest = _LEAF_HASH.copy()
+        digest.update(record)
+        digests.append(digest.digest())
+    return b''.join(digests)
+
+def hash_leaves(records, workers=None, batch_size=DEFAULT_HASH_BATCH):
+    """
+    Hashes records into Merkle leaves. Batches are spread over a thread pool; hashlib releases the GIL for
+    inputs of 2 KiB and more, so large records hash in parallel while small ones cost little either way.
+
+    :param records: Sequence of bytes-like records.
+    :param workers: Number of threads; with 1, or a single batch, the records are hashed in the calling thread.
+    :param batch_size: Records per thread-pool task.
+    :return: The leaf hashes concatenated into one bytes object, HASH_SIZE bytes per record.
+    """
+    if workers == 1 or len(records) <= batch_size:
+        return _hash_records(records)
+    batches = [records[start:start + batch_size] for start in range(0, len(records), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return b''.join(pool.map(_hash_records, batches))
+
+def hash_level(level):
+    """
+    Hashes one tree level into the next: each pair of nodes into its parent, an unpaired last node promoted.
+
+    :param level: Concatenated 32-byte node hashes.
+    :return: The concatenated hashes of the level above.
+    """
+    pair = 2 * HASH_SIZE
+    paired = len(level) - len(level) % pair
+    parents = []
+    for start in range(0, paired, pair):
+        digest = _NODE_HASH.copy()
+        digest.update(level[start:start + pair])
+        parents.append(digest.digest())
+    parents.append(bytes(level[paired:]))
+    return b''.join(parents)
+
+def level_sizes(leaves):
+    """
+    :return: Number of nodes on each level, from the leaves up to the root.
+    """
+    sizes = [leaves]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+def build_levels(leaves):
+    """
+    Builds every level above the leaves.
+
+    :param leaves: Concatenated leaf hashes, at least one.
+    :return: List of the levels above the leaves, the last one being the root.
+    """
+    levels = []
+    level = leaves
+    while len(level) > HASH_SIZE:
+        level = hash_level(level)
+        levels.append(level)
+    return levels
+
+def extend_levels(levels, leaves):
+    """
+    Appends leaves to a tree kept in memory, re-hashing only the nodes whose subtrees changed: on every level,
+    the parents of the new nodes and of the last old node, which may have been promoted without a sibling.
+    Appending a batch of b leaves to a tree of n costs O(b + log n) hashes.
+
+    :param levels: List of bytearrays, the leaves followed by the levels above them (empty for a new tree);
+                   extended in place.
+    :param leaves: Concatenated hashes of the new leaves.
+    :return: The levels.
+    """
+    if not levels:
+        levels.append(bytearray())
+    changed = len(levels[0]) // HASH_SIZE
+    levels[0] += leaves
+    depth = 0
+    while len(levels[depth]) > HASH_SIZE:
+        if depth + 1 == len(levels):
+            levels.append(bytearray())
+        first = changed // 2
+        parent = levels[depth + 1]
+        del parent[first * HASH_SIZE:]
+        parent += hash_level(memoryview(levels[depth])[2 * first * HASH_SIZE:])
+        changed = first
+        depth += 1
+    return levels
+
+def merkle_root(leaves):
+    """
+    :return: Root of the tree over the concatenated leaf hashes.
+    """
+    levels = build_levels(leaves)
+    return levels[-1] if levels else bytes(leaves[:HASH_SIZE])
+
+def inclusion_path(levels, index):
+    """
+    Reads the sibling hashes that connect a leaf to the root.
+
+    :param levels: The leaves followed by every level above them, each a bytes-like object of concatenated
+                   hashes (e.g. slices of a memory-mapped tree file).
+    :param index: Position of the leaf.
+    :return: List of (sibling hash, side) pairs from the leaf up, side being 'left' or 'right'; levels where
+             the node is promoted without a sibling contribute no pair.
+    """
+    path = []
+    for level in levels[:-1]:
+        nodes = len(level) // HASH_SIZE
+        sibling = index ^ 1
+        if sibling < nodes:
+            path.append((bytes(level[sibling * HASH_SIZE:(sibling + 1) * HASH_SIZE]), 'left' if sibling < index else 'right'))
+        index //= 2
+    return path
+
+def verify_path(leaf, path, root):
+    """
+    Folds an inclusion path from a leaf hash and compares the result with the root.
+
+    :param leaf: The 32-byte leaf hash.
+    :param path: (sibling hash, side) pairs as returned by inclusion_path.
+    :param root: Expected 32-byte root.
+    :return: True if the path connects the leaf to the root.
+    """
+    node = leaf
+    for sibling, side in path:
+        pair = sibling + node if side == 'left' else node + sibling
+        node = hashlib.sha256(NODE_PREFIX + pair).digest()
+    return node == root
+
+def leaf_hash(record):
+    """
+    :return: The leaf hash of one record.
+    """
+    return hashlib.sha256(LEAF_PREFIX + bytes(record)).digest()
+
+def chain_link(previous, root):
+    """
+    :return: The chain link committing to the previous link and the next segment root.
+    """
+    return hashlib.sha256(CHAIN_PREFIX + previous + root).digest()
@@ -1,8 +1,153 @@
 
 # historical_data_ingestion.py
 
+import hashlib
+import importlib
+import io
+import json
+import logging
+import os
+import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from pandas.tseries.api import guess_datetime_format
+from instrumentation import Instrumentation, instrumented
+from integrity_check import IntegrityChecker
+from parallel_ingestion import (DEFAULT_PARALLEL_FINEST, DEFAULT_PARTITION_BYTES, DEFAULT_WORKER_MEMORY_BYTES, plan_tasks,
+                                run_partitions)
+from rollup_cache import RollupStore
+from series_decimation import DEFAULT_MAX_POINTS, decimate, rollup_envelope
+from stream_statistics import DEFAULT_SKETCH_K, StatisticsAccumulator
+from time_index import TimeIndexedStore
+from time_units import epoch_units, time_components
+
+# Directory of the evidence store, a plain script in Quantum_Immutable_Crime_Data_Structure/Immutable_Data
+EVIDENCE_STORE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                                   'Quantum_Immutable_Crime_Data_Structure', 'Immutable_Data'))
+
+# Directory of the silo assimilation engine, a plain script in Silo_Assimilation_Preprocessing/Assimilation_Engine
+SILO_ENGINE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                                'Silo_Assimilation_Preprocessing', 'Assimilation_Engine'))
+
+# Default number of rows read per chunk by the streaming pipeline
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Maximum number of rows per Parquet row group in the columnar store
+DEFAULT_ROW_GROUP_SIZE = 256_000
+
+# Number of bytes read from the source per step of an incremental run
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Number of bytes before the watermark that are checksummed to detect a rewritten source
+WATERMARK_CHECK_BYTES = 64 * 1024
+
+# Logger the ingestion stages and progress messages are reported through
+LOGGER_NAME = 'HistoricalDataIngestion'
+
+# Log file of the stage records and progress messages
+DEFAULT_LOG_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Logs', 'refinement_log.log'))
+
+# Log file the per-stage summary of a finalized ingestion is written to
+INGESTION_LOG_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                                   'Data_Ingestion_Integration', 'Logs', 'data_ingestion.log'))
+
+# Readable interval names accepted alongside pandas frequency aliases
+INTERVAL_ALIASES = {
+    'nanosecond': 'ns',
+    'microsecond': 'us',
+    'millisecond': 'ms',
+    'second': 's',
+    'minute': 'min',
+    'hour': 'h',
+    'day': 'D',
+    'week': 'W',
+    'month': 'MS',
+    'year': 'YS',
+}
+
+# Precisions pandas may use when writing timestamps as text, from coarsest to finest
+_DATETIME_UNIT_ORDER = ['D', 's', 'ms', 'us', 'ns']
+
+def _common_dtype(dtypes):
+    """
+    Resolves the dtype pandas would have inferred for a column read in one piece from the dtypes
+    inferred for each of its chunks.
+
+    :param dtypes: The per-chunk dtypes of a single column.
+    :return: The combined dtype.
+    """
+    unique = list(dict.fromkeys(dtypes))
+    if len(unique) == 1:
+        return unique[0]
+    if all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in unique):
+        return np.result_type(*unique)
+    return object
+
+def _interval_nanos(time_interval):
+    """
+    Converts a fixed-length aggregation interval to an integer number of nanoseconds.
+
+    :param time_interval: An interval name (e.g. 'hour') or pandas alias (e.g. '15min', 'D').
+    :return: The interval length in nanoseconds.
+    """
+    alias = INTERVAL_ALIASES.get(time_interval, time_interval)
+    try:
+        return pd.Timedelta(alias if alias[0].isdigit() else '1' + alias).value
+    except ValueError:
+        raise ValueError(f"Interval {time_interval!r} does not have a fixed length.")
+
+def _watermark_checksum(source, header, offset):
+    """
+    Checksums the header and the bytes immediately before the watermark, so a source that was rewritten
+    rather than appended to is detected without rereading everything already ingested.
+
+    :param source: An open binary file positioned anywhere.
+    :param header: The header line of the source.
+    :param offset: The watermark byte offset.
+    :return: Hex digest of the checked bytes.
+    """
+    start = max(len(header), offset - WATERMARK_CHECK_BYTES)
+    source.seek(start)
+    digest = hashlib.sha256(header)
+    digest.update(source.read(offset - start))
+    return digest.hexdigest()
+
+def _datetime_text_unit(timestamps):
+    """
+    Finds the coarsest unit that renders every timestamp without losing precision, mirroring the
+    precision pandas picks when it writes a datetime column to CSV.
+
+    :param timestamps: A datetime64 Series.
+    :return: One of 'D', 's', 'ms', 'us' or 'ns'.
+    """
+    ns = timestamps.astype('datetime64[ns]').to_numpy().view('i8')
+    for unit, step in (('D', 86_400_000_000_000), ('s', 1_000_000_000), ('ms', 1_000_000), ('us', 1_000)):
+        if not (ns % step).any():
+            return unit
+    return 'ns'
+
+def _import_script(directory, name):
+    """
+    Imports a plain script from another tree of the system when a stage first needs it, so ingestion itself
+    does not depend on that tree.
+
+    :param directory: Directory of the script.
+    :param name: Module name of the script.
+    :return: The imported module.
+    """
+    if directory not in sys.path:
+        sys.path.append(directory)
+    return importlib.import_module(name)
+
+def _frame_rows(ingestion, result):
+    return len(ingestion.data) if ingestion.data is not None else None
+
+def _result_rows(ingestion, result):
+    return len(result) if result is not None else None
+
+def _source_bytes(ingestion, result):
+    return os.path.getsize(ingestion.data_source) if os.path.isfile(ingestion.data_source) else None
 
 class HistoricalDataIngestion:
     """
@@ -10,30 +155,120 @@ class HistoricalDataIngestion:
     It preprocesses the data for use in a self-refining temporal learning system.
     """
 
-    def __init__(self, data_source, start_time, end_time):
+    def __init__(self, data_source, start_time, end_time, instrumentation=None):
         """
         Initializes the data ingestion process.
 
         :param data_source: The source of historical data (file, database, API, etc.)
         :param start_time: The start time for the data ingestion.
         :param end_time: The end time for the data ingestion.
+        :param instrumentation: Instrumentation every stage reports through; by default stages and messages
+                                are logged to Logs/refinement_log.log.
         """
+        self.instrumentation = instrumentation or Instrumentation(LOGGER_NAME, DEFAULT_LOG_PATH)
         self.data_source = data_source
         self.start_time = start_time
         self.end_time = end_time
-        self.data = None
+        self._data = None
+        self.rollups = None
+        self.time_index = None
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, frame):
+        # Structures derived from the rows describe the frame they were built from, not its replacement
+        self._data = frame
+        self._drop_derived()
+
+    def _drop_derived(self):
+        """
+        Drops the rollup store and the time index, which no longer match the rows once they are replaced or
+        changed.
+        """
+        self.rollups = None
+        self.time_index = None
 
-    def load_data(self):
+    @instrumented(rows=_frame_rows, bytes_read=_source_bytes)
+    def load_data(self, columns=None):
         """
         Loads historical data from the specified source.
-        Assumes the data source is a CSV file for the prototype.
+        A directory is read as a columnar store written by save_columnar; anything else is read as a CSV file.
+
+        :param columns: Optional list of columns to load from a columnar store.
         """
+        if os.path.isdir(self.data_source):
+            self.load_columnar(self.data_source, columns=columns)
+            return
         try:
             self.data = pd.read_csv(self.data_source)
-            print(f"Data loaded successfully from {self.data_source}")
+            self.instrumentation.info("Data loaded successfully from %s", self.data_source)
         except Exception as e:
-            print(f"Error loading data: {e}")
+            self.instrumentation.error("Error loading data: %s", e)
 
+    @instrumented(rows=_frame_rows)
+    def load_columnar(self, dataset_path, columns=None):
+        """
+        Loads the rows between start_time and end_time from a Parquet store partitioned by year and month.
+        Only partitions overlapping the window are opened, row groups whose timestamp statistics fall outside
+        it are skipped, and only the requested columns are decoded.
+
+        :param dataset_path: Directory of the columnar store written by save_columnar.
+        :param columns: Optional list of columns to load; 'timestamp' is always included.
+        """
+        try:
+            import pyarrow.dataset as ds
+
+            dataset = ds.dataset(dataset_path, format='parquet', partitioning='hive')
+            start = pd.Timestamp(self.start_time)
+            end = pd.Timestamp(self.end_time)
+            year = ds.field('year')
+            month = ds.field('month')
+            window = (
+                ((year > start.year) | ((year == start.year) & (month >= start.month)))
+                & ((year < end.year) | ((year == end.year) & (month <= end.month)))
+                & (ds.field('timestamp') >= start.to_pydatetime())
+                & (ds.field('timestamp') <= end.to_pydatetime())
+            )
+            if columns is not None:
+                columns = ['timestamp'] + [column for column in columns if column != 'timestamp']
+            else:
+                columns = [name for name in dataset.schema.names if name not in ('year', 'month')]
+
+            self.data = dataset.to_table(columns=columns, filter=window).to_pandas()
+            if not self.data['timestamp'].is_monotonic_increasing:
+                self.data = self.data.sort_values('timestamp', kind='stable', ignore_index=True)
+            self.instrumentation.info("Columnar data loaded successfully from %s (%s rows).", dataset_path, len(self.data))
+        except Exception as e:
+            self.instrumentation.error("Error loading columnar data: %s", e)
+
+    @instrumented(rows=_frame_rows)
+    def load_from_silos(self, sources=None, mapping_path=None, rules_path=None, workers=None,
+                        chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Loads the data from the silos in source_mapping.json, preprocessed by the rule sets in rules_config.json.
+        The silos are read concurrently, chunk by chunk, through their compiled rule plans, so the rows arrive
+        already renamed, typed, normalized and filtered; preprocess_data is not needed afterwards.
+
+        :param sources: Silo names; all configured silos when omitted.
+        :param mapping_path: The source mapping file; the engine's source_mapping.json when omitted.
+        :param rules_path: The preprocessing rules file; the engine's rules_config.json when omitted.
+        :param workers: Number of silos read at a time; all of them when omitted.
+        :param chunksize: Rows per chunk read from a silo.
+        """
+        try:
+            silo_assimilator = _import_script(SILO_ENGINE_DIR, 'silo_assimilator')
+            assimilator = silo_assimilator.SiloAssimilator(mapping_path or silo_assimilator.DEFAULT_MAPPING_PATH,
+                                                           rules_path or silo_assimilator.DEFAULT_RULES_PATH)
+            self.data = assimilator.assimilate(sources, workers, chunksize)
+            self.instrumentation.info("Data loaded successfully from %s silos (%s rows).",
+                                      len(assimilator.sources if sources is None else sources), len(self.data))
+        except Exception as e:
+            self.instrumentation.error("Error loading data from silos: %s", e)
+
+    @instrumented(rows=_frame_rows)
     def preprocess_data(self):
         """
         Preprocesses the historical data, including cleaning, normalizing, and preparing it
@@ -46,172 +281,701 @@ class HistoricalDataIngestion:
             # Convert time columns to datetime format for temporal analysis
             if 'timestamp' in self.data.columns:
                 self.data['timestamp'] = pd.to_datetime(self.data['timestamp'])
+            self._drop_derived()
+
+            self.instrumentation.info("Data preprocessing complete.")
+        else:
+            self.instrumentation.warning("No data to preprocess. Load the data first.")
 
-            print("Data preprocessing complete.")
+    @instrumented(rows=_frame_rows)
+    def build_time_index(self):
+        """
+        Builds a timestamp-sorted index over the preprocessed data. Once built, filter_data_by_time and
+        query_window answer with binary searches and zero-copy slices instead of boolean masks, and
+        incremental ingestion appends new rows to it as sorted runs. Loading, preprocessing, filtering or
+        otherwise replacing the data drops it.
+        """
+        if self.data is not None:
+            self.time_index = TimeIndexedStore.from_frame(self.data)
+            self.instrumentation.info("Time index built over %s rows.", len(self.time_index))
         else:
-            print("No data to preprocess. Load the data first.")
+            self.instrumentation.warning("No data to index. Load and preprocess the data first.")
+
+    @instrumented(rows=_result_rows)
+    def query_window(self, start_time, end_time):
+        """
+        Returns the indexed rows with start_time <= timestamp <= end_time, in timestamp order, without changing
+        the loaded data. Requires build_time_index.
+
+        :param start_time: Window start (inclusive).
+        :param end_time: Window end (inclusive).
+        :return: DataFrame whose numeric columns are views into the index where possible.
+        """
+        if self.time_index is not None:
+            return self.time_index.query(start_time, end_time)
+        self.instrumentation.warning("No time index available. Build it with build_time_index first.")
 
+    @instrumented(rows=_frame_rows)
     def filter_data_by_time(self):
         """
         Filters the historical data based on the provided start and end time intervals.
+        With a time index built, the window is read from the index (rows come back in timestamp order).
         """
-        if self.data is not None:
+        if self.time_index is not None:
+            self.data = self.time_index.query(self.start_time, self.end_time)
+            self.instrumentation.info("Data filtered between %s and %s using the time index.", self.start_time, self.end_time)
+        elif self.data is not None:
             # Filter data within the specified time range
             self.data = self.data[(self.data['timestamp'] >= self.start_time) & (self.data['timestamp'] <= self.end_time)]
-            print(f"Data filtered between {self.start_time} and {self.end_time}.")
+            self.instrumentation.info("Data filtered between %s and %s.", self.start_time, self.end_time)
+        else:
+            self.instrumentation.warning("No data to filter. Load the data first.")
+
+    @instrumented(bytes_read=_source_bytes)
+    def stream_filtered_data(self, output_path, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Runs the load, preprocess, filter and save steps as a streaming pipeline that reads the source in
+        bounded chunks, so peak memory depends on the chunk size rather than on the size of the source.
+        The output is identical to running load_data, preprocess_data, filter_data_by_time and
+        save_filtered_data in memory.
+
+        The source is read twice: a profiling pass resolves the column dtypes and the timestamp precision
+        that a single in-memory read would have produced, and a second pass filters and writes each chunk.
+
+        :param output_path: The file path where the filtered data will be saved.
+        :param chunksize: Number of rows read from the source per chunk.
+        """
+        try:
+            chunk_dtypes = {}
+            timestamp_format = None
+            unit_index = 0
+            for chunk in pd.read_csv(self.data_source, chunksize=chunksize):
+                for column, dtype in chunk.dtypes.items():
+                    chunk_dtypes.setdefault(column, []).append(dtype)
+                chunk = chunk.dropna()
+                if chunk.empty:
+                    continue
+                if timestamp_format is None:
+                    timestamp_format = guess_datetime_format(str(chunk['timestamp'].iloc[0]))
+                timestamps = pd.to_datetime(chunk['timestamp'], format=timestamp_format)
+                timestamps = timestamps[(timestamps >= self.start_time) & (timestamps <= self.end_time)]
+                if not timestamps.empty:
+                    unit_index = max(unit_index, _DATETIME_UNIT_ORDER.index(_datetime_text_unit(timestamps)))
+
+            dtypes = {column: _common_dtype(found) for column, found in chunk_dtypes.items()}
+            dtypes.pop('timestamp', None)
+            unit = _DATETIME_UNIT_ORDER[unit_index]
+
+            header = True
+            rows_written = 0
+            for chunk in pd.read_csv(self.data_source, chunksize=chunksize, dtype=dtypes):
+                self.instrumentation.active.add(rows=len(chunk))
+                chunk = chunk.dropna()
+                timestamps = pd.to_datetime(chunk['timestamp'], format=timestamp_format)
+                chunk = chunk[(timestamps >= self.start_time) & (timestamps <= self.end_time)].copy()
+                timestamps = timestamps[chunk.index]
+                if pd.api.types.is_datetime64_dtype(timestamps) and not chunk.empty:
+                    text = np.datetime_as_string(timestamps.to_numpy(), unit=unit)
+                    chunk['timestamp'] = np.char.replace(text, 'T', ' ')
+                else:
+                    chunk['timestamp'] = timestamps
+                chunk.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+                header = False
+                rows_written += len(chunk)
+
+            if header:
+                pd.read_csv(self.data_source, nrows=0).to_csv(output_path, index=False)
+            self.instrumentation.info("Streamed %s rows between %s and %s to %s.", rows_written, self.start_time, self.end_time, output_path)
+        except Exception as e:
+            self.instrumentation.error("Error streaming filtered data: %s", e)
+
+    @instrumented(rows=_frame_rows)
+    def save_columnar(self, dataset_path, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        """
+        Saves the preprocessed data as a Parquet store partitioned into year=/month= directories.
+        Rows are written in timestamp order so that each row group carries tight min/max statistics
+        for load_columnar to prune against. Partitions present in the new data are replaced.
+
+        :param dataset_path: Directory where the columnar store will be written.
+        :param row_group_size: Maximum number of rows per Parquet row group.
+        """
+        if self.data is not None:
+            try:
+                import pyarrow as pa
+                import pyarrow.compute as pc
+                import pyarrow.dataset as ds
+
+                data = self.data.sort_values('timestamp', kind='stable')
+                table = pa.Table.from_pandas(data, preserve_index=False)
+                table = table.append_column('year', pc.year(table['timestamp']).cast(pa.int32()))
+                table = table.append_column('month', pc.month(table['timestamp']).cast(pa.int8()))
+                ds.write_dataset(
+                    table,
+                    dataset_path,
+                    format='parquet',
+                    partitioning=ds.partitioning(pa.schema([('year', pa.int32()), ('month', pa.int8())]), flavor='hive'),
+                    max_rows_per_group=row_group_size,
+                    max_rows_per_file=max(row_group_size, len(table)),
+                    existing_data_behavior='delete_matching',
+                )
+                self.instrumentation.info("Columnar data saved successfully to %s.", dataset_path)
+            except Exception as e:
+                self.instrumentation.error("Error saving columnar data: %s", e)
         else:
-            print("No data to filter. Load the data first.")
+            self.instrumentation.warning("No data to save. Load and preprocess the data first.")
 
+    @instrumented(rows=_frame_rows)
     def save_filtered_data(self, output_path):
         """
         Saves the filtered historical data to the specified output path.
+        Paths ending in '.parquet' are written as a single Parquet file, anything else as CSV.
         
         :param output_path: The file path where the filtered data will be saved.
         """
         if self.data is not None:
             try:
-                self.data.to_csv(output_path, index=False)
-                print(f"Filtered data saved successfully to {output_path}.")
+                if output_path.endswith('.parquet'):
+                    self.data.to_parquet(output_path, index=False)
+                else:
+                    self.data.to_csv(output_path, index=False)
+                self.instrumentation.info("Filtered data saved successfully to %s.", output_path)
             except Exception as e:
-                print(f"Error saving filtered data: {e}")
+                self.instrumentation.error("Error saving filtered data: %s", e)
         else:
-            print("No data to save. Load and filter the data first.")
+            self.instrumentation.warning("No data to save. Load and filter the data first.")
 
+    @instrumented(rows=_frame_rows)
+    def append_to_evidence_store(self, store_path, segment_records=None):
+        """
+        Appends the current rows to the append-only evidence store, one JSON record per row. Unlike
+        save_filtered_data nothing is overwritten: every row gets a record id with a Merkle inclusion proof,
+        and sealed segments are chained so later tampering is detectable.
+
+        :param store_path: Directory of the evidence store, created on first use.
+        :param segment_records: Records per segment; must match an existing store. The store's default when omitted.
+        :return: range of the record ids assigned to the rows.
+        """
+        if self.data is not None:
+            try:
+                immutable_storage = _import_script(EVIDENCE_STORE_DIR, 'immutable_storage')
+                segment_records = segment_records or immutable_storage.DEFAULT_SEGMENT_RECORDS
+                with immutable_storage.ImmutableStore(store_path, segment_records) as store:
+                    record_ids = store.append_frame(self.data)
+                self.instrumentation.info("Appended %s rows to the evidence store at %s as records %s to %s.",
+                                          len(record_ids), store_path, record_ids.start, record_ids.stop - 1)
+                return record_ids
+            except Exception as e:
+                self.instrumentation.error("Error appending to the evidence store: %s", e)
+        else:
+            self.instrumentation.warning("No data to store. Load and filter the data first.")
+
+    @instrumented(rows=_frame_rows)
+    def build_rollups(self, finest='ms'):
+        """
+        Builds the multi-resolution rollup store from the preprocessed data. Once built, aggregate_data serves
+        every interval it can derive from the store without rescanning the raw rows, and incremental ingestion
+        merges new rows into it. Loading, preprocessing, filtering or otherwise replacing the data drops it.
+
+        :param finest: The finest rollup level to maintain, from 'ns' up to 'century'.
+        """
+        if self.data is not None:
+            columns = [c for c in self.data.columns if c != 'timestamp' and pd.api.types.is_numeric_dtype(self.data[c])]
+            self.rollups = RollupStore(columns, finest=finest)
+            self.rollups.update(self.data)
+            self.instrumentation.info("Rollups built from '%s' to 'century' for columns %s.", finest, columns)
+        else:
+            self.instrumentation.warning("No data to build rollups from. Load and preprocess the data first.")
+
+    def _rollup_serves(self, alias):
+        """
+        Tells whether an aggregation interval can be read from the rollup store with the same buckets
+        resample() would produce. Fixed-length intervals qualify when they divide a day, since resample
+        anchors sub-daily bins at midnight.
+
+        :param alias: A pandas frequency alias or rollup level name.
+        """
+        if self.rollups is None:
+            return False
+        if alias in self.rollups.buckets:
+            return True
+        try:
+            nanos = _interval_nanos(alias)
+        except ValueError:
+            return False
+        finest = self.rollups.levels[0]
+        return finest[1] == 'ns' and nanos % finest[2] == 0 and _interval_nanos('day') % nanos == 0
+
+    @instrumented(rows=_frame_rows)
     def aggregate_data(self, time_interval='minute'):
         """
         Aggregates the historical data based on the specified time interval.
+        Intervals the rollup store can serve (see build_rollups) are merged from precomputed buckets,
+        including the 'decade' and 'century' levels; anything else is resampled from the raw rows.
         
         :param time_interval: Time interval for data aggregation (e.g., 'minute', 'hour', 'day').
         """
+        alias = INTERVAL_ALIASES.get(time_interval, time_interval)
+        if self._rollup_serves(alias):
+            resampled_data = self.rollups.aggregate(alias)
+            self.instrumentation.info("Data aggregated by %s from rollups.", time_interval)
+            return resampled_data
         if self.data is not None:
             # Resample data based on the specified time interval
-            resampled_data = self.data.set_index('timestamp').resample(time_interval).mean()
-            print(f"Data aggregated by {time_interval}.")
+            resampled_data = self.data.set_index('timestamp').resample(alias).mean()
+            self.instrumentation.info("Data aggregated by %s.", time_interval)
             return resampled_data
         else:
-            print("No data to aggregate. Load and preprocess the data first.")
+            self.instrumentation.warning("No data to aggregate. Load and preprocess the data first.")
+
+    @instrumented()
+    def ingest_incremental(self, state_path, time_interval='day', chunk_bytes=DEFAULT_CHUNK_BYTES):
+        """
+        Ingests only the rows appended to the source since the previous run and merges them into per-bucket
+        aggregates persisted in a watermark state file. The state records the byte offset of the last complete
+        row ingested, the last timestamp seen, a checksum of the header and the bytes just before the offset,
+        the time window, and the per-bucket row counts and column sums. It is rewritten atomically after every
+        chunk, so an interrupted run resumes from its last committed chunk. If the checksum no longer matches,
+        the source was rewritten, and if the window or interval changed, rows ingested before were filtered or
+        bucketed differently; either way it is ingested again from the start.
+
+        Rows are cleaned and filtered to [start_time, end_time] like preprocess_data and filter_data_by_time,
+        and bucketed by flooring the timestamp to a fixed-length interval. The new rows of this run are left
+        in self.data and merged into the rollup store and time index when built; the merged aggregates are
+        returned in the shape produced by aggregate_data.
+
+        :param state_path: The file path of the watermark state, created on the first run.
+        :param time_interval: Fixed-length bucket interval, e.g. 'minute', 'hour', 'day' or '15min'.
+        :param chunk_bytes: Number of bytes read from the source per committed step.
+        :return: DataFrame of per-bucket means of the numeric columns.
+        """
+        try:
+            step = _interval_nanos(time_interval)
+            window = [str(pd.Timestamp(self.start_time)), str(pd.Timestamp(self.end_time))]
+            state = None
+            if os.path.exists(state_path):
+                with open(state_path) as state_file:
+                    state = json.load(state_file)
+                if state['source'] != str(self.data_source) or state['interval_ns'] != step:
+                    self.instrumentation.warning("Watermark state belongs to a different source or interval. Starting from scratch.")
+                    state = None
+                elif state.get('window') != window:
+                    self.instrumentation.warning("Watermark state was built for a different time window. Starting from scratch.")
+                    state = None
+
+            new_rows = []
+            with open(self.data_source, 'rb') as source:
+                header = source.readline()
+                if state is not None and _watermark_checksum(source, header, state['offset']) != state['checksum']:
+                    self.instrumentation.warning("Source content changed before the watermark. Starting from scratch.")
+                    state = None
+                if state is None:
+                    state = {
+                        'source': str(self.data_source),
+                        'interval_ns': step,
+                        'window': window,
+                        'offset': len(header),
+                        'last_timestamp': None,
+                        'columns': None,
+                        'buckets': {},
+                    }
+
+                source.seek(state['offset'])
+                while True:
+                    block = source.read(chunk_bytes)
+                    end = block.rfind(b'\n') + 1
+                    if end == 0:
+                        # Nothing left, or only a partially written row that the next run will pick up
+                        break
+
+                    chunk = pd.read_csv(io.BytesIO(header + block[:end]))
+                    self.instrumentation.active.add(rows=len(chunk), bytes_read=end)
+                    chunk = chunk.dropna()
+                    chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+                    chunk = chunk[(chunk['timestamp'] >= self.start_time) & (chunk['timestamp'] <= self.end_time)]
+                    if state['columns'] is None:
+                        state['columns'] = [c for c in chunk.columns if c != 'timestamp' and pd.api.types.is_numeric_dtype(chunk[c])]
+                    if not chunk.empty:
+                        self._merge_bucket_sums(state, chunk, step)
+                        latest = chunk['timestamp'].max()
+                        if state['last_timestamp'] is None or latest > pd.Timestamp(state['last_timestamp']):
+                            state['last_timestamp'] = str(latest)
+                        new_rows.append(chunk)
+                        if self.rollups is not None:
+                            self.rollups.update(chunk)
+                        if self.time_index is not None:
+                            self.time_index.append(chunk)
+
+                    state['offset'] += end
+                    state['checksum'] = _watermark_checksum(source, header, state['offset'])
+                    source.seek(state['offset'])
+                    with open(state_path + '.tmp', 'w') as state_file:
+                        json.dump(state, state_file)
+                    os.replace(state_path + '.tmp', state_path)
+
+            # The rollups and time index were merged with the new rows above and describe everything ingested
+            self._data = pd.concat(new_rows, ignore_index=True) if new_rows else None
+            self.instrumentation.info("Incremental ingestion committed up to byte %s of %s (%s new rows).",
+                                      state['offset'], self.data_source, sum(len(rows) for rows in new_rows))
+            return self._bucket_means(state)
+        except Exception as e:
+            self.instrumentation.error("Error during incremental ingestion: %s", e)
+
+    @staticmethod
+    def _merge_bucket_sums(state, chunk, step):
+        """
+        Adds the row counts and column sums of a chunk to the per-bucket totals held in the watermark state.
+
+        :param state: The watermark state dictionary.
+        :param chunk: Preprocessed rows to merge.
+        :param step: The bucket length in nanoseconds.
+        """
+        columns = state['columns']
+        ns = chunk['timestamp'].astype('datetime64[ns]').to_numpy().view('i8')
+        grouped = chunk[columns].groupby(ns - ns % step)
+        counts = grouped.size()
+        sums = grouped.sum()
+        buckets = state['buckets']
+        for bucket, count, totals in zip(counts.index.tolist(), counts.tolist(), sums.to_numpy().tolist()):
+            key = str(bucket)
+            if key in buckets:
+                merged = buckets[key]
+                merged[0] += count
+                merged[1] = [a + b for a, b in zip(merged[1], totals)]
+            else:
+                buckets[key] = [count, totals]
+
+    @staticmethod
+    def _bucket_means(state):
+        """
+        Builds the per-bucket means from the totals in the watermark state, including empty buckets between
+        the first and last, like resample().mean().
+
+        :param state: The watermark state dictionary.
+        :return: DataFrame indexed by bucket start time.
+        """
+        columns = state['columns'] or []
+        if not state['buckets']:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+        keys = np.array(sorted(int(key) for key in state['buckets']), dtype='i8')
+        counts = np.array([state['buckets'][str(key)][0] for key in keys], dtype='f8')
+        sums = np.array([state['buckets'][str(key)][1] for key in keys], dtype='f8').reshape(len(keys), len(columns))
+        means = pd.DataFrame(sums / counts[:, None], columns=columns, index=pd.DatetimeIndex(keys.view('datetime64[ns]'), name='timestamp'))
+        full_range = pd.date_range(means.index[0], means.index[-1], freq=pd.Timedelta(state['interval_ns'], unit='ns'), name='timestamp')
+        return means.reindex(full_range)
+
+    @instrumented(bytes_read=_source_bytes)
+    def run_parallel(self, workers=None, worker_memory_bytes=DEFAULT_WORKER_MEMORY_BYTES,
+                     partition_bytes=DEFAULT_PARTITION_BYTES, finest=DEFAULT_PARALLEL_FINEST, sketch_k=DEFAULT_SKETCH_K):
+        """
+        Runs load, NA drop, timestamp parsing, window filtering, aggregation and statistics across a process pool.
+        The source is split into CSV byte ranges, or into the Parquet files of a columnar store, and each worker
+        returns partial rollups and statistics instead of rows, which are merged here in partition order.
+        The statistics equal those of generate_statistics after load_data, preprocess_data and
+        filter_data_by_time: count, mean, std, min and max are summed exactly, and so are the quantiles while
+        the window holds up to stream_statistics.EXACT_QUANTILE_ITEMS rows. Beyond that the quantiles come
+        from KLL sketches merged from the partitions, which stay within the sketch's rank error of the
+        single-process ones but are not identical to them.
+
+        Afterwards aggregate_data serves intervals from the merged rollups. The merged statistics are returned
+        and can be handed to export_statistics.
 
+        :param workers: Number of worker processes; one per CPU when omitted.
+        :param worker_memory_bytes: Approximate memory budget per worker; partitions are read in blocks sized to fit it.
+        :param partition_bytes: Size of the CSV byte range handed to each task.
+        :param finest: The finest rollup level to maintain; minutes by default, the default aggregate_data
+                       interval. Pass the finest interval that will be aggregated at, since every worker sends
+                       back buckets at this level.
+        :param sketch_k: KLL sketch size for the quantiles.
+        :return: DataFrame laid out like describe().
+        """
+        try:
+            tasks = plan_tasks(self.data_source, self.start_time, self.end_time, worker_memory_bytes,
+                               partition_bytes, finest, sketch_k)
+            result = run_partitions(tasks, workers)
+            if result is None:
+                self.instrumentation.warning("No partitions to ingest.")
+                return None
+            rows, self.rollups, accumulator = result
+            self.instrumentation.active.add(rows=rows)
+            stats = accumulator.describe()
+            self.instrumentation.info("Parallel ingestion processed %s partitions (%s rows kept).", len(tasks), rows)
+            return stats
+        except Exception as e:
+            self.instrumentation.error("Error during parallel ingestion: %s", e)
+
+    @instrumented(rows=_frame_rows)
     def extract_time_intervals(self):
         """
         Extracts various time intervals (attoseconds, femtoseconds, etc.) from the data for analysis.
+        Adds the nanosecond, microsecond, millisecond, second, minute and hour fields of each timestamp,
+        computed with integer arithmetic on the nanosecond count.
         """
         if self.data is not None:
-            # Example: Extract seconds from timestamp for analysis
-            self.data['seconds'] = self.data['timestamp'].dt.second
-            print("Time intervals extracted from the data.")
+            for name, component in time_components(self.data['timestamp']).items():
+                self.data[name] = component
+            self.instrumentation.info("Time intervals extracted from the data.")
         else:
-            print("No data available to extract time intervals. Load the data first.")
+            self.instrumentation.warning("No data available to extract time intervals. Load the data first.")
 
+    @instrumented()
     def log_ingestion_process(self, log_path):
         """
         Logs the data ingestion process, including time taken and any errors encountered.
+        The per-stage totals (calls, failures, wall and CPU time, rows, bytes, peak RSS) are appended to the
+        log file as one record through its batched handler, which is then flushed.
         
         :param log_path: The file path for saving the log data.
         """
         try:
-            with open(log_path, 'a') as log_file:
-                log_file.write(f"Ingestion process logged at {datetime.now()}\n")
-            print(f"Ingestion process logged successfully at {log_path}.")
+            self.instrumentation.log_summary(log_path)
+            self.instrumentation.info("Ingestion process logged successfully at %s.", log_path)
         except Exception as e:
-            print(f"Error logging ingestion process: {e}")
+            self.instrumentation.error("Error logging ingestion process: %s", e)
 
-    def verify_data_integrity(self):
+    @instrumented(rows=_frame_rows)
+    def verify_data_integrity(self, chunksize=DEFAULT_CHUNKSIZE, approximate=False, error_rate=1e-6):
         """ 
         Verifies the integrity of the data by checking for duplicates, missing values, 
         and ensuring proper time sequence in the timestamp.
+        The frame is checked in one pass, chunk by chunk, with rows reduced to 64-bit hashes for duplicate
+        detection (see integrity_check.IntegrityChecker).
+
+        :param chunksize: Number of rows hashed at a time.
+        :param approximate: Detect duplicates with a fixed-size Bloom filter instead of an exact hash set.
+        :param error_rate: False-positive rate of the Bloom filter in approximate mode.
+        :return: Integrity report dictionary, including the positions of the first offending rows.
         """
         if self.data is not None:
-            # Check for duplicates
-            duplicates = self.data.duplicated().sum()
-            if duplicates > 0:
-                print(f"Warning: {duplicates} duplicate rows found.")
-            
-            # Check for missing values
-            missing = self.data.isnull().sum().sum()
-            if missing > 0:
-                print(f"Warning: {missing} missing values found.")
-                
-            # Ensure timestamps are sequential
-            if not self.data['timestamp'].is_monotonic_increasing:
-                print("Warning: Timestamp values are not in sequential order.")
-                
-            print("Data integrity check completed.")
+            checker = IntegrityChecker(approximate=approximate, expected_rows=len(self.data), error_rate=error_rate)
+            for start in range(0, len(self.data), chunksize):
+                checker.update(self.data.iloc[start:start + chunksize])
+            return self._report_integrity(checker.report())
         else:
-            print("No data available to verify integrity. Load the data first.")
+            self.instrumentation.warning("No data available to verify integrity. Load the data first.")
 
-    def transform_time_intervals(self):
+    @instrumented(bytes_read=_source_bytes)
+    def verify_source_integrity(self, chunksize=DEFAULT_CHUNKSIZE, approximate=False, expected_rows=10_000_000, error_rate=1e-6):
+        """
+        Verifies the integrity of the raw source without loading it, streaming it in chunks through the same
+        single-pass check as verify_data_integrity. Fields are compared as the text in the file, so rows are
+        duplicates only when they are written identically.
+
+        :param chunksize: Number of rows read from the source per chunk.
+        :param approximate: Detect duplicates with a fixed-size Bloom filter instead of an exact hash set.
+        :param expected_rows: Number of rows the Bloom filter is sized for in approximate mode.
+        :param error_rate: False-positive rate of the Bloom filter in approximate mode.
+        :return: Integrity report dictionary, including the positions of the first offending rows.
+        """
+        try:
+            checker = IntegrityChecker(approximate=approximate, expected_rows=expected_rows, error_rate=error_rate)
+            timestamp_format = None
+            for chunk in pd.read_csv(self.data_source, chunksize=chunksize, dtype=str):
+                self.instrumentation.active.add(rows=len(chunk))
+                if timestamp_format is None and chunk['timestamp'].notna().any():
+                    timestamp_format = guess_datetime_format(chunk['timestamp'].dropna().iloc[0])
+                chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], format=timestamp_format, errors='coerce')
+                checker.update(chunk)
+            return self._report_integrity(checker.report())
+        except Exception as e:
+            self.instrumentation.error("Error verifying source integrity: %s", e)
+
+    def _report_integrity(self, report):
+        """
+        Logs the warnings of an integrity report.
+
+        :param report: Integrity report dictionary from IntegrityChecker.report().
+        :return: The same report.
+        """
+        if report['duplicates'] > 0:
+            self.instrumentation.warning("%s duplicate rows found (first at rows %s).", report['duplicates'], report['first_duplicate_rows'])
+        if report['missing_values'] > 0:
+            self.instrumentation.warning("%s missing values found (first at rows %s).", report['missing_values'], report['first_missing_rows'])
+        if report['out_of_order'] > 0:
+            self.instrumentation.warning("Timestamp values are not in sequential order (%s out of order, first at rows %s).",
+                                         report['out_of_order'], report['first_out_of_order_rows'])
+        self.instrumentation.info("Data integrity check completed.")
+        return report
+
+    @instrumented(rows=_frame_rows)
+    def transform_time_intervals(self, units=None):
         """
         Transforms time intervals from attoseconds to centuries, providing a multi-scale analysis of the data.
-        The function will handle conversions and rescaling based on time formats.
+        Adds one '<unit>_since_epoch' column per unit, computed in a single vectorized pass over the int64
+        nanosecond view of the timestamps. Units finer than a nanosecond are exact 128-bit decimals.
+        'attoseconds_to_seconds' is kept for existing consumers and holds the exact attosecond count.
+
+        :param units: Names from time_units.TIME_UNITS to compute; all of them when omitted.
         """
         if self.data is not None:
-            # Example transformation: Attoseconds to seconds conversion for large-scale analysis
-            self.data['attoseconds_to_seconds'] = self.data['timestamp'].apply(lambda x: x.timestamp() * 1e18)
-            print("Time intervals transformed successfully.")
+            for unit, values in epoch_units(self.data['timestamp'], units).items():
+                self.data[f'{unit}_since_epoch'] = values
+            if 'attoseconds_since_epoch' in self.data.columns:
+                self.data['attoseconds_to_seconds'] = self.data['attoseconds_since_epoch']
+            self.instrumentation.info("Time intervals transformed successfully.")
         else:
-            print("No data to transform. Load the data first.")
+            self.instrumentation.warning("No data to transform. Load the data first.")
 
-    def generate_statistics(self):
+    @instrumented(rows=_frame_rows)
+    def generate_statistics(self, chunksize=DEFAULT_CHUNKSIZE, sketch_k=DEFAULT_SKETCH_K):
         """
         Generates descriptive statistics from the historical data, providing insights such as mean, median, 
         standard deviation, and other relevant metrics.
+        The frame is scanned once, chunk by chunk, through a mergeable accumulator: count, mean, std, min and
+        max are exact, and the quantiles are exact up to stream_statistics.EXACT_QUANTILE_ITEMS rows and come
+        from a KLL sketch beyond that. The table keeps the layout of describe() and can be handed to
+        export_statistics to be written without scanning the frame again.
+
+        :param chunksize: Number of rows folded into the accumulator at a time.
+        :param sketch_k: KLL sketch size; the quantile rank error is roughly 1.7 / sketch_k.
         """
         if self.data is not None:
-            stats = self.data.describe()
-            print("Descriptive statistics generated:")
-            print(stats)
+            accumulator = StatisticsAccumulator(k=sketch_k)
+            for start in range(0, len(self.data), chunksize):
+                accumulator.update(self.data.iloc[start:start + chunksize])
+            stats = accumulator.describe()
+            self.instrumentation.info("Descriptive statistics generated:\n%s", stats)
             return stats
         else:
-            print("No data available to generate statistics. Load and preprocess the data first.")
+            self.instrumentation.warning("No data available to generate statistics. Load and preprocess the data first.")
+
+    @instrumented(bytes_read=_source_bytes)
+    def stream_statistics(self, chunksize=DEFAULT_CHUNKSIZE, sketch_k=DEFAULT_SKETCH_K):
+        """
+        Generates the same descriptive statistics as generate_statistics directly from the source, streaming it
+        in chunks that are cleaned and filtered to [start_time, end_time] like the in-memory pipeline, so
+        archives too large to load can still be summarized.
+
+        :param chunksize: Number of rows read from the source per chunk.
+        :param sketch_k: KLL sketch size; the quantile rank error is roughly 1.7 / sketch_k.
+        :return: DataFrame laid out like describe().
+        """
+        try:
+            accumulator = StatisticsAccumulator(k=sketch_k)
+            for chunk in pd.read_csv(self.data_source, chunksize=chunksize):
+                self.instrumentation.active.add(rows=len(chunk))
+                chunk = chunk.dropna()
+                chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+                accumulator.update(chunk[(chunk['timestamp'] >= self.start_time) & (chunk['timestamp'] <= self.end_time)])
+            stats = accumulator.describe()
+            self.instrumentation.info("Descriptive statistics generated from the streamed source:\n%s", stats)
+            return stats
+        except Exception as e:
+            self.instrumentation.error("Error streaming statistics: %s", e)
 
-    def visualize_time_series(self):
+    @instrumented()
+    def visualize_time_series(self, output_path=None, start_time=None, end_time=None,
+                              max_points=DEFAULT_MAX_POINTS, method='minmax'):
         """
         Creates visualizations of the time series data to provide insights into trends, anomalies, and patterns 
         over time.
+        The series is reduced to at most max_points points before plotting: 'minmax' keeps the extremes of each
+        pixel-wide bucket, 'lttb' keeps the points that best preserve the line shape, and 'rollup' draws a
+        min/mean/max envelope straight from the rollup store. Zoomed windows are read through the time index
+        when one is built. With an output path the chart is rendered headlessly with the Agg backend.
+
+        :param output_path: File path or writable binary buffer for the image; the chart is shown interactively when omitted.
+        :param start_time: Optional start of the plotted window.
+        :param end_time: Optional end of the plotted window.
+        :param max_points: Maximum number of points drawn.
+        :param method: 'minmax', 'lttb' or 'rollup'.
         """
-        if self.data is not None:
+        if method == 'rollup' and self.rollups is None:
+            self.instrumentation.warning("No rollups available for visualization. Build them with build_rollups first.")
+            return
+        if method != 'rollup' and self.data is None and self.time_index is None:
+            self.instrumentation.warning("No data available for visualization. Load and preprocess the data first.")
+            return
+
+        if output_path is not None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            figure = Figure(figsize=(10, 6))
+            FigureCanvasAgg(figure)
+            axes = figure.add_subplot()
+        else:
             import matplotlib.pyplot as plt
-            
-            plt.figure(figsize=(10, 6))
-            plt.plot(self.data['timestamp'], self.data['value'], label='Value over time')
-            plt.title('Time Series Data Visualization')
-            plt.xlabel('Timestamp')
-            plt.ylabel('Value')
-            plt.legend()
-            plt.grid(True)
-            plt.show()
-            
-            print("Time series visualization generated.")
+
+            figure = plt.figure(figsize=(10, 6))
+            axes = figure.add_subplot()
+
+        if method == 'rollup':
+            start = start_time if start_time is not None else self.start_time
+            end = end_time if end_time is not None else self.end_time
+            envelope = rollup_envelope(self.rollups, 'value', start, end, max_points)
+            if envelope is None or envelope.empty:
+                self.instrumentation.warning("No rollup level fits the requested window and point budget.")
+                return
+            axes.fill_between(envelope.index, envelope['min'], envelope['max'], alpha=0.3, label='Value range')
+            axes.plot(envelope.index, envelope['mean'], label='Mean value over time')
+            plotted = len(envelope)
         else:
-            print("No data available for visualization. Load and preprocess the data first.")
+            if self.time_index is not None:
+                start = start_time if start_time is not None else pd.Timestamp.min
+                end = end_time if end_time is not None else pd.Timestamp.max
+                window = self.time_index.query(start, end)
+            else:
+                window = self.data
+                if not window['timestamp'].is_monotonic_increasing:
+                    window = window.sort_values('timestamp', kind='stable')
+                timestamps = window['timestamp']
+                lo = timestamps.searchsorted(start_time, side='left') if start_time is not None else 0
+                hi = timestamps.searchsorted(end_time, side='right') if end_time is not None else len(window)
+                window = window.iloc[lo:hi]
+            timestamps, values = decimate(window['timestamp'], window['value'], max_points, method)
+            axes.plot(timestamps, values, label='Value over time')
+            plotted = len(timestamps)
 
-    def export_statistics(self, output_path):
+        axes.set_title('Time Series Data Visualization')
+        axes.set_xlabel('Timestamp')
+        axes.set_ylabel('Value')
+        axes.legend()
+        axes.grid(True)
+        if output_path is not None:
+            figure.savefig(output_path)
+        else:
+            plt.show()
+
+        self.instrumentation.info("Time series visualization generated from %s plotted points.", plotted)
+
+    @instrumented(rows=_frame_rows)
+    def export_statistics(self, output_path, statistics=None):
         """
         Exports the descriptive statistics to a specified file path for further analysis or reporting.
+        Paths ending in '.parquet' are written as Parquet, anything else as CSV.
         
         :param output_path: The file path where the statistics will be saved.
+        :param statistics: Table just returned by generate_statistics, stream_statistics or run_parallel, written
+                           as is; the statistics of the current frame are generated when omitted.
         """
-        if self.data is not None:
+        if self.data is not None or statistics is not None:
             try:
-                stats = self.data.describe()
-                stats.to_csv(output_path)
-                print(f"Statistics exported successfully to {output_path}.")
+                stats = statistics if statistics is not None else self.generate_statistics()
+                if output_path.endswith('.parquet'):
+                    # Datetime columns describe to a mix of Timestamps and floats, which Parquet cannot store as one type
+                    mixed = stats.columns[stats.dtypes == object]
+                    stats.astype({column: str for column in mixed}).to_parquet(output_path)
+                else:
+                    stats.to_csv(output_path)
+                self.instrumentation.info("Statistics exported successfully to %s.", output_path)
             except Exception as e:
-                print(f"Error exporting statistics: {e}")
+                self.instrumentation.error("Error exporting statistics: %s", e)
         else:
-            print("No data available to export statistics. Load and preprocess the data first.")
+            self.instrumentation.warning("No data available to export statistics. Load and preprocess the data first.")
 
+    @instrumented()
     def finalize_ingestion(self):
         """
         Finalizes the data ingestion process, ensuring all processes are completed and outputs are generated.
         This includes saving logs, verifying outputs, and cleaning up resources.
         """
         try:
-            self.log_ingestion_process('data_ingestion.log')
-            print("Ingestion process finalized successfully.")
+            self.log_ingestion_process(INGESTION_LOG_PATH)
+            self.instrumentation.info("Ingestion process finalized successfully.")
         except Exception as e:
-            print(f"Error finalizing ingestion process: {e}")
+            self.instrumentation.error("Error finalizing ingestion process: %s", e)
 
+    @instrumented()
     def cleanup(self):
         """
         Cleans up any resources or temporary files used during the data ingestion process to maintain optimal system performance.
@@ -219,12 +983,14 @@ class HistoricalDataIngestion:
         try:
             # Example cleanup process: Removing any temporary files or variables
             self.data = None
-            print("Temporary data cleared from memory.")
+            self.instrumentation.info("Temporary data cleared from memory.")
         except Exception as e:
-            print(f"Error during cleanup: {e}")
+            self.instrumentation.error("Error during cleanup: %s", e)
 
 if __name__ == "__main__":
     # Example usage of the HistoricalDataIngestion class
+    # Echo the progress messages and stage records to the console as well as to the log files
+    logging.basicConfig(level=logging.INFO)
     data_source = "historical_data.csv"
     start_time = datetime(2000, 1, 1)
     end_time = datetime(2020, 1, 1)
@@ -234,9 +1000,10 @@ if __name__ == "__main__":
     ingestion.preprocess_data()
     ingestion.filter_data_by_time()
     ingestion.aggregate_data(time_interval='day')
-    ingestion.generate_statistics()
+    statistics = ingestion.generate_statistics()
     ingestion.visualize_time_series()
     ingestion.save_filtered_data("filtered_historical_data.csv")
-    ingestion.export_statistics("historical_data_stats.csv")
+    ingestion.export_statistics("historical_data_stats.csv", statistics)
     ingestion.finalize_ingestion()
     ingestion.cleanup()
+    print(ingestion.instrumentation.summary())
@@ -0,0 +1,328 @@
+# instrumentation.py
+# Stage-level instrumentation for the pipelines. A stage records its wall time, CPU time, rows processed,
+# bytes read and the process's peak resident memory, and reports them through the standard logging module.
+# Log files are written by a batched handler that buffers formatted records and appends them with one write
+# per batch, instead of opening the file for every message. A disabled Instrumentation hands out a shared
+# no-op stage, so instrumented code pays one attribute lookup and an empty context manager per stage.
+# An optional profiler hook wraps each stage, e.g. cprofile_hook to dump one cProfile file per stage.
+
+import atexit
+import cProfile
+import functools
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# Number of buffered records that triggers a write
+DEFAULT_CAPACITY = 256
+
+# Seconds after which buffered records are written even if the buffer is not full
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Layout of the lines written to the log files
+LOG_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s'
+
+class BatchedFileHandler(logging.Handler):
+    """
+    Logging handler that appends records to a file in batches. Records are formatted when they arrive and
+    written once the buffer holds `capacity` records, `flush_interval` seconds after the last write, on an
+    error record, or on flush and close (logging.shutdown flushes all handlers at interpreter exit).
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        :param path: The log file; it and its directory are created on the first write.
+        :param capacity: Number of buffered records that triggers a write.
+        :param flush_interval: Seconds after which buffered records are written.
+        """
+        super().__init__()
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self._last_flush = time.monotonic()
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if (len(self.buffer) >= self.capacity or record.levelno >= logging.ERROR
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self._last_flush = time.monotonic()
+            if not self.buffer:
+                return
+            lines, self.buffer = self.buffer, []
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as log_file:
+                log_file.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        self.flush()
+        super().close()
+
+# One handler per log file, shared by every logger writing to it
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+def file_handler(path, capacity=DEFAULT_CAPACITY, flush_interval=DEFAULT_FLUSH_INTERVAL):
+    """
+    :return: The shared BatchedFileHandler of a log file, created on first use.
+    """
+    key = os.path.abspath(path)
+    with _handlers_lock:
+        if key not in _handlers:
+            _handlers[key] = BatchedFileHandler(key, capacity, flush_interval)
+        return _handlers[key]
+
+def _flush_handlers():
+    for handler in list(_handlers.values()):
+        handler.flush()
+
+# Handlers not attached to any logger are not flushed by logging.shutdown
+atexit.register(_flush_handlers)
+
+def peak_rss_bytes():
+    """
+    :return: Peak resident memory of this process so far, in bytes.
+    """
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class _NullStage:
+    """
+    Stage handed out when instrumentation is disabled; records nothing.
+    """
+    name = None
+    rows = None
+    bytes_read = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, rows=0, bytes_read=0):
+        pass
+
+NULL_STAGE = _NullStage()
+
+class Stage:
+    """
+    One timed run of a pipeline stage. Rows and bytes can be set when the stage is opened, counted up with
+    add() while it runs, or assigned before it closes.
+    """
+
+    def __init__(self, instrumentation, name, rows=None, bytes_read=None):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.rows = rows
+        self.bytes_read = bytes_read
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_bytes = None
+        self.failed = False
+        self._profile = None
+
+    def add(self, rows=0, bytes_read=0):
+        """
+        Counts rows and bytes processed by the running stage.
+        """
+        if rows:
+            self.rows = (self.rows or 0) + rows
+        if bytes_read:
+            self.bytes_read = (self.bytes_read or 0) + bytes_read
+
+    def __enter__(self):
+        profiler = self.instrumentation.profiler
+        if profiler is not None:
+            self._profile = profiler(self.name)
+            self._profile.__enter__()
+        self.instrumentation._active.append(self)
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = time.process_time() - self._cpu_start
+        self.peak_rss_bytes = peak_rss_bytes()
+        self.failed = exc_type is not None
+        self.instrumentation._active.pop()
+        if self._profile is not None:
+            self._profile.__exit__(exc_type, exc, traceback)
+        self.instrumentation._record(self)
+        return False
+
+class Instrumentation:
+    """
+    Hands out stages and reports them, together with progress messages, through one logger. Per-stage totals
+    are kept for summary().
+    """
+
+    def __init__(self, name, log_path=None, enabled=True, profiler=None, level=logging.INFO):
+        """
+        :param name: Name of the logger the stages and messages are reported through.
+        :param log_path: Log file the logger writes to through a batched handler; none is attached when omitted.
+        :param enabled: Time and report stages. Messages are logged either way.
+        :param profiler: Optional callable taking a stage name and returning a context manager entered around
+                         the stage, e.g. cprofile_hook(directory).
+        :param level: Level of the stage records; the logger is set to it when it has no level of its own.
+        """
+        self.logger = logging.getLogger(name)
+        if log_path is not None:
+            handler = file_handler(log_path)
+            if handler not in self.logger.handlers:
+                self.logger.addHandler(handler)
+        if self.logger.level == logging.NOTSET:
+            self.logger.setLevel(level)
+        self.enabled = enabled
+        self.profiler = profiler
+        self.level = level
+        self.totals = {}
+        self._active = []
+
+    def stage(self, name, rows=None, bytes_read=None):
+        """
+        :return: Context manager timing one run of a stage; a shared no-op stage when disabled.
+        """
+        if not self.enabled:
+            return NULL_STAGE
+        return Stage(self, name, rows, bytes_read)
+
+    @property
+    def active(self):
+        """
+        The innermost running stage, for code that counts rows or bytes as it goes; a no-op stage when none.
+        """
+        return self._active[-1] if self._active else NULL_STAGE
+
+    def _record(self, stage):
+        totals = self.totals.setdefault(stage.name, {'calls': 0, 'failures': 0, 'wall_seconds': 0.0,
+                                                     'cpu_seconds': 0.0, 'rows': 0, 'bytes_read': 0,
+                                                     'peak_rss_bytes': 0})
+        totals['calls'] += 1
+        totals['failures'] += stage.failed
+        totals['wall_seconds'] += stage.wall_seconds
+        totals['cpu_seconds'] += stage.cpu_seconds
+        totals['rows'] += stage.rows or 0
+        totals['bytes_read'] += stage.bytes_read or 0
+        totals['peak_rss_bytes'] = max(totals['peak_rss_bytes'], stage.peak_rss_bytes)
+        self.logger.log(self.level, "stage=%s wall=%.6fs cpu=%.6fs rows=%s bytes=%s peak_rss=%d%s",
+                        stage.name, stage.wall_seconds, stage.cpu_seconds, stage.rows, stage.bytes_read,
+                        stage.peak_rss_bytes, " failed" if stage.failed else "")
+
+    def info(self, message, *args):
+        self.logger.info(message, *args)
+
+    def warning(self, message, *args):
+        self.logger.warning(message, *args)
+
+    def error(self, message, *args):
+        self.logger.error(message, *args)
+
+    def summary(self):
+        """
+        :return: DataFrame of per-stage totals: calls, failures, wall and CPU seconds, rows, bytes read and
+                 the highest peak RSS seen at the end of a call.
+        """
+        return pd.DataFrame.from_dict(self.totals, orient='index',
+                                      columns=['calls', 'failures', 'wall_seconds', 'cpu_seconds', 'rows',
+                                               'bytes_read', 'peak_rss_bytes'])
+
+    def log_summary(self, log_path=None):
+        """
+        Writes summary() as one record to a log file, or to the logger's handlers when omitted, and flushes it.
+        """
+        record = self.logger.makeRecord(self.logger.name, self.level, __file__, 0, "Stage summary:\n%s",
+                                        (self.summary().to_string(),), None)
+        for handler in [file_handler(log_path)] if log_path is not None else self.logger.handlers:
+            handler.handle(record)
+            handler.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records of the logger's handlers.
+        """
+        for handler in self.logger.handlers:
+            handler.flush()
+
+def instrumented(name=None, rows=None, bytes_read=None):
+    """
+    Decorates a method of an object with an `instrumentation` attribute so every call runs as a stage.
+
+    :param name: Stage name; the method name when omitted.
+    :param rows: Optional callable (self, result) giving the rows processed, evaluated only when enabled and
+                 when the method did not count them itself.
+    :param bytes_read: Optional callable (self, result) giving the bytes read, with the same rules.
+    """
+    def decorate(method):
+        stage_name = name or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.stage(stage_name) as stage:
+                result = method(self, *args, **kwargs)
+                if stage is not NULL_STAGE:
+                    if rows is not None and stage.rows is None:
+                        stage.rows = rows(self, result)
+                    if bytes_read is not None and stage.bytes_read is None:
+                        stage.bytes_read = bytes_read(self, result)
+                return result
+        return wrapper
+    return decorate
+
+class cprofile_hook:
+    """
+    Profiler hook writing a cProfile file per stage run to `directory` as <stage>-<n>.prof.
+    """
+
+    def __init__(self, directory, stages=None):
+        """
+        :param directory: Output directory, created when missing.
+        :param stages: Optional collection of stage names to profile; all stages when omitted.
+        """
+        self.directory = directory
+        self.stages = stages
+        self.runs = {}
+
+    def __call__(self, stage_name):
+        if self.stages is not None and stage_name not in self.stages:
+            return NULL_STAGE
+        self.runs[stage_name] = self.runs.get(stage_name, 0) + 1
+        return _ProfiledStage(os.path.join(self.directory, f'{stage_name}-{self.runs[stage_name]}.prof'))
+
+class _ProfiledStage:
+    def __init__(self, path):
+        self.path = path
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        # Only one profiler can be active at a time; nested stages are covered by the outer one
+        try:
+            self.profile.enable()
+        except ValueError:
+            self.profile = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.profile.dump_stats(self.path)
+        return False
@@ -0,0 +1,218 @@
+# integrity_check.py
+# Single-pass, chunk-at-a-time data integrity verification for the historical data ingestion pipeline.
+# Rows are reduced to 64-bit hashes as they stream past, so duplicate detection needs an open-addressing
+# set of 8-byte hashes in exact mode, or a fixed-size Bloom filter with a bounded false-positive rate in
+# approximate mode, instead of a full hash table over every column of every row.
+
+import math
+import numpy as np
+import pandas as pd
+
+# Number of offending row positions kept for each kind of problem
+DEFAULT_MAX_EXAMPLES = 10
+
+class RowHashSet:
+    """
+    Open-addressing hash set of 64-bit row hashes stored in one flat uint64 array, kept at most half full.
+    Batches are inserted with vectorized linear probing: every pending hash inspects its slot, claims it if
+    empty, and the ones that lost a slot to another hash move on to the next slot in the following round.
+    """
+
+    def __init__(self, capacity=1 << 20):
+        """
+        Initializes an empty set.
+
+        :param capacity: Initial number of slots, rounded up to a power of two.
+        """
+        self.table = np.zeros(1 << max(int(capacity) - 1, 1).bit_length(), dtype=np.uint64)
+        self.count = 0
+
+    def _probe(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        mask = np.uint64(len(self.table) - 1)
+        pending = np.arange(len(hashes))
+        slots = hashes & mask
+        while len(pending):
+            current = self.table[slots]
+            candidates = hashes[pending]
+            hit = current == candidates
+            found[pending[hit]] = True
+            empty = current == 0
+            self.table[slots[empty]] = candidates[empty]
+            won = empty & (self.table[slots] == candidates)
+            unresolved = ~(hit | won)
+            pending = pending[unresolved]
+            slots = (slots[unresolved] + np.uint64(1)) & mask
+        self.count += int(len(hashes) - found.sum())
+        return found
+
+    def add(self, hashes):
+        """
+        Adds a batch of distinct hashes to the set.
+
+        :param hashes: uint64 array with no repeated values.
+        :return: Boolean array, True where the hash was already in the set.
+        """
+        # Zero marks an empty slot, so it is folded onto one
+        hashes = np.where(hashes == 0, np.uint64(1), hashes)
+        if (self.count + len(hashes)) * 2 > len(self.table):
+            stored = self.table[self.table != 0]
+            size = len(self.table)
+            while (self.count + len(hashes)) * 2 > size:
+                size *= 2
+            self.table = np.zeros(size, dtype=np.uint64)
+            self.count = 0
+            self._probe(stored)
+        return self._probe(hashes)
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 64-bit row hashes. The bit positions for each hash are derived by double
+    hashing from its two 32-bit halves, so no extra hashing of the row is needed. Batches are probed one hash
+    function at a time, so the working memory is a few arrays the size of the batch whatever hash_count is.
+    """
+
+    def __init__(self, expected_items, error_rate):
+        """
+        Sizes the filter so that after expected_items insertions a lookup of an unseen item is reported as
+        present with probability at most error_rate.
+
+        :param expected_items: Number of distinct items the filter is sized for.
+        :param error_rate: Target false-positive probability, between 0 and 1.
+        """
+        expected_items = max(int(expected_items), 1)
+        self.size = max(64, int(math.ceil(-expected_items * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / expected_items * math.log(2))))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _probes(self, hashes):
+        """
+        Yields the bit position of every hash for each of the hash_count hash functions in turn: low + i * high
+        modulo the filter size, advanced in place from one function to the next.
+        """
+        size = np.uint64(self.size)
+        position = (hashes & np.uint64(0xFFFFFFFF)) % size
+        step = ((hashes >> np.uint64(32)) | np.uint64(1)) % size
+        for probe in range(self.hash_count):
+            if probe:
+                position += step
+                position %= size
+            yield position
+
+    def contains(self, hashes):
+        """
+        Tests membership of each hash.
+
+        :param hashes: uint64 array.
+        :return: Boolean array, True where the hash may have been added before.
+        """
+        present = np.ones(len(hashes), dtype=bool)
+        for positions in self._probes(hashes):
+            present &= ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1).astype(bool)
+        return present
+
+    def add(self, hashes):
+        """
+        Adds each hash to the filter.
+
+        :param hashes: uint64 array.
+        """
+        for positions in self._probes(hashes):
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+
+class IntegrityChecker:
+    """
+    Accumulates duplicate rows, per-column missing values and out-of-order timestamps over a stream of
+    chunks in one pass, remembering the positions of the first offending rows of each kind.
+    """
+
+    def __init__(self, approximate=False, expected_rows=10_000_000, error_rate=1e-6,
+                 max_examples=DEFAULT_MAX_EXAMPLES, timestamp_column='timestamp'):
+        """
+        Initializes an empty integrity check.
+
+        :param approximate: Use a fixed-size Bloom filter for duplicate detection instead of an exact set
+                            of row hashes. The duplicate count may then overstate the true count by at most
+                            error_rate per distinct row, as long as expected_rows is not exceeded.
+        :param expected_rows: Number of rows the Bloom filter is sized for (approximate mode only).
+        :param error_rate: False-positive probability of the Bloom filter (approximate mode only).
+        :param max_examples: Number of offending row positions kept for each kind of problem.
+        :param timestamp_column: Column whose order is checked.
+        """
+        self.approximate = approximate
+        self.max_examples = max_examples
+        self.timestamp_column = timestamp_column
+        self.bloom = BloomFilter(expected_rows, error_rate) if approximate else None
+        self.seen = None if approximate else RowHashSet()
+        self.rows = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.missing_by_column = None
+        self.first_duplicate_rows = []
+        self.first_missing_rows = []
+        self.first_out_of_order_rows = []
+        self.last_timestamp = None
+
+    def _keep_examples(self, examples, positions):
+        if len(examples) < self.max_examples and len(positions):
+            examples.extend((positions[:self.max_examples - len(examples)] + self.rows).tolist())
+
+    def update(self, chunk):
+        """
+        Folds the next chunk of rows into the check. Chunks must be passed in source order.
+
+        :param chunk: DataFrame with the same columns as previous chunks.
+        """
+        if chunk.empty:
+            return
+
+        # Duplicates: exact within the chunk, then against every earlier chunk
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        unique, first_index, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+        repeated = np.ones(len(hashes), dtype=bool)
+        repeated[first_index] = False
+        if self.approximate:
+            seen_before = self.bloom.contains(unique)
+            self.bloom.add(unique[~seen_before])
+        else:
+            seen_before = self.seen.add(unique)
+        repeated |= seen_before[inverse.ravel()]
+        self.duplicates += int(repeated.sum())
+        self._keep_examples(self.first_duplicate_rows, np.flatnonzero(repeated))
+
+        # Missing values, per column
+        missing = chunk.isna()
+        counts = missing.sum()
+        self.missing_by_column = counts if self.missing_by_column is None else self.missing_by_column.add(counts, fill_value=0)
+        self._keep_examples(self.first_missing_rows, np.flatnonzero(missing.to_numpy().any(axis=1)))
+
+        # Out-of-order timestamps, including the boundary with the previous chunk
+        if self.timestamp_column in chunk.columns:
+            timestamps = chunk[self.timestamp_column].to_numpy()
+            if self.last_timestamp is not None:
+                timestamps = np.concatenate([[self.last_timestamp], timestamps])
+            decreasing = np.flatnonzero(timestamps[1:] < timestamps[:-1]) + (1 if self.last_timestamp is None else 0)
+            self.out_of_order += len(decreasing)
+            self._keep_examples(self.first_out_of_order_rows, decreasing)
+            self.last_timestamp = timestamps[-1]
+
+        self.rows += len(chunk)
+
+    def report(self):
+        """
+        Summarizes the check so far.
+
+        :return: Dictionary of counts and the positions of the first offending rows.
+        """
+        missing_by_column = self.missing_by_column if self.missing_by_column is not None else pd.Series(dtype='int64')
+        return {
+            'rows': self.rows,
+            'duplicates': self.duplicates,
+            'missing_values': int(missing_by_column.sum()),
+            'missing_by_column': missing_by_column.astype('int64').to_dict(),
+            'out_of_order': self.out_of_order,
+            'first_duplicate_rows': self.first_duplicate_rows,
+            'first_missing_rows': self.first_missing_rows,
+            'first_out_of_order_rows': self.first_out_of_order_rows,
+            'approximate': self.approximate,
+        }
@@ -0,0 +1,229 @@
+# parallel_ingestion.py
+# Process-pool execution of the historical data ingestion pipeline. The source is split into partitions
+# (row-aligned byte ranges of a CSV file, or the Parquet files of a columnar store), each worker runs
+# load, NA drop, timestamp parsing and window filtering over its partition in memory-bounded blocks, and
+# returns only mergeable partial rollups and statistics. The parent merges the partials in partition order;
+# the statistics are summed exactly, so they match a single-process run (see stream_statistics for the
+# quantiles of large windows).
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from rollup_cache import RollupStore
+from stream_statistics import DEFAULT_SKETCH_K, StatisticsAccumulator
+
+# Default size of one CSV partition handed to a worker
+DEFAULT_PARTITION_BYTES = 256 * 1024 * 1024
+
+# Default memory budget per worker
+DEFAULT_WORKER_MEMORY_BYTES = 1024 * 1024 * 1024
+
+# Rough ratio between the in-memory size of a parsed DataFrame and the CSV text it was parsed from
+CSV_MEMORY_EXPANSION = 4
+
+# Default finest rollup level of the partial stores workers return: the default interval of
+# HistoricalDataIngestion.aggregate_data. Finer levels hold about one bucket per event and would make the
+# partial stores nearly as large as the rows they replace.
+DEFAULT_PARALLEL_FINEST = 'min'
+
+# Bytes read at a time while looking for row boundaries
+SCAN_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Quote and newline characters of CSV text, as bytes values
+QUOTE_BYTE = ord('"')
+NEWLINE_BYTE = ord('\n')
+
+def _outside_newlines(data, quoted=False):
+    """
+    Finds the newlines of a block of CSV text that end rows, i.e. that are not inside a quoted field. Every
+    quote character toggles between inside and outside a field; an escaped quote ('""') toggles twice.
+
+    :param data: bytes of CSV text.
+    :param quoted: Whether the block starts inside a quoted field.
+    :return: Tuple of (boolean mask of the row-ending newlines, whether the block ends inside a quoted field).
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    inside = np.logical_xor.accumulate(buffer == QUOTE_BYTE)
+    if quoted:
+        inside = ~inside
+    return (buffer == NEWLINE_BYTE) & ~inside, bool(inside[-1]) if len(inside) else quoted
+
+def _last_row_end(data):
+    """
+    :param data: bytes of CSV text starting on a row boundary.
+    :return: Offset just past the last row-ending newline of data, 0 when there is none.
+    """
+    if b'"' not in data:
+        return data.rfind(b'\n') + 1
+    ends = np.flatnonzero(_outside_newlines(data)[0])
+    return int(ends[-1]) + 1 if len(ends) else 0
+
+def plan_csv_partitions(path, partition_bytes=DEFAULT_PARTITION_BYTES):
+    """
+    Splits a CSV file into byte ranges that start and end on row boundaries. Newlines inside quoted fields
+    do not end rows, so whether a newline is quoted is tracked from the start of the file: the file is read
+    once up to the last cut, counting quotes, which costs far less than parsing it.
+
+    :param path: The CSV file path.
+    :param partition_bytes: Target size of each range.
+    :return: Tuple of (header bytes, list of (start, end) byte ranges).
+    """
+    size = os.path.getsize(path)
+    boundaries = []
+    # Each cut is made at the first row end past its target; the first one ends the header
+    target = 0
+    quoted = False
+    position = 0
+    with open(path, 'rb') as source:
+        while position < size and target < size:
+            data = source.read(SCAN_BLOCK_BYTES)
+            if position + len(data) > target:
+                newlines, ends_quoted = _outside_newlines(data, quoted)
+                ends = np.flatnonzero(newlines) + 1 + position
+                cut = np.searchsorted(ends, target, side='right')
+                while cut < len(ends) and ends[cut] < size:
+                    boundaries.append(int(ends[cut]))
+                    target = boundaries[-1] + partition_bytes
+                    cut = np.searchsorted(ends, target, side='right')
+                quoted = ends_quoted
+            else:
+                quoted ^= data.count(b'"') % 2 == 1
+            position += len(data)
+        source.seek(0)
+        header = source.read(boundaries[0] if boundaries else size)
+    if not boundaries:
+        return header, []
+    boundaries.append(size)
+    return header, list(zip(boundaries[:-1], boundaries[1:]))
+
+def read_csv_blocks(path, header, start, end, block_bytes, **read_options):
+    """
+    Yields DataFrames parsed from consecutive row-aligned blocks of the byte range [start, end), which must
+    start on a row boundary. Blocks are cut only at newlines outside quoted fields.
+
+    :param read_options: Extra keyword arguments for pd.read_csv, e.g. usecols or dtype.
+    """
+    with open(path, 'rb') as source:
+        source.seek(start)
+        remainder = b''
+        position = start
+        while position < end:
+            data = remainder + source.read(min(block_bytes, end - position))
+            position = source.tell()
+            cut = _last_row_end(data) if position < end else len(data)
+            remainder = data[cut:]
+            if cut:
+                yield pd.read_csv(io.BytesIO(header + data[:cut]), **read_options)
+        if remainder:
+            yield pd.read_csv(io.BytesIO(header + remainder), **read_options)
+
+def _parquet_blocks(path, start_time, end_time, block_rows):
+    """
+    Yields DataFrames of at most block_rows rows from one Parquet file, reading only the row groups whose
+    timestamp statistics overlap the window.
+    """
+    import pyarrow.dataset as ds
+
+    window = (ds.field('timestamp') >= start_time) & (ds.field('timestamp') <= end_time)
+    for batch in ds.dataset(path, format='parquet').to_batches(filter=window, batch_size=block_rows):
+        yield batch.to_pandas()
+
+def ingest_partition(task):
+    """
+    Runs the ingestion pipeline over one partition. Executed in a worker process.
+
+    :param task: Dictionary describing the partition and the pipeline settings.
+    :return: Tuple of (rows kept, RollupStore, StatisticsAccumulator) for the partition.
+    """
+    rollups = RollupStore(task['columns'], finest=task['finest'])
+    statistics = StatisticsAccumulator(k=task['sketch_k'])
+    start_time = pd.Timestamp(task['start_time'])
+    end_time = pd.Timestamp(task['end_time'])
+    if task['kind'] == 'csv':
+        blocks = read_csv_blocks(task['path'], task['header'], task['start'], task['end'], task['block_bytes'])
+    else:
+        blocks = _parquet_blocks(task['path'], start_time.to_pydatetime(), end_time.to_pydatetime(), task['block_rows'])
+
+    rows = 0
+    for block in blocks:
+        block = block.dropna()
+        block['timestamp'] = pd.to_datetime(block['timestamp'], format=task['timestamp_format'])
+        block = block[(block['timestamp'] >= start_time) & (block['timestamp'] <= end_time)]
+        rollups.update(block)
+        statistics.update(block)
+        rows += len(block)
+    return rows, rollups, statistics
+
+def plan_tasks(source, start_time, end_time, worker_memory_bytes=DEFAULT_WORKER_MEMORY_BYTES,
+               partition_bytes=DEFAULT_PARTITION_BYTES, finest=DEFAULT_PARALLEL_FINEST, sketch_k=DEFAULT_SKETCH_K):
+    """
+    Builds the list of partition tasks for a source. A directory is treated as a columnar store written by
+    HistoricalDataIngestion.save_columnar and split by its Parquet files, skipping year/month partitions
+    outside the window; anything else is split into CSV byte ranges.
+
+    :param finest: Finest rollup level of the partial stores; the coarsest level the caller will aggregate
+                   at keeps what the workers send back smallest.
+
+    :return: List of task dictionaries for ingest_partition.
+    """
+    block_bytes = max(1, worker_memory_bytes // CSV_MEMORY_EXPANSION)
+    start = pd.Timestamp(start_time)
+    end = pd.Timestamp(end_time)
+    if os.path.isdir(source):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(source, format='parquet', partitioning='hive')
+        year, month = ds.field('year'), ds.field('month')
+        window = (
+            ((year > start.year) | ((year == start.year) & (month >= start.month)))
+            & ((year < end.year) | ((year == end.year) & (month <= end.month)))
+        )
+        paths = sorted(fragment.path for fragment in dataset.get_fragments(filter=window))
+        schema = dataset.schema
+        columns = [name for name in schema.names if name not in ('timestamp', 'year', 'month')
+                   and pd.api.types.is_numeric_dtype(schema.field(name).type.to_pandas_dtype())]
+        # Rough row width of the decoded columns, to turn the memory budget into a batch size
+        row_bytes = 8 * max(1, len(schema.names))
+        base = {'kind': 'parquet', 'block_rows': max(1, block_bytes // row_bytes), 'timestamp_format': None}
+        parts = [dict(base, path=path) for path in paths]
+    else:
+        header, ranges = plan_csv_partitions(source, partition_bytes)
+        sample = pd.read_csv(source, nrows=1000).dropna()
+        columns = [c for c in sample.columns if c != 'timestamp' and pd.api.types.is_numeric_dtype(sample[c])]
+        timestamp_format = guess_datetime_format(str(sample['timestamp'].iloc[0])) if not sample.empty else None
+        base = {'kind': 'csv', 'path': source, 'header': header, 'block_bytes': block_bytes, 'timestamp_format': timestamp_format}
+        parts = [dict(base, start=range_start, end=range_end) for range_start, range_end in ranges]
+
+    shared = {'columns': columns, 'finest': finest, 'sketch_k': sketch_k, 'start_time': start, 'end_time': end}
+    return [dict(part, **shared) for part in parts]
+
+def run_partitions(tasks, workers=None):
+    """
+    Runs partition tasks over a process pool and merges their partial results in partition order.
+
+    :param tasks: Task dictionaries from plan_tasks.
+    :param workers: Number of worker processes; one per CPU when omitted. With 1 the tasks run in-process.
+    :return: Tuple of (rows kept, merged RollupStore, merged StatisticsAccumulator), or None without tasks.
+    """
+    if not tasks:
+        return None
+    if workers == 1:
+        results = map(ingest_partition, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(ingest_partition, tasks)
+    try:
+        rows, rollups, statistics = next(results)
+        for partial_rows, partial_rollups, partial_statistics in results:
+            rows += partial_rows
+            rollups.merge(partial_rollups)
+            statistics.merge(partial_statistics)
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    return rows, rollups, statistics
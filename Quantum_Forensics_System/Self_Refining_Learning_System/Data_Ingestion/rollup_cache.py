@@ -0,0 +1,303 @@
+# rollup_cache.py
+# Multi-resolution rollup store for the historical data ingestion pipeline. Keeps mergeable per-bucket
+# count, sum, min, max and sum-of-squares at a ladder of resolutions so that any coarser aggregation is
+# derived by merging finer buckets instead of rescanning the raw rows.
+
+import numpy as np
+import pandas as pd
+
+# Resolution ladder from finest to coarsest: (name, unit, multiple).
+# Bucket keys are integers counted in multiples of the unit: nanoseconds since the epoch for the
+# fixed-length levels, months since the epoch for 'MS', and calendar years for the year-based levels.
+LADDER = [
+    ('ns', 'ns', 1),
+    ('us', 'ns', 1_000),
+    ('ms', 'ns', 1_000_000),
+    ('s', 'ns', 1_000_000_000),
+    ('min', 'ns', 60_000_000_000),
+    ('h', 'ns', 3_600_000_000_000),
+    ('D', 'ns', 86_400_000_000_000),
+    ('MS', 'M', 1),
+    ('YS', 'Y', 1),
+    ('decade', 'Y', 10),
+    ('century', 'Y', 100),
+]
+
+LEVEL_NAMES = [name for name, _, _ in LADDER]
+
+# Statistics that can be read back from the store
+STATISTICS = ('count', 'sum', 'min', 'max', 'mean', 'var', 'std')
+
+def _bucket_keys(level, timestamps):
+    """
+    Maps datetime64 values to integer bucket keys of a level.
+
+    :param level: A (name, unit, multiple) ladder entry.
+    :param timestamps: numpy datetime64 array of any unit.
+    :return: int64 array of bucket keys.
+    """
+    _, unit, multiple = level
+    if unit == 'ns':
+        return timestamps.astype('datetime64[ns]').view('i8') // multiple
+    if unit == 'M':
+        return timestamps.astype('datetime64[M]').view('i8')
+    return (timestamps.astype('datetime64[Y]').view('i8') + 1970) // multiple
+
+def _bucket_starts(level, keys):
+    """
+    Maps integer bucket keys of a level back to the datetime64 start of each bucket. Fixed-length levels
+    keep nanosecond resolution; calendar levels use second resolution so century buckets stay representable.
+
+    :param level: A (name, unit, multiple) ladder entry.
+    :param keys: int64 array of bucket keys.
+    :return: numpy datetime64 array.
+    """
+    _, unit, multiple = level
+    if unit == 'ns':
+        return (keys * multiple).view('datetime64[ns]')
+    if unit == 'M':
+        return keys.astype('datetime64[M]').astype('datetime64[s]')
+    return (keys * multiple - 1970).astype('datetime64[Y]').astype('datetime64[s]')
+
+def _reduce_buckets(keys, count, total, low, high, squares):
+    """
+    Merges rows that share a bucket key.
+
+    :return: Tuple of (keys, count, sum, min, max, sum of squares) with one sorted row per bucket.
+    """
+    if len(keys) == 0:
+        return keys, count, total, low, high, squares
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return (
+        keys[starts],
+        np.add.reduceat(count[order], starts, axis=0),
+        np.add.reduceat(total[order], starts, axis=0),
+        np.minimum.reduceat(low[order], starts, axis=0),
+        np.maximum.reduceat(high[order], starts, axis=0),
+        np.add.reduceat(squares[order], starts, axis=0),
+    )
+
+class RollupStore:
+    """
+    Holds per-bucket count, sum, min, max and sum of squares for each numeric column at every level of the
+    resolution ladder from a chosen finest level up to centuries. New rows are bucketed once at the finest
+    level and the partial buckets are cascaded up the ladder, so updates cost time proportional to the new
+    data and queries never touch raw rows. Every level is held in arrays with spare capacity: new buckets are
+    merged with only the stored buckets at or after their first key and written in place, so batches arriving
+    in time order cost amortized time proportional to their own size, however much is stored.
+    """
+
+    def __init__(self, columns, finest='ms'):
+        """
+        Initializes an empty rollup store.
+
+        :param columns: Names of the numeric columns to aggregate.
+        :param finest: Name of the finest ladder level to maintain (e.g. 'ns', 'us', 'ms', 's').
+        """
+        if finest not in LEVEL_NAMES:
+            raise ValueError(f"Unknown rollup level {finest!r}. Expected one of {LEVEL_NAMES}.")
+        self.columns = list(columns)
+        self.finest = finest
+        self.levels = LADDER[LEVEL_NAMES.index(finest):]
+        width = len(self.columns)
+        self._arrays = {
+            name: [
+                np.empty(0, dtype='i8'),
+                np.empty((0, width), dtype='i8'),
+                np.empty((0, width)),
+                np.empty((0, width)),
+                np.empty((0, width)),
+                np.empty((0, width)),
+            ]
+            for name, _, _ in self.levels
+        }
+        self._sizes = {name: 0 for name, _, _ in self.levels}
+
+    @property
+    def buckets(self):
+        """
+        :return: Dict of level name to a tuple of (keys, count, sum, min, max, sum of squares) views, one sorted
+                 row per bucket.
+        """
+        return {name: tuple(array[:self._sizes[name]] for array in arrays) for name, arrays in self._arrays.items()}
+
+    def __getstate__(self):
+        # Pickle (e.g. back from a worker process) only the filled part of every level
+        state = self.__dict__.copy()
+        state['_arrays'] = {name: list(stored) for name, stored in self.buckets.items()}
+        return state
+
+    def _merge_level(self, name, partial):
+        """
+        Merges reduced, sorted buckets into a level. Stored buckets before the first new key are left in place;
+        only the tail from there on is reduced with the new buckets and written back, growing the arrays
+        geometrically when they are full.
+
+        :param name: A ladder level name.
+        :param partial: Tuple of (keys, count, sum, min, max, sum of squares) with one sorted row per bucket.
+        """
+        if len(partial[0]) == 0:
+            return
+        arrays, size = self._arrays[name], self._sizes[name]
+        position = int(np.searchsorted(arrays[0][:size], partial[0][0], side='left'))
+        merged = _reduce_buckets(*(np.concatenate([array[position:size], new]) for array, new in zip(arrays, partial)))
+        end = position + len(merged[0])
+        if end > len(arrays[0]):
+            capacity = max(end, 2 * len(arrays[0]))
+            grown = []
+            for array in arrays:
+                bigger = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+                bigger[:position] = array[:position]
+                grown.append(bigger)
+            self._arrays[name] = arrays = grown
+        for array, values in zip(arrays, merged):
+            array[position:end] = values
+        self._sizes[name] = end
+
+    def update(self, data):
+        """
+        Merges a batch of rows into every level of the store.
+
+        :param data: DataFrame with a datetime 'timestamp' column and the store's numeric columns.
+        """
+        if data.empty:
+            return
+        values = data[self.columns].to_numpy(dtype='f8', na_value=np.nan)
+        present = ~np.isnan(values)
+        partial = _reduce_buckets(
+            _bucket_keys(self.levels[0], data['timestamp'].to_numpy()),
+            present.astype('i8'),
+            np.where(present, values, 0.0),
+            np.where(present, values, np.inf),
+            np.where(present, values, -np.inf),
+            np.where(present, values * values, 0.0),
+        )
+
+        finer = self.levels[0]
+        for level in self.levels:
+            if level is not finer:
+                keys = _bucket_keys(level, _bucket_starts(finer, partial[0]))
+                partial = _reduce_buckets(keys, *partial[1:])
+                finer = level
+            self._merge_level(level[0], partial)
+
+    def merge(self, other):
+        """
+        Folds another store with the same columns and finest level into this one, e.g. partial rollups
+        built on separate partitions of the data.
+
+        :param other: RollupStore to merge.
+        """
+        if other.columns != self.columns or other.finest != self.finest:
+            raise ValueError("Only rollup stores with the same columns and finest level can be merged.")
+        for name, stored in other.buckets.items():
+            self._merge_level(name, stored)
+
+    def _level(self, name):
+        return self.levels[[entry[0] for entry in self.levels].index(name)]
+
+    def bucket_span(self, name, start_time, end_time):
+        """
+        Counts the buckets of a ladder level between two times, without reading the store.
+
+        :param name: A ladder level name.
+        :param start_time: Range start.
+        :param end_time: Range end.
+        :return: Number of buckets the range touches.
+        """
+        level = self._level(name)
+        bounds = np.array([pd.Timestamp(start_time).as_unit('ns').value, pd.Timestamp(end_time).as_unit('ns').value])
+        first, last = _bucket_keys(level, bounds.view('datetime64[ns]'))
+        return int(last - first + 1)
+
+    def aggregate(self, time_interval, statistic='mean', start_time=None, end_time=None):
+        """
+        Reads an aggregation out of the store. Ladder levels are returned directly; other fixed-length
+        intervals are merged from the coarsest fixed-length level that divides them evenly.
+
+        :param time_interval: A ladder level name or a fixed-length pandas alias such as '15min'.
+        :param statistic: One of 'count', 'sum', 'min', 'max', 'mean', 'var' or 'std'.
+        :param start_time: Optional start; buckets ending before it are left out.
+        :param end_time: Optional end; buckets starting after it are left out.
+        :return: DataFrame indexed by bucket start, with empty buckets between the first and last as NaN.
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown statistic {statistic!r}. Expected one of {STATISTICS}.")
+
+        if time_interval in self.buckets:
+            level = self._level(time_interval)
+            keys, count, total, low, high, squares = self.buckets[time_interval]
+        else:
+            nanos = pd.Timedelta(time_interval if time_interval[0].isdigit() else '1' + time_interval).value
+            source = [entry for entry in self.levels if entry[1] == 'ns' and nanos % entry[2] == 0]
+            if not source:
+                raise ValueError(f"Interval {time_interval!r} cannot be derived from the '{self.finest}' level.")
+            source = source[-1]
+            level = (time_interval, 'ns', nanos)
+            stored = self.buckets[source[0]]
+            keys, count, total, low, high, squares = _reduce_buckets(stored[0] * source[2] // nanos, *stored[1:])
+
+        if start_time is not None or end_time is not None:
+            bounds = [pd.Timestamp(value).as_unit('ns').value if value is not None else None for value in (start_time, end_time)]
+            selected = np.ones(len(keys), dtype=bool)
+            for bound, keep in zip(bounds, (np.greater_equal, np.less_equal)):
+                if bound is not None:
+                    key = _bucket_keys(level, np.array([bound]).view('datetime64[ns]'))[0]
+                    selected &= keep(keys, key)
+            keys, count, total, low, high, squares = (array[selected] for array in (keys, count, total, low, high, squares))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if statistic == 'count':
+                result = count
+            elif statistic == 'sum':
+                result = total
+            elif statistic == 'min':
+                result = np.where(count > 0, low, np.nan)
+            elif statistic == 'max':
+                result = np.where(count > 0, high, np.nan)
+            elif statistic == 'mean':
+                result = total / count
+            else:
+                result = (squares - total * total / count) / (count - 1)
+                result = np.where(count > 1, np.maximum(result, 0.0), np.nan)
+                if statistic == 'std':
+                    result = np.sqrt(result)
+
+        frame = pd.DataFrame(result, columns=self.columns, index=keys)
+        if len(keys):
+            frame = frame.reindex(np.arange(keys[0], keys[-1] + 1, dtype='i8'))
+            if statistic in ('count', 'sum'):
+                frame = frame.fillna(0).astype(result.dtype)
+        frame.index = pd.DatetimeIndex(_bucket_starts(level, frame.index.to_numpy(dtype='i8')), name='timestamp')
+        return frame
+
+    def save(self, path):
+        """
+        Saves the store to a compressed .npz file.
+
+        :param path: The file path where the store will be saved.
+        """
+        arrays = {'columns': np.array(self.columns, dtype=str), 'finest': np.array(self.finest)}
+        for name, stored in self.buckets.items():
+            for field, array in zip(('keys', 'count', 'sum', 'min', 'max', 'squares'), stored):
+                arrays[f'{name}/{field}'] = array
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a store saved with save().
+
+        :param path: The file path of the saved store.
+        :return: RollupStore instance.
+        """
+        with np.load(path) as arrays:
+            store = cls(arrays['columns'].tolist(), finest=str(arrays['finest']))
+            for name in store._arrays:
+                store._arrays[name] = [
+                    arrays[f'{name}/{field}'] for field in ('keys', 'count', 'sum', 'min', 'max', 'squares')
+                ]
+                store._sizes[name] = len(store._arrays[name][0])
+        return store
@@ -0,0 +1,118 @@
+# series_decimation.py
+# Decimation of long time series before plotting. A chart only has so many horizontal pixels, so drawing
+# tens of millions of points wastes time and memory without changing what is seen. Min/max-per-bucket keeps
+# the extremes of every pixel column, which preserves spikes exactly; LTTB (Largest-Triangle-Three-Buckets)
+# keeps the points that best preserve the visual shape of the line.
+
+import numpy as np
+import pandas as pd
+
+# Default number of points handed to the plotting backend
+DEFAULT_MAX_POINTS = 4000
+
+DECIMATION_METHODS = ('minmax', 'lttb')
+
+def minmax_decimate(x, y, buckets):
+    """
+    Keeps the minimum and maximum point of each of `buckets` equal-width x ranges, in x order.
+
+    :param x: int64 or float array of x positions, sorted ascending.
+    :param y: float array of values aligned with x.
+    :param buckets: Number of x ranges, typically the plot width in pixels.
+    :return: Indices of the kept points, ascending.
+    """
+    n = len(x)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    span = float(x[-1] - x[0]) or 1.0
+    bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1)
+    # x is sorted, so each bucket is a contiguous segment
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    kept = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = reduce.reduceat(y, starts)
+        candidates = np.flatnonzero(y == extreme[segment])
+        _, first = np.unique(segment[candidates], return_index=True)
+        kept.append(candidates[first])
+    return np.unique(np.concatenate(kept))
+
+def lttb_decimate(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling. The first and last points are always kept; every bucket in
+    between contributes the point forming the largest triangle with the previously kept point and the mean
+    of the next bucket. Each bucket is evaluated with vectorized area computations.
+
+    :param x: Array of x positions, sorted ascending.
+    :param y: Array of values aligned with x.
+    :param threshold: Number of points to keep.
+    :return: Indices of the kept points, ascending.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='f8')
+    y = np.asarray(y, dtype='f8')
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # Mean point of every bucket, used as the third triangle vertex for the bucket before it
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    means_x = np.r_[sums_x / sizes, x[-1]]
+    means_y = np.r_[sums_y / sizes, y[-1]]
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        areas = np.abs((x[previous] - means_x[bucket + 1]) * (y[lo:hi] - y[previous])
+                       - (x[previous] - x[lo:hi]) * (means_y[bucket + 1] - y[previous]))
+        previous = lo + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    kept[-1] = n - 1
+    return kept
+
+def decimate(timestamps, values, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """
+    Reduces a time series to at most max_points points.
+
+    :param timestamps: Sorted datetime64 Series or array.
+    :param values: Values aligned with the timestamps.
+    :param max_points: Maximum number of points to keep.
+    :param method: 'minmax' to keep each bucket's extremes, or 'lttb' to preserve the line shape.
+    :return: Tuple (timestamps, values) of the kept points.
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f"Unknown decimation method {method!r}. Expected one of {DECIMATION_METHODS}.")
+    x = np.asarray(timestamps, dtype='datetime64[ns]').view('i8')
+    y = np.asarray(values, dtype='f8')
+    present = ~np.isnan(y)
+    if not present.all():
+        x, y = x[present], y[present]
+    if method == 'minmax':
+        kept = minmax_decimate(x, y, max(1, max_points // 2))
+    else:
+        kept = lttb_decimate(x, y, max_points)
+    return x[kept].view('datetime64[ns]'), y[kept]
+
+def rollup_envelope(rollups, column, start_time, end_time, max_points=DEFAULT_MAX_POINTS):
+    """
+    Reads a min/mean/max envelope of a column from a rollup store, choosing the finest ladder level that
+    keeps the number of buckets in the window within max_points, so no raw rows are touched.
+
+    :param rollups: RollupStore holding the column.
+    :param column: Column to read.
+    :param start_time: Window start.
+    :param end_time: Window end.
+    :param max_points: Maximum number of buckets.
+    :return: DataFrame indexed by bucket start with 'min', 'mean' and 'max' columns.
+    """
+    for name, _, _ in rollups.levels:
+        if rollups.bucket_span(name, start_time, end_time) <= max_points:
+            envelope = pd.DataFrame({
+                statistic: rollups.aggregate(name, statistic, start_time, end_time)[column]
+                for statistic in ('min', 'mean', 'max')
+            })
+            return envelope.dropna()
+    return None
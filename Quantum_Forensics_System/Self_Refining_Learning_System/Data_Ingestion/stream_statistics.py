@@ -0,0 +1,330 @@
+# stream_statistics.py
+# Mergeable streaming statistics for the historical data ingestion pipeline. Count, mean, standard
+# deviation, min and max are accumulated exactly chunk by chunk: sums and sums of squares are kept as exact
+# rationals, so they do not depend on how the rows were split into chunks or partitions, or on the order the
+# pieces are merged in. Quantiles are exact while a column holds up to EXACT_QUANTILE_ITEMS values and come
+# from a KLL sketch with a configurable accuracy beyond that. Accumulators built on separate partitions merge
+# into one, and the result is reported in the same shape as DataFrame.describe().
+
+import math
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+
+# Default KLL compactor size; the normalized rank error of a quantile is roughly 1.7 / k
+DEFAULT_SKETCH_K = 200
+
+# Quantiles reported by describe(), as in pandas
+DEFAULT_PERCENTILES = (0.25, 0.5, 0.75)
+
+# Values a sketch keeps uncompacted; up to this many, quantiles are exact and interpolated like describe()
+EXACT_QUANTILE_ITEMS = 100_000
+
+# Bits of a float64 significand
+SIGNIFICAND_BITS = 53
+
+def _int_sum(values):
+    """
+    :param values: int64 array whose values fit in 63 bits.
+    :return: The exact sum as a Python int; the 32-bit halves are summed separately so no int64 sum overflows.
+    """
+    return int((values >> 32).sum()) * 2 ** 32 + int((values & 0xFFFFFFFF).sum())
+
+def exact_sums(values):
+    """
+    Sums finite float64 values and their squares without rounding. Every value is split into an integer
+    significand and a binary exponent, the significands of each exponent are summed as integers, and the
+    per-exponent sums are scaled into one rational.
+
+    :param values: 1-D float64 array of finite values.
+    :return: Tuple (sum, sum of squares) as Fractions.
+    """
+    if len(values) == 0:
+        return Fraction(0), Fraction(0)
+    fractions, exponents = np.frexp(values)
+    significands = (fractions * 2.0 ** SIGNIFICAND_BITS).astype('i8')
+    # A stable sort of 16-bit keys is a radix sort, so grouping by exponent stays linear
+    order = np.argsort(exponents.astype(np.int16), kind='stable')
+    exponents = exponents[order]
+    significands = significands[order]
+    starts = np.flatnonzero(np.r_[True, exponents[1:] != exponents[:-1]])
+    ends = np.r_[starts[1:], len(exponents)]
+    # Squares of 53-bit significands need 106 bits; split them into 27-bit halves whose products fit in 63
+    magnitudes = np.abs(significands)
+    high, low = magnitudes >> 27, magnitudes & (2 ** 27 - 1)
+    total = Fraction(0)
+    squares = Fraction(0)
+    for start, end, exponent in zip(starts, ends, exponents[starts]):
+        group = slice(start, end)
+        scale = int(exponent) - SIGNIFICAND_BITS
+        total += _int_sum(significands[group]) * Fraction(2) ** scale
+        square = (_int_sum(high[group] * high[group]) * 2 ** 54 + _int_sum(high[group] * low[group]) * 2 ** 28
+                  + _int_sum(low[group] * low[group]))
+        squares += square * Fraction(2) ** (2 * scale)
+    return total, squares
+
+def _interpolated_quantiles(items, fractions):
+    """
+    :param items: Sorted 1-D array.
+    :return: Quantiles with linear interpolation between the closest ranks, as DataFrame.describe(); integer
+             items are interpolated in integers so nanosecond timestamps keep their precision.
+    """
+    positions = np.asarray(fractions, dtype='f8') * (len(items) - 1)
+    below = np.floor(positions).astype('i8')
+    above = np.minimum(below + 1, len(items) - 1)
+    weights = positions - below
+    if items.dtype.kind == 'i':
+        return items[below] + np.round((items[above] - items[below]) * weights).astype('i8')
+    with np.errstate(invalid='ignore'):
+        return items[below] + (items[above] - items[below]) * weights
+
+class KLLSketch:
+    """
+    KLL quantile sketch. Items are kept in levels of sorted compactors where an item at level h stands for
+    2**h input items; when a level outgrows its capacity, every other item (from a random offset) moves up a
+    level. Memory stays O(k) whatever the number of items, and two sketches merge level by level. Until the
+    sketch holds more than EXACT_QUANTILE_ITEMS items nothing is compacted and its quantiles are exact, so
+    they do not depend on how the items were split between updates and merges.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=0):
+        """
+        Initializes an empty sketch.
+
+        :param k: Capacity of the top compactor; larger values give more accurate quantiles.
+        :param seed: Seed for the compaction offsets, so results are reproducible.
+        """
+        self.k = k
+        self.levels = []
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        return max(2, int(math.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - level))))
+
+    def _compress(self):
+        if len(self.levels) == 1 and len(self.levels[0]) <= EXACT_QUANTILE_ITEMS:
+            return
+        overfull = True
+        while overfull:
+            overfull = False
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if len(items) <= self._capacity(level):
+                    continue
+                overfull = True
+                if level + 1 == len(self.levels):
+                    self.levels.append(items[:0])
+                items = np.sort(items)
+                odd = len(items) % 2
+                self.levels[level] = items[:odd]
+                promoted = items[odd + int(self.rng.integers(2))::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values):
+        """
+        Adds a batch of values.
+
+        :param values: 1-D numpy array without missing values.
+        """
+        if len(values) == 0:
+            return
+        if not self.levels:
+            self.levels.append(values[:0])
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other):
+        """
+        Folds another sketch into this one.
+
+        :param other: KLLSketch built with the same k.
+        """
+        for level, items in enumerate(other.levels):
+            if level < len(self.levels):
+                self.levels[level] = np.concatenate([self.levels[level], items])
+            else:
+                self.levels.append(items.copy())
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, fractions):
+        """
+        Estimates quantiles.
+
+        :param fractions: Sequence of quantile fractions between 0 and 1.
+        :return: numpy array of estimates, NaN when the sketch is empty.
+        """
+        if self.count == 0:
+            return np.full(len(fractions), np.nan)
+        if len(self.levels) == 1:
+            return _interpolated_quantiles(np.sort(self.levels[0]), fractions)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype='i8') for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(fractions) * (cumulative[-1] - 1) + 1
+        return items[np.minimum(np.searchsorted(cumulative, targets), len(items) - 1)]
+
+class ColumnStatistics:
+    """
+    Exact count, sum, sum of squares, min and max of one column, plus a KLL sketch for its quantiles. Sums
+    are exact integers for datetime columns (int64 nanoseconds) and exact rationals for numeric ones, so
+    merging partial statistics in any grouping gives the same totals as a single pass. Infinite values are
+    summed apart, making the mean infinite (or NaN for both signs) as in pandas.
+    """
+
+    def __init__(self, is_datetime, k=DEFAULT_SKETCH_K, seed=0, unit='ns'):
+        self.is_datetime = is_datetime
+        self.unit = unit
+        self.count = 0
+        self.total = 0 if is_datetime else Fraction(0)
+        self.squares = Fraction(0)
+        self.infinite = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.sketch = KLLSketch(k, seed)
+
+    def update(self, series):
+        """
+        Adds the non-missing values of a Series.
+        """
+        if self.is_datetime:
+            values = series.to_numpy(dtype='datetime64[ns]')
+            values = values[~np.isnat(values)].view('i8')
+        else:
+            values = series.to_numpy(dtype='f8', na_value=np.nan)
+            values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self._combine(len(values), values.min(), values.max())
+        if self.is_datetime:
+            self.total += _int_sum(values)
+        else:
+            finite = np.isfinite(values)
+            if not finite.all():
+                self.infinite += float(values[~finite].sum())
+            total, squares = exact_sums(values[finite])
+            self.total += total
+            self.squares += squares
+        self.sketch.update(values)
+
+    def _combine(self, count, minimum, maximum):
+        if count == 0:
+            return
+        if self.count == 0:
+            self.minimum, self.maximum = minimum, maximum
+        else:
+            self.minimum = min(self.minimum, minimum)
+            self.maximum = max(self.maximum, maximum)
+        self.count += count
+
+    def merge(self, other):
+        """
+        Folds the statistics of the same column computed on another partition into these.
+        """
+        self._combine(other.count, other.minimum, other.maximum)
+        self.total += other.total
+        self.squares += other.squares
+        self.infinite += other.infinite
+        self.sketch.merge(other.sketch)
+
+    def _mean(self):
+        if self.count == 0:
+            return np.nan
+        if self.infinite:
+            return self.infinite
+        return float(self.total / self.count)
+
+    def _std(self):
+        if self.count < 2 or self.infinite:
+            return np.nan
+        variance = (self.squares - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(float(variance))
+
+    def describe(self, percentiles):
+        """
+        :return: Dict of describe() rows for this column.
+        """
+        quantiles = self.sketch.quantiles(percentiles)
+        if self.is_datetime:
+            if self.count == 0:
+                return {'count': 0, 'std': np.nan}
+            to_time = lambda ns: pd.Timestamp(int(ns), unit='ns').floor(self.unit).as_unit(self.unit)
+            row = {'count': self.count, 'mean': to_time(self.total // self.count),
+                   'min': to_time(self.minimum), 'max': to_time(self.maximum), 'std': np.nan}
+            row.update({label: to_time(q) for label, q in zip(_percentile_labels(percentiles), quantiles)})
+            return row
+        row = {'count': float(self.count), 'mean': self._mean(), 'std': self._std(),
+               'min': float(self.minimum) if self.count else np.nan, 'max': float(self.maximum) if self.count else np.nan}
+        row.update({label: float(q) for label, q in zip(_percentile_labels(percentiles), quantiles)})
+        return row
+
+def _percentile_labels(percentiles):
+    return [f"{fraction * 100:g}%" for fraction in percentiles]
+
+class StatisticsAccumulator:
+    """
+    Accumulates describe()-style statistics for the numeric and datetime columns of a stream of chunks.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_K, percentiles=DEFAULT_PERCENTILES, seed=0):
+        """
+        Initializes an empty accumulator.
+
+        :param k: KLL sketch size for the quantiles.
+        :param percentiles: Quantile fractions to report.
+        :param seed: Seed for the sketches, so results are reproducible.
+        """
+        self.k = k
+        self.percentiles = tuple(percentiles)
+        self.seed = seed
+        self.columns = {}
+
+    def update(self, chunk):
+        """
+        Adds a chunk of rows. Columns are taken from the first chunk that contains them.
+
+        :param chunk: DataFrame.
+        """
+        if chunk.empty:
+            # An empty chunk says nothing about column types, e.g. an all-missing text column parsed as float
+            return
+        for name in chunk.columns:
+            series = chunk[name]
+            if name not in self.columns:
+                is_datetime = pd.api.types.is_datetime64_any_dtype(series)
+                if not is_datetime and (not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)):
+                    continue
+                unit = np.datetime_data(series.dtype)[0] if is_datetime and isinstance(series.dtype, np.dtype) else 'ns'
+                self.columns[name] = ColumnStatistics(is_datetime, self.k, self.seed, unit)
+            self.columns[name].update(series)
+
+    def merge(self, other):
+        """
+        Folds an accumulator built on another partition into this one.
+
+        :param other: StatisticsAccumulator with the same settings.
+        """
+        for name, stats in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(stats)
+            else:
+                self.columns[name] = stats
+
+    def describe(self):
+        """
+        :return: DataFrame laid out like DataFrame.describe() for the accumulated columns.
+        """
+        labels = _percentile_labels(self.percentiles)
+        if any(stats.is_datetime for stats in self.columns.values()):
+            index = ['count', 'mean', 'min'] + labels + ['max', 'std']
+        else:
+            index = ['count', 'mean', 'std', 'min'] + labels + ['max']
+        return pd.DataFrame(
+            {name: pd.Series(stats.describe(self.percentiles)).reindex(index) for name, stats in self.columns.items()},
+            index=index,
+        )
@@ -0,0 +1,274 @@
+# time_index.py
+# Timestamp-sorted store for the historical data ingestion pipeline. Rows are held column by column in
+# runs sorted by their int64 nanosecond timestamps, so a time-window query is two binary searches per run
+# and returns views into the stored arrays instead of building boolean masks and copying the frame.
+# New data is appended as additional sorted runs and merged into one run by compaction, which can run in a
+# background thread while queries continue against the previous runs.
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Number of appended runs tolerated before an append triggers compaction
+DEFAULT_MAX_RUNS = 8
+
+def _restore_timestamps(timestamps, dtype):
+    """
+    :param timestamps: int64 nanoseconds since the epoch.
+    :param dtype: The datetime dtype the timestamps had in the frame they came from.
+    :return: The timestamps in that dtype; a view when it is datetime64[ns].
+    """
+    values = timestamps.view('datetime64[ns]')
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(dtype.tz).as_unit(dtype.unit)
+    return values if dtype == values.dtype else values.astype(dtype)
+
+def save_column(path, position, name, values):
+    """
+    Saves one column as column_<position>.npy in a directory. Text columns are stored as fixed-width unicode
+    arrays with a mask of their missing values in missing_<position>.npy; object columns holding anything
+    other than text are refused rather than converted to text.
+
+    :param name: Column name, for the error message.
+    """
+    if values.dtype == object:
+        if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+            raise ValueError(f"Column {name!r} holds values other than text and cannot be saved.")
+        missing = pd.isna(values)
+        np.save(os.path.join(path, f'missing_{position}.npy'), missing)
+        values = np.where(missing, '', values).astype(str)
+    np.save(os.path.join(path, f'column_{position}.npy'), values)
+
+def load_column(path, position, mmap_mode=None):
+    """
+    Loads a column saved with save_column. Text columns with a missing-value mask are read into memory as
+    object arrays holding None where values were missing; other columns can be memory-mapped.
+    """
+    values = np.load(os.path.join(path, f'column_{position}.npy'), mmap_mode=mmap_mode)
+    missing_path = os.path.join(path, f'missing_{position}.npy')
+    if os.path.exists(missing_path):
+        values = values.astype(object)
+        values[np.load(missing_path)] = None
+    return values
+
+class SortedRun:
+    """
+    One immutable block of rows sorted by timestamp, stored as a dict of equally long numpy arrays, together
+    with the columns' order and dtypes in the frame the rows came from.
+    """
+
+    def __init__(self, timestamps, columns, dtypes):
+        """
+        :param timestamps: Sorted int64 nanoseconds since the epoch.
+        :param columns: Dict of column name to numpy array aligned with timestamps.
+        :param dtypes: Dict of every column name, the timestamp column included, to its dtype, in column order.
+        """
+        self.timestamps = timestamps
+        self.columns = columns
+        self.dtypes = dtypes
+
+    @classmethod
+    def from_frame(cls, data, timestamp_column='timestamp'):
+        """
+        Builds a run from a DataFrame, sorting it by timestamp (stable, so ties keep their order).
+        """
+        timestamps = data[timestamp_column].to_numpy(dtype='datetime64[ns]').view('i8')
+        order = None if len(timestamps) < 2 or (timestamps[1:] >= timestamps[:-1]).all() else np.argsort(timestamps, kind='stable')
+        columns = {}
+        for name in data.columns:
+            if name == timestamp_column:
+                continue
+            values = data[name].to_numpy()
+            columns[name] = values if order is None else values[order]
+        return cls(timestamps if order is None else timestamps[order], columns, dict(data.dtypes))
+
+    def bounds(self, start, end):
+        """
+        :return: Tuple (lo, hi) such that rows lo..hi-1 have start <= timestamp <= end.
+        """
+        return (int(np.searchsorted(self.timestamps, start, side='left')),
+                int(np.searchsorted(self.timestamps, end, side='right')))
+
+    def slice(self, lo, hi):
+        """
+        :return: SortedRun over rows lo..hi-1, viewing this run's arrays.
+        """
+        return SortedRun(self.timestamps[lo:hi], {name: values[lo:hi] for name, values in self.columns.items()}, self.dtypes)
+
+    def frame(self, lo, hi, timestamp_column='timestamp'):
+        """
+        :return: DataFrame over rows lo..hi-1 with the columns and dtypes of the frame the rows came from. Its
+                 numpy-typed columns, and a datetime64[ns] timestamp column, are views into the run.
+        """
+        data = {}
+        for name, dtype in self.dtypes.items():
+            if name == timestamp_column:
+                data[name] = _restore_timestamps(self.timestamps[lo:hi], dtype)
+            else:
+                values = self.columns[name][lo:hi]
+                # Object arrays are wrapped in a Series too, or the frame would infer a text dtype for them
+                data[name] = values if isinstance(dtype, np.dtype) and dtype != object else pd.Series(values, dtype=dtype, copy=False)
+        return pd.DataFrame(data, copy=False)
+
+def _merge_runs(runs):
+    """
+    Merges sorted runs into one. Rows with equal timestamps keep the order of the runs they came from.
+    """
+    if len(runs) == 1:
+        return runs[0]
+    timestamps = np.concatenate([run.timestamps for run in runs])
+    # Stable sort of concatenated sorted runs, which timsort merges in near-linear time
+    order = np.argsort(timestamps, kind='stable')
+    columns = {name: np.concatenate([run.columns[name] for run in runs])[order] for name in runs[0].columns}
+    return SortedRun(timestamps[order], columns, runs[0].dtypes)
+
+class TimeIndexedStore:
+    """
+    Persistent, timestamp-sorted row store with O(log n) window queries.
+    """
+
+    def __init__(self, timestamp_column='timestamp', max_runs=DEFAULT_MAX_RUNS):
+        """
+        Initializes an empty store.
+
+        :param timestamp_column: Name of the datetime column the rows are sorted on.
+        :param max_runs: Number of runs tolerated before an append triggers compaction.
+        """
+        self.timestamp_column = timestamp_column
+        self.max_runs = max_runs
+        self.runs = []
+        self._lock = threading.Lock()
+        self._compaction = None
+
+    @classmethod
+    def from_frame(cls, data, timestamp_column='timestamp', max_runs=DEFAULT_MAX_RUNS):
+        """
+        Builds a store holding a single sorted run of the given rows.
+        """
+        store = cls(timestamp_column, max_runs)
+        store.append(data)
+        return store
+
+    def __len__(self):
+        return sum(len(run.timestamps) for run in self.runs)
+
+    def append(self, data, background=True):
+        """
+        Adds rows as a new sorted run. When the number of runs exceeds max_runs the runs are compacted,
+        in a background thread unless background is False.
+
+        :param data: DataFrame with the store's timestamp column and the same other columns as earlier appends.
+        :param background: Compact in a background thread when compaction is triggered.
+        """
+        if data.empty:
+            return
+        run = SortedRun.from_frame(data, self.timestamp_column)
+        with self._lock:
+            self.runs = self.runs + [run]
+            needs_compaction = len(self.runs) > self.max_runs
+        if needs_compaction:
+            self.compact(background=background)
+
+    def compact(self, background=False):
+        """
+        Merges all current runs into one. Queries keep reading the old runs until the merged run replaces them;
+        runs appended while a compaction is in progress are kept after the merged run.
+
+        :param background: Run the merge in a background thread and return immediately.
+        """
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        snapshot = self.runs
+        if len(snapshot) < 2:
+            return
+
+        def merge():
+            merged = _merge_runs(snapshot)
+            with self._lock:
+                self.runs = [merged] + self.runs[len(snapshot):]
+
+        if background:
+            self._compaction = threading.Thread(target=merge, daemon=True)
+            self._compaction.start()
+        else:
+            merge()
+
+    def wait(self):
+        """
+        Blocks until a background compaction, if any, has finished.
+        """
+        if self._compaction is not None:
+            self._compaction.join()
+
+    def _bounds(self, start, end):
+        start = pd.Timestamp(start).as_unit('ns').value
+        end = pd.Timestamp(end).as_unit('ns').value
+        runs = self.runs
+        return [(run, *run.bounds(start, end)) for run in runs]
+
+    def count(self, start, end):
+        """
+        Counts the rows with start <= timestamp <= end with binary searches only.
+        """
+        return sum(hi - lo for _, lo, hi in self._bounds(start, end))
+
+    def query(self, start, end):
+        """
+        Returns the rows with start <= timestamp <= end in timestamp order. When a single run holds them, as
+        after compaction, the numeric and datetime columns of the result are views into the store.
+
+        :param start: Window start (inclusive).
+        :param end: Window end (inclusive).
+        :return: DataFrame.
+        """
+        hits = [(run, lo, hi) for run, lo, hi in self._bounds(start, end) if hi > lo]
+        if not hits:
+            return self.runs[0].frame(0, 0, self.timestamp_column) if self.runs else pd.DataFrame(columns=[self.timestamp_column])
+        if len(hits) == 1:
+            run, lo, hi = hits[0]
+            return run.frame(lo, hi, self.timestamp_column)
+        return _merge_runs([run.slice(lo, hi) for run, lo, hi in hits]).frame(0, None, self.timestamp_column)
+
+    def save(self, path):
+        """
+        Compacts the store and saves it as a directory of .npy files, one per column (see save_column), that
+        load() can memory-map, with the column order and dtypes in the manifest.
+
+        :param path: Directory where the store will be written.
+        """
+        self.wait()
+        self.compact()
+        run = self.runs[0] if self.runs else SortedRun(np.empty(0, dtype='i8'), {}, {self.timestamp_column: np.dtype('datetime64[ns]')})
+        names = list(run.columns)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'timestamps.npy'), run.timestamps)
+        for position, name in enumerate(names):
+            save_column(path, position, name, run.columns[name])
+        with open(os.path.join(path, 'columns.json'), 'w') as manifest:
+            json.dump({'timestamp_column': self.timestamp_column, 'columns': names,
+                       'dtypes': {name: str(dtype) for name, dtype in run.dtypes.items()}}, manifest)
+
+    @classmethod
+    def load(cls, path, mmap=True, max_runs=DEFAULT_MAX_RUNS):
+        """
+        Loads a store written by save(), memory-mapping the column files so opening it is instant and window
+        queries only page in the rows they touch. Text columns with missing values are read into memory, where
+        the missing values are restored.
+
+        :param path: Directory written by save().
+        :param mmap: Memory-map the column files read-only instead of reading them into memory.
+        :return: TimeIndexedStore instance.
+        """
+        with open(os.path.join(path, 'columns.json')) as manifest:
+            layout = json.load(manifest)
+        mode = 'r' if mmap else None
+        timestamps = np.load(os.path.join(path, 'timestamps.npy'), mmap_mode=mode)
+        columns = {name: load_column(path, position, mode) for position, name in enumerate(layout['columns'])}
+        dtypes = {name: pd.api.types.pandas_dtype(dtype) for name, dtype in layout['dtypes'].items()}
+        store = cls(layout['timestamp_column'], max_runs)
+        if len(timestamps):
+            store.runs = [SortedRun(timestamps, columns, dtypes)]
+        return store
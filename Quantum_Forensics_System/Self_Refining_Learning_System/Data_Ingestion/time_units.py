@@ -0,0 +1,114 @@
+# time_units.py
+# Vectorized multi-scale time-unit conversions for the historical data ingestion pipeline.
+# All conversions work on the int64 nanosecond view of a timestamp column, so values are exact and
+# reproducible; units finer than a nanosecond are widened to exact 128-bit decimals instead of floats.
+
+import numpy as np
+import pandas as pd
+
+# Supported units, finest to coarsest: (kind, factor).
+# 'scale' units multiply the nanosecond count by the factor and need more than 64 bits,
+# 'div' units floor-divide the nanosecond count by the factor,
+# 'calendar' units floor-divide the number of calendar years since 1970 by the factor.
+TIME_UNITS = {
+    'attoseconds': ('scale', 9),
+    'femtoseconds': ('scale', 6),
+    'picoseconds': ('scale', 3),
+    'nanoseconds': ('div', 1),
+    'microseconds': ('div', 1_000),
+    'milliseconds': ('div', 1_000_000),
+    'seconds': ('div', 1_000_000_000),
+    'minutes': ('div', 60_000_000_000),
+    'hours': ('div', 3_600_000_000_000),
+    'days': ('div', 86_400_000_000_000),
+    'years': ('calendar', 1),
+    'decades': ('calendar', 10),
+    'centuries': ('calendar', 100),
+}
+
+# Sub-second and clock fields extracted from each timestamp: (name, divisor, modulus)
+TIME_COMPONENTS = [
+    ('nanoseconds', 1, 1_000),
+    ('microseconds', 1_000, 1_000),
+    ('milliseconds', 1_000_000, 1_000),
+    ('seconds', 1_000_000_000, 60),
+    ('minutes', 60_000_000_000, 60),
+    ('hours', 3_600_000_000_000, 24),
+]
+
+def _nanoseconds(timestamps):
+    """
+    Returns the int64 nanoseconds since the epoch of a datetime Series, and a mask of missing values.
+
+    :param timestamps: A datetime64 Series.
+    """
+    values = timestamps.to_numpy(dtype='datetime64[ns]')
+    return values.view('i8'), np.isnat(values)
+
+def _with_missing(values, missing):
+    """
+    Wraps an int64 result in a nullable integer array when some timestamps were missing.
+    """
+    if missing.any():
+        return pd.arrays.IntegerArray(values, missing)
+    return values
+
+def _scaled(ns, missing, digits):
+    """
+    Multiplies nanosecond counts by 10**digits exactly. With pyarrow the result is a decimal128 column built
+    by rescaling, which shifts the unscaled integer without any arithmetic that could overflow; without
+    pyarrow it falls back to an object column of Python integers.
+
+    :param ns: int64 nanoseconds since the epoch.
+    :param missing: Boolean mask of missing timestamps.
+    :param digits: Power of ten to scale by.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        scaled = ns.astype(object) * 10 ** digits
+        scaled[missing] = None
+        return scaled
+
+    precision = 19 + digits
+    wide = pa.array(ns, mask=missing).cast(pa.decimal128(19, 0)).cast(pa.decimal128(precision, digits))
+    return pd.arrays.ArrowExtensionArray(wide.view(pa.decimal128(precision, 0)))
+
+def epoch_units(timestamps, units=None):
+    """
+    Expresses each timestamp as a whole number of each unit elapsed since 1970-01-01, flooring toward the
+    past for coarser units.
+
+    :param timestamps: A datetime64 Series.
+    :param units: Names from TIME_UNITS to compute; all of them when omitted.
+    :return: Dict mapping each unit name to an array aligned with the Series.
+    """
+    ns, missing = _nanoseconds(timestamps)
+    years = None
+    results = {}
+    for unit in units or TIME_UNITS:
+        kind, factor = TIME_UNITS[unit]
+        if kind == 'scale':
+            results[unit] = _scaled(ns, missing, factor)
+        elif kind == 'div':
+            results[unit] = _with_missing(ns // factor, missing)
+        else:
+            if years is None:
+                years = ns.view('datetime64[ns]').astype('datetime64[Y]').view('i8')
+            results[unit] = _with_missing(years // factor, missing)
+    return results
+
+def time_components(timestamps):
+    """
+    Splits each timestamp into its clock fields, from the nanosecond within the microsecond up to the hour
+    of the day, using integer arithmetic on the nanosecond count.
+
+    :param timestamps: A datetime64 Series.
+    :return: Dict mapping each component name to an int32 array aligned with the Series.
+    """
+    ns, missing = _nanoseconds(timestamps)
+    results = {}
+    for name, divisor, modulus in TIME_COMPONENTS:
+        component = ((ns // divisor) % modulus).astype('i4')
+        results[name] = pd.arrays.IntegerArray(component, missing) if missing.any() else component
+    return results
@@ -0,0 +1,160 @@
+# silo_assimilator.py
+# Assimilates data silos into the canonical rows the ingestion pipeline expects. The source mapping and the
+# rules configuration are loaded once; each silo's compiled plan (see rules_engine) runs over its chunks on a
+# worker thread, and the resulting chunks are handed to the consumer as they are produced through a bounded
+# queue, so a slow consumer holds back the readers instead of letting chunks pile up in memory.
+
+import json
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# The rules engine and the silo readers are plain scripts in sibling directories, not packages
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(_ROOT, 'Preprocessing_Rules'))
+sys.path.append(os.path.join(_ROOT, 'Data_Silos'))
+from rules_engine import compile_plan
+from silo_connector import DEFAULT_CHUNKSIZE, iter_silo_chunks
+
+# Default configuration files
+DEFAULT_RULES_PATH = os.path.join(_ROOT, 'Preprocessing_Rules', 'rules_config.json')
+DEFAULT_MAPPING_PATH = os.path.normpath(os.path.join(_ROOT, '..', 'Data_Ingestion_Integration', 'Data_Sources', 'source_mapping.json'))
+
+# Column naming the silo each assimilated row came from
+SOURCE_COLUMN = 'source'
+
+# Chunks buffered between the readers and the consumer, per worker
+QUEUE_CHUNKS_PER_WORKER = 2
+
+# Marks the end of one silo's stream in the queue
+_DONE = object()
+
+class SiloAssimilator:
+    """
+    Runs the compiled preprocessing plans of the configured silos.
+    """
+
+    def __init__(self, mapping_path=DEFAULT_MAPPING_PATH, rules_path=DEFAULT_RULES_PATH):
+        """
+        Loads the source mapping and the rules configuration.
+
+        :param mapping_path: source_mapping.json: {'sources': {name: {'path', 'format', 'read_options',
+                             'columns', 'keep_unmapped', 'rules'}}}; relative silo paths are resolved against
+                             its directory.
+        :param rules_path: rules_config.json: {'rule_sets': {name: rule set}} (see rules_engine.compile_plan).
+        """
+        with open(mapping_path) as mapping_file:
+            self.sources = json.load(mapping_file)['sources']
+        with open(rules_path) as rules_file:
+            self.rule_sets = json.load(rules_file)['rule_sets']
+        self.base_directory = os.path.dirname(os.path.abspath(mapping_path))
+
+    def plan(self, source):
+        """
+        :return: The compiled plan of a silo, from the cache when its configuration was compiled before.
+        """
+        config = self.sources[source]
+        rule_set_name = config.get('rules', 'default')
+        if rule_set_name not in self.rule_sets:
+            raise ValueError(f"Source {source!r} uses unknown rule set {rule_set_name!r}.")
+        return compile_plan(config, self.rule_sets[rule_set_name])
+
+    def stream_source(self, source, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Yields the canonical chunks of one silo, in order.
+        """
+        chunks = iter_silo_chunks(self.sources[source], chunksize, self.base_directory)
+        yield from self.plan(source).stream(chunks)
+
+    def stream(self, sources=None, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Runs several silos concurrently and yields (source, chunk) pairs as chunks are ready. Chunks of one silo
+        arrive in order; chunks of different silos interleave.
+
+        :param sources: Silo names; all configured silos when omitted.
+        :param workers: Number of silos processed at a time; all of them when omitted.
+        :param chunksize: Rows per chunk read from a silo.
+        """
+        sources = list(self.sources) if sources is None else list(sources)
+        # Compile every plan up front, so configuration errors surface before any silo is read
+        for source in sources:
+            self.plan(source)
+        if not sources:
+            return
+        workers = min(workers or len(sources), len(sources))
+        chunks = queue.Queue(maxsize=QUEUE_CHUNKS_PER_WORKER * workers)
+        stopped = threading.Event()
+
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def run(source):
+            try:
+                for chunk in self.stream_source(source, chunksize):
+                    if not put((source, chunk)):
+                        return
+            except Exception as e:
+                put((source, e))
+            finally:
+                put((source, _DONE))
+
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for source in sources:
+                pool.submit(run, source)
+            remaining = len(sources)
+            while remaining:
+                source, item = chunks.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield source, item
+        finally:
+            stopped.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def assimilate(self, sources=None, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Runs the silos and concatenates their canonical rows, tagged with a 'source' column. Columns that the
+        rule sets cast must come out with the same type from every silo, so that concatenating them cannot
+        silently fall back to mixed-object columns.
+
+        :return: DataFrame of the rows of every silo, grouped by silo in the order given.
+        """
+        sources = list(self.sources) if sources is None else list(sources)
+        parts = {source: [] for source in sources}
+        for source, chunk in self.stream(sources, workers, chunksize):
+            parts[source].append(chunk.assign(**{SOURCE_COLUMN: source}))
+        self._check_types(parts)
+        frames = [frame for source in sources for frame in parts[source]]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _check_types(self, parts):
+        """
+        Raises a ValueError when a cast column has different types in different silos.
+
+        :param parts: Dict of silo name to its canonical chunks.
+        """
+        types = {}
+        for source, chunks in parts.items():
+            cast_columns = self.plan(source).casts
+            for chunk in chunks:
+                for column in cast_columns:
+                    if column in chunk.columns:
+                        types.setdefault(column, {}).setdefault(str(chunk[column].dtype), source)
+        for column, sources_by_type in types.items():
+            if len(sources_by_type) > 1:
+                found = ', '.join(f"{dtype} from {source!r}" for dtype, source in sources_by_type.items())
+                raise ValueError(f"Column {column!r} has different types across silos: {found}.")
@@ -0,0 +1,59 @@
+# silo_connector.py
+# Chunked readers for the data silos listed in source_mapping.json. Every silo is read as a stream of
+# DataFrames of bounded size, whatever its format, so the assimilation engine never holds a whole silo.
+
+import os
+
+import pandas as pd
+
+# Default number of rows per chunk
+DEFAULT_CHUNKSIZE = 250_000
+
+def _csv_chunks(path, chunksize, read_options):
+    yield from pd.read_csv(path, chunksize=chunksize, **read_options)
+
+def _jsonl_chunks(path, chunksize, read_options):
+    with pd.read_json(path, lines=True, chunksize=chunksize, **read_options) as reader:
+        yield from reader
+
+def _parquet_chunks(path, chunksize, read_options):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, **read_options):
+        yield batch.to_pandas()
+
+# Chunk readers by silo format
+READERS = {
+    'csv': _csv_chunks,
+    'jsonl': _jsonl_chunks,
+    'parquet': _parquet_chunks,
+}
+
+def resolve_path(path, base_directory=None):
+    """
+    :return: The silo path, resolved against the directory of the mapping file when it is relative.
+    """
+    if base_directory is None or os.path.isabs(path):
+        return path
+    return os.path.normpath(os.path.join(base_directory, path))
+
+def silo_format(source_config):
+    """
+    :return: The format of a silo: its 'format' entry, or its file extension.
+    """
+    name = source_config.get('format') or os.path.splitext(source_config['path'])[1].lstrip('.').lower()
+    if name not in READERS:
+        raise ValueError(f"Unsupported silo format {name!r}. Expected one of {sorted(READERS)}.")
+    return name
+
+def iter_silo_chunks(source_config, chunksize=DEFAULT_CHUNKSIZE, base_directory=None):
+    """
+    Reads a silo chunk by chunk.
+
+    :param source_config: The silo's entry in source_mapping.json: 'path', optional 'format' and
+                          'read_options' passed to the reader.
+    :param chunksize: Rows per chunk.
+    :param base_directory: Directory relative paths are resolved against.
+    """
+    path = resolve_path(source_config['path'], base_directory)
+    yield from READERS[silo_format(source_config)](path, chunksize, source_config.get('read_options', {}))
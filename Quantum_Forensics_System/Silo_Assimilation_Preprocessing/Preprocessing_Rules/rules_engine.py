@@ -0,0 +1,215 @@
+# rules_engine.py
+# Compiles the preprocessing rules of a data silo into a plan of whole-column operations. A source's column
+# mapping (source_mapping.json) and its rule set (rules_config.json) become a fixed list of steps: select and
+# rename, type casts, normalizations, one combined boolean filter mask, and optional de-duplication across
+# chunks. Every step works on whole columns with pandas/numpy, so no Python code runs per row. Rules are
+# validated when the plan is compiled, not when the first chunk arrives, and compiled plans are cached by a
+# hash of the configuration they were compiled from.
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Row hashes for cross-chunk de-duplication come from the ingestion pipeline's integrity check
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                              'Self_Refining_Learning_System', 'Data_Ingestion')))
+from integrity_check import RowHashSet
+
+def _to_datetime(series, options):
+    """
+    Casts to the canonical timestamps: naive UTC at nanosecond resolution, whatever the silo's offsets and
+    format, so rows of every silo concatenate into one datetime column and compare with naive times.
+    Values with an offset are converted to UTC; naive values are taken as UTC, or as local times of the
+    rule's 'timezone' when it has one.
+    """
+    timezone = options.get('timezone')
+    if timezone is None:
+        converted = pd.to_datetime(series, format=options.get('format'), errors='coerce', utc=True)
+    else:
+        converted = pd.to_datetime(series, format=options.get('format'), errors='coerce')
+        if converted.dt.tz is None:
+            converted = converted.dt.tz_localize(timezone, ambiguous='NaT', nonexistent='NaT')
+        converted = converted.dt.tz_convert('UTC')
+    return converted.dt.tz_localize(None).astype('datetime64[ns]')
+
+def _to_bool(series, options):
+    true_values = {str(value).lower() for value in options.get('true_values', ['true', '1', 'yes', 'y'])}
+    false_values = {str(value).lower() for value in options.get('false_values', ['false', '0', 'no', 'n'])}
+    text = series.astype('string').str.strip().str.lower()
+    return pd.Series(pd.NA, index=series.index, dtype='boolean').mask(text.isin(true_values), True).mask(text.isin(false_values), False)
+
+# Type casts; values that cannot be converted become missing
+CASTS = {
+    'datetime': _to_datetime,
+    'float': lambda series, options: pd.to_numeric(series, errors='coerce').astype('float64'),
+    'int': lambda series, options: pd.to_numeric(series, errors='coerce').astype('Int64'),
+    'string': lambda series, options: series.astype('string'),
+    'category': lambda series, options: series.astype('category'),
+    'bool': _to_bool,
+}
+
+# Normalizations applied in order after the casts
+NORMALIZERS = {
+    'strip': lambda series, options: series.str.strip(),
+    'lower': lambda series, options: series.str.lower(),
+    'upper': lambda series, options: series.str.upper(),
+    'collapse_whitespace': lambda series, options: series.str.replace(r'\s+', ' ', regex=True),
+    'replace': lambda series, options: series.replace(options['mapping']),
+    'regex_replace': lambda series, options: series.str.replace(options['pattern'], options['replacement'], regex=True),
+    'clip': lambda series, options: series.clip(options.get('lower'), options.get('upper')),
+    'round': lambda series, options: series.round(options.get('decimals', 0)),
+    'scale': lambda series, options: series * options['factor'],
+    'fillna': lambda series, options: series.fillna(options['value']),
+    'floor': lambda series, options: series.dt.floor(options['freq']),
+}
+
+# Row filters; a row is kept when every filter holds, and a comparison with a missing value does not hold
+FILTERS = {
+    'notna': lambda series, options: series.notna(),
+    'isna': lambda series, options: series.isna(),
+    '==': lambda series, options: series == options['value'],
+    '!=': lambda series, options: series != options['value'],
+    '<': lambda series, options: series < options['value'],
+    '<=': lambda series, options: series <= options['value'],
+    '>': lambda series, options: series > options['value'],
+    '>=': lambda series, options: series >= options['value'],
+    'between': lambda series, options: series.between(options['lower'], options['upper']),
+    'isin': lambda series, options: series.isin(options['values']),
+    'notin': lambda series, options: ~series.isin(options['values']),
+    'matches': lambda series, options: series.astype('string').str.fullmatch(options['pattern']),
+}
+
+def _operation(spec):
+    """
+    Splits a rule given as a name or as a dict with an 'op' key into (name, options).
+    """
+    if isinstance(spec, str):
+        return spec, {}
+    return spec['op'], spec
+
+def config_hash(source_config, rule_set):
+    """
+    :return: Hex SHA-256 of the canonical JSON of a source's configuration and its rule set.
+    """
+    canonical = json.dumps({'source': source_config, 'rules': rule_set}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class CompiledPlan:
+    """
+    The preprocessing steps of one source, ready to run on chunks of its rows.
+    """
+
+    def __init__(self, key, columns, keep_unmapped, casts, normalizers, filters, deduplicate, output_columns):
+        self.key = key
+        self.columns = columns
+        self.keep_unmapped = keep_unmapped
+        self.casts = casts
+        self.normalizers = normalizers
+        self.filters = filters
+        self.deduplicate = deduplicate
+        self.output_columns = output_columns
+
+    def _select(self, chunk):
+        missing = [column for column in self.columns if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Source columns {missing} are missing from the data.")
+        if not self.keep_unmapped:
+            chunk = chunk[list(self.columns)]
+        return chunk.rename(columns=self.columns)
+
+    def apply(self, chunk):
+        """
+        Runs the plan on one chunk, without de-duplication across chunks.
+
+        :param chunk: DataFrame of source rows.
+        :return: DataFrame of canonical rows that pass the filters.
+        """
+        chunk = self._select(chunk)
+        for column, (cast, options) in self.casts.items():
+            chunk[column] = cast(chunk[column], options)
+        for column, steps in self.normalizers.items():
+            series = chunk[column]
+            for normalize, options in steps:
+                series = normalize(series, options)
+            chunk[column] = series
+        if self.filters:
+            keep = np.ones(len(chunk), dtype=bool)
+            for column, test, options in self.filters:
+                keep &= test(chunk[column], options).fillna(False).to_numpy(dtype=bool)
+            chunk = chunk[keep]
+        if self.output_columns is not None:
+            chunk = chunk[self.output_columns]
+        return chunk.reset_index(drop=True)
+
+    def stream(self, chunks):
+        """
+        Runs the plan over the chunks of one source, dropping rows already seen in earlier chunks when the rule
+        set asks for de-duplication.
+
+        :param chunks: Iterable of DataFrames of source rows.
+        """
+        seen = RowHashSet() if self.deduplicate is not None else None
+        for chunk in chunks:
+            chunk = self.apply(chunk)
+            if seen is not None and len(chunk):
+                subset = chunk if self.deduplicate is True else chunk[self.deduplicate]
+                hashes = pd.util.hash_pandas_object(subset, index=False).to_numpy()
+                unique, first_index, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+                repeated = np.ones(len(chunk), dtype=bool)
+                repeated[first_index] = False
+                repeated |= seen.add(unique)[inverse.ravel()]
+                chunk = chunk[~repeated].reset_index(drop=True)
+            yield chunk
+
+# Compiled plans by configuration hash
+_PLAN_CACHE = {}
+
+def compile_plan(source_config, rule_set):
+    """
+    Compiles the plan of a source, or returns the cached plan of an identical configuration.
+
+    :param source_config: The source's entry in source_mapping.json ('columns' maps source to canonical names,
+                          'keep_unmapped' keeps the other columns as they are).
+    :param rule_set: Its rule set from rules_config.json: 'casts' (column -> type name or {'type', ...}),
+                     'normalize' (column -> list of operations), 'filters' (list of {'column', 'op', ...}),
+                     'required' (columns that must not be missing), 'deduplicate' (true, or a list of key
+                     columns) and 'output_columns'.
+    :return: CompiledPlan.
+    """
+    key = config_hash(source_config, rule_set)
+    if key in _PLAN_CACHE:
+        return _PLAN_CACHE[key]
+
+    casts = {}
+    for column, spec in rule_set.get('casts', {}).items():
+        name, options = (spec, {}) if isinstance(spec, str) else (spec['type'], spec)
+        if name not in CASTS:
+            raise ValueError(f"Unknown cast {name!r} for column {column!r}. Expected one of {sorted(CASTS)}.")
+        casts[column] = (CASTS[name], options)
+
+    normalizers = {}
+    for column, specs in rule_set.get('normalize', {}).items():
+        steps = []
+        for spec in specs:
+            name, options = _operation(spec)
+            if name not in NORMALIZERS:
+                raise ValueError(f"Unknown normalization {name!r} for column {column!r}. Expected one of {sorted(NORMALIZERS)}.")
+            steps.append((NORMALIZERS[name], options))
+        normalizers[column] = steps
+
+    filters = [(column, FILTERS['notna'], {}) for column in rule_set.get('required', [])]
+    for spec in rule_set.get('filters', []):
+        name, options = _operation(spec)
+        if name not in FILTERS:
+            raise ValueError(f"Unknown filter {name!r} for column {spec.get('column')!r}. Expected one of {sorted(FILTERS)}.")
+        filters.append((spec['column'], FILTERS[name], options))
+
+    deduplicate = rule_set.get('deduplicate')
+    plan = CompiledPlan(key, dict(source_config.get('columns', {})), source_config.get('keep_unmapped', False),
+                        casts, normalizers, filters, deduplicate or None, rule_set.get('output_columns'))
+    _PLAN_CACHE[key] = plan
+    return plan
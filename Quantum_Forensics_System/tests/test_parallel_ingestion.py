@@ -0,0 +1,40 @@
+# test_parallel_ingestion.py
+# Tests of the process-pool ingestion pipeline against the single-process one.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# The ingestion modules are plain scripts in Self_Refining_Learning_System/Data_Ingestion, not a package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Self_Refining_Learning_System', 'Data_Ingestion'))
+from historical_data_ingestion import LOGGER_NAME, HistoricalDataIngestion
+from instrumentation import Instrumentation
+
+START_TIME = '2020-01-03'
+END_TIME = '2020-01-08'
+
+def _write_events(path, rows=6000):
+    rng = np.random.default_rng(3)
+    seconds = np.sort(rng.integers(0, 10 * 86_400, rows))
+    timestamps = pd.Timestamp('2020-01-01') + pd.to_timedelta(seconds, unit='s')
+    events = pd.DataFrame({'timestamp': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+                           'value': rng.standard_normal(rows) * 1e3, 'count': rng.integers(0, 100, rows)})
+    events.loc[rng.choice(rows, 50), 'value'] = np.nan
+    events.to_csv(path, index=False)
+
+def test_run_parallel_matches_serial_statistics(tmp_path):
+    path = str(tmp_path / 'events.csv')
+    _write_events(path)
+    instrumentation = Instrumentation(LOGGER_NAME)
+    serial = HistoricalDataIngestion(path, START_TIME, END_TIME, instrumentation)
+    serial.load_data()
+    serial.preprocess_data()
+    serial.filter_data_by_time()
+    expected = serial.generate_statistics()
+
+    for workers, partition_bytes in ((1, 3000), (2, 20000)):
+        parallel = HistoricalDataIngestion(path, START_TIME, END_TIME, instrumentation)
+        pd.testing.assert_frame_equal(parallel.run_parallel(workers=workers, partition_bytes=partition_bytes),
+                                      expected, check_exact=True)
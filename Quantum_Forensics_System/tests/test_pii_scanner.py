@@ -0,0 +1,24 @@
+# test_pii_scanner.py
+# Tests of the content-level PII scanner on CSV files split into byte ranges.
+
+import os
+import sys
+
+import pandas as pd
+
+# The compliance modules are plain scripts in AI_Ethics_Security_Compliance/Compliance, not a package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AI_Ethics_Security_Compliance', 'Compliance'))
+from pii_scanner import scan_file, scan_frame
+
+def test_full_scan_with_quoted_newlines_across_partitions(tmp_path):
+    path = tmp_path / 'notes.csv'
+    rows = [f'{i},"call me at\n555-123-{i:04d}\nthanks"' if i % 5 == 0 else f'{i},"note\n""{i}"""' for i in range(3000)]
+    path.write_text('id,note\n' + '\n'.join(rows) + '\n')
+    expected = scan_frame(pd.read_csv(path, dtype=str), full_scan=True).report()
+
+    result, scope = scan_file(str(path), full_scan=True, workers=1, partition_bytes=5000)
+
+    assert scope == 'full'
+    assert result.rows == 3000
+    pd.testing.assert_frame_equal(result.report(), expected)
+    assert result.report()['example_rows'][0] == [0, 5, 10, 15, 20]